@@ -1,14 +1,46 @@
 """Simple flask app to connect the dataverse to Marketplace."""
 
+import hashlib
 import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+from urllib.parse import urlencode
 
-from flask import Flask, jsonify, make_response, request, send_file
+from flask import Flask, Response, abort, g, request
+from requests.exceptions import HTTPError
+from werkzeug.datastructures import MultiDict
 
-from dataverse_query.dataset import Dataset
+from dataverse_query import codec
+from dataverse_query.cache import create_cache
+from dataverse_query.conversion import ConversionService
 from dataverse_query.dataverse_query import DataverseQuery
+from dataverse_query.dcat_store import DcatStore, catalog_triples
+from dataverse_query.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    SIZE_BUCKETS,
+    CallbackMetric,
+    Gauge,
+    Histogram,
+)
+from dataverse_query.search_index import SearchIndex
+from dataverse_query.singleflight import SingleFlight
+from dataverse_query.utils import (
+    RDF_FORMATS,
+    decode_cursor,
+    encode_cursor,
+    get_dataset_last_modified,
+    get_dataset_version,
+    normalize_search,
+)
 
-DATAVERSE_URL = "https://entrepot.recherche.data.gouv.fr/"
+DATAVERSE_URL = os.environ.get(
+    "DATAVERSE_URL", "https://entrepot.recherche.data.gouv.fr/"
+)
 
 
 app = Flask(__name__)
@@ -19,7 +51,218 @@ def headers():
     return json.dumps(dict(request.headers))
 
 
-dq = DataverseQuery(DATAVERSE_URL)
+cache = create_cache(
+    os.environ.get("DATAVERSE_CACHE", "memory"),
+    maxsize=int(os.environ.get("DATAVERSE_CACHE_MAXSIZE", 1024)),
+    ttl=float(os.environ.get("DATAVERSE_CACHE_TTL", 300)),
+    directory=os.environ.get("DATAVERSE_CACHE_DIR"),
+)
+
+# Cache of the global search responses, kept in memory and short-lived since
+#  the search results change as datasets are published.
+SEARCH_CACHE_MAXSIZE = int(os.environ.get("DATAVERSE_SEARCH_CACHE_MAXSIZE", 1024))
+search_cache = create_cache(
+    "memory" if SEARCH_CACHE_MAXSIZE > 0 else "none",
+    maxsize=SEARCH_CACHE_MAXSIZE,
+    ttl=float(os.environ.get("DATAVERSE_SEARCH_CACHE_TTL", 60)),
+)
+
+# Options of the queries to the dataverse, shared with the asynchronous
+#  queries of the ASGI entry point (`asgi.py`).
+UPSTREAM_OPTIONS = dict(
+    max_retries=int(os.environ.get("DATAVERSE_MAX_RETRIES", 3)),
+    backoff_factor=float(os.environ.get("DATAVERSE_BACKOFF_FACTOR", 0.5)),
+    connect_timeout=float(os.environ.get("DATAVERSE_CONNECT_TIMEOUT", 5)),
+    read_timeout=float(os.environ.get("DATAVERSE_READ_TIMEOUT", 60)),
+    cache=cache,
+    search_cache=search_cache,
+)
+
+dq = DataverseQuery(
+    DATAVERSE_URL,
+    pool_maxsize=int(os.environ.get("DATAVERSE_POOL_MAXSIZE", 16)),
+    **UPSTREAM_OPTIONS,
+)
+
+# Local full-text index answering the global searches, built by the
+#  `dataverse-index` command (the dataverse answers the searches it misses).
+search_index = (
+    SearchIndex(os.environ["DATAVERSE_SEARCH_INDEX"], dq.base_url)
+    if os.environ.get("DATAVERSE_SEARCH_INDEX")
+    else None
+)
+
+# Store of the DCAT of the datasets, kept up to date by the `dataverse-sync`
+#  command. It serves `/catalog`, and the N-Triples of the versions it has.
+dcat_store = (
+    DcatStore(os.environ["DATAVERSE_DCAT_STORE"])
+    if os.environ.get("DATAVERSE_DCAT_STORE")
+    else None
+)
+
+# Datasets per page of `/catalog`, by default and at most.
+CATALOG_PAGE_SIZE = int(os.environ.get("DATAVERSE_CATALOG_PAGE_SIZE", 100))
+CATALOG_MAX_PAGE_SIZE = 1000
+
+# Worker processes converting datasets to DCAT (0 converts in the thread
+#  handling the request).
+conversion_service = ConversionService(
+    int(os.environ.get("DATAVERSE_CONVERSION_WORKERS", 0))
+)
+# Concurrent requests for the DCAT of the same dataset share one conversion.
+conversion_flight = SingleFlight("conversion")
+
+# Size of the chunks in which dataset archives are relayed to the client.
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get("DATAVERSE_DOWNLOAD_CHUNK_SIZE", 64 * 1024))
+
+# Datasets requested per page, and pages requested concurrently, when
+#  harvesting the datasets hosted.
+HARVEST_PAGE_SIZE = int(os.environ.get("DATAVERSE_HARVEST_PAGE_SIZE", 100))
+HARVEST_MAX_IN_FLIGHT = int(os.environ.get("DATAVERSE_HARVEST_MAX_IN_FLIGHT", 4))
+
+# Maximum number of global search results per page (the dataverse's limit).
+SEARCH_MAX_PER_PAGE = 1000
+
+# Maximum number of datasets per batch metadata request, and number of
+#  datasets fetched and converted concurrently (shared by all the requests).
+BATCH_MAX_SIZE = int(os.environ.get("DATAVERSE_BATCH_MAX_SIZE", 100))
+BATCH_WORKERS = int(os.environ.get("DATAVERSE_BATCH_WORKERS", 8))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS)
+# Maximum size of the `X-Failed-Datasets` header of a batch, well below the
+#  limits of the servers and proxies on the size of the headers (often 8 KiB).
+BATCH_FAILURES_HEADER_MAX_SIZE = 4096
+
+# Headers of the dataverse's download response that are relayed to the client.
+FORWARDED_DOWNLOAD_HEADERS = (
+    "Accept-Ranges",
+    "Content-Disposition",
+    "Content-Length",
+    "Content-Range",
+    "Content-Type",
+    "ETag",
+    "Last-Modified",
+)
+
+REQUEST_SECONDS = Histogram(
+    "dataverse_app_request_seconds",
+    "Time to handle the requests to the app, until the response headers are "
+    "ready, by endpoint, method and status code.",
+    ("endpoint", "method", "status"),
+)
+RESPONSE_SIZE_BYTES = Histogram(
+    "dataverse_app_response_size_bytes",
+    "Size of the bodies of the responses of the app (streamed bodies "
+    "included), by endpoint.",
+    ("endpoint",),
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "dataverse_app_requests_in_flight",
+    "Requests being handled by the app (streamed bodies excluded), by endpoint.",
+    ("endpoint",),
+)
+CONVERSION_SECONDS = Histogram(
+    "dataverse_app_conversion_seconds",
+    "Time to convert datasets to serialized DCAT (cache misses only), by format.",
+    ("format",),
+)
+
+
+def _cache_stat(name: str):
+    """Function reading one of the statistics of the cache, for a metric."""
+    return lambda: {} if cache is None else {(): cache.stats()[name]}
+
+
+def _cache_hit_ratio() -> dict:
+    if cache is None or cache.hits + cache.misses == 0:
+        return {}
+    return {(): cache.hits / (cache.hits + cache.misses)}
+
+
+CallbackMetric(
+    "dataverse_app_cache_hits_total",
+    "Lookups of the cache that found a value.",
+    "counter",
+    _cache_stat("hits"),
+)
+CallbackMetric(
+    "dataverse_app_cache_misses_total",
+    "Lookups of the cache that found no value (or an expired one).",
+    "counter",
+    _cache_stat("misses"),
+)
+CallbackMetric(
+    "dataverse_app_cache_evictions_total",
+    "Entries evicted from the cache to make room for new ones.",
+    "counter",
+    _cache_stat("evictions"),
+)
+CallbackMetric(
+    "dataverse_app_cache_entries",
+    "Entries in the cache.",
+    "gauge",
+    _cache_stat("size"),
+)
+CallbackMetric(
+    "dataverse_app_cache_hit_ratio",
+    "Fraction of the lookups of the cache that found a value.",
+    "gauge",
+    _cache_hit_ratio,
+)
+
+
+def _endpoint() -> str:
+    """Route of the current request, a bounded label unlike its path."""
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+@app.before_request
+def _start_timer():
+    g.start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc(endpoint=_endpoint())
+
+
+@app.after_request
+def _record_request(response: Response) -> Response:
+    endpoint = _endpoint()
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - g.start,
+        endpoint=endpoint,
+        method=request.method,
+        status=response.status_code,
+    )
+    if response.is_streamed:
+        response.response = _count_bytes(response.response, endpoint)
+    else:
+        RESPONSE_SIZE_BYTES.observe(
+            response.calculate_content_length() or 0, endpoint=endpoint
+        )
+    return response
+
+
+@app.teardown_request
+def _end_request(error: Optional[BaseException]):
+    if "start" in g:
+        REQUESTS_IN_FLIGHT.dec(endpoint=_endpoint())
+
+
+def _count_bytes(body: Iterable, endpoint: str) -> Iterator:
+    """Relay a streamed body, recording its size once it is sent or dropped."""
+    size = 0
+    try:
+        for chunk in body:
+            size += len(chunk.encode() if isinstance(chunk, str) else chunk)
+            yield chunk
+    finally:
+        RESPONSE_SIZE_BYTES.observe(size, endpoint=endpoint)
+        if hasattr(body, "close"):
+            body.close()
+
+
+@app.route("/metrics")
+def metrics():
+    """Metrics of the process, in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 @app.route("/heartbeat")
@@ -30,31 +273,386 @@ def heartbeat():
 @app.route("/dataset", methods=["GET"])
 def getCollection():
     logging.info("Request for all datasets.")
-    return dq.get_all_datasets()
+    listing_parameters = {"limit", "offset", "cursor", "format"}
+    if listing_parameters.isdisjoint(request.args) and not _prefers_ndjson():
+        # The search response of the dataverse is relayed as it is.
+        return _conditional(_json_response(dq.get_all_datasets(raw=True)))
+
+    limit = _get_non_negative_int("limit")
+    if "cursor" in request.args:
+        try:
+            offset = decode_cursor(request.args["cursor"])
+        except ValueError as e:
+            abort(400, str(e))
+    else:
+        offset = _get_non_negative_int("offset", 0)
+    ndjson = request.args.get("format", "").lower() == "ndjson" or (
+        "format" not in request.args and _prefers_ndjson()
+    )
+
+    total_count, datasets = dq.harvest_datasets(
+        offset, limit, HARVEST_PAGE_SIZE, HARVEST_MAX_IN_FLIGHT
+    )
+    headers = {"X-Total-Count": str(total_count)}
+    if limit and offset + limit < total_count:
+        next_page = (
+            request.base_url
+            + "?"
+            + urlencode({"cursor": encode_cursor(offset + limit), "limit": limit})
+        )
+        headers["Link"] = f'<{next_page}>; rel="next"'
+    if ndjson:
+        body = (codec.dumps(dataset) + b"\n" for dataset in datasets)
+        return Response(body, mimetype="application/x-ndjson", headers=headers)
+    return Response(_json_array(datasets), mimetype="application/json", headers=headers)
+
+
+def _prefers_ndjson() -> bool:
+    """Whether the client prefers NDJSON over JSON."""
+    best = request.accept_mimetypes.best_match(
+        ["application/json", "application/x-ndjson"]
+    )
+    return best == "application/x-ndjson"
+
+
+def _get_non_negative_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    """Get a query parameter that must be a non-negative integer."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    if not value.isdigit():
+        abort(400, f"Parameter {name} must be a non-negative integer.")
+    return int(value)
+
+
+def _json_array(items: Iterable) -> Iterator[bytes]:
+    """Encode an iterable as a JSON array, chunk by chunk."""
+    separator = b"["
+    for item in items:
+        yield separator + codec.dumps(item)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def _json_response(body) -> Response:
+    """JSON response, encoded by the codec unless already encoded (bytes)."""
+    if not isinstance(body, bytes):
+        body = codec.dumps(body)
+    return Response(body, mimetype="application/json")
 
 
 @app.route("/dataset/<path:datasetId>", methods=["GET"])
 def getDataset(datasetId: str):
     logging.info(f"Request for dataset {datasetId}.")
-    file = dq.get_dataset(datasetId)
-    return make_response(file)
+    try:
+        upstream = dq.stream_dataset(datasetId, request.headers.get("Range"))
+    except HTTPError as e:
+        if e.response is None or e.response.status_code != 416:
+            raise
+        # Empty, with the size of the archive in `Content-Range`.
+        response = Response(status=416)
+        for header in ("Accept-Ranges", "Content-Range"):
+            if header in e.response.headers:
+                response.headers[header] = e.response.headers[header]
+        del response.headers["Content-Type"]
+        return response
+
+    # The archive is relayed chunk by chunk. When the client disconnects the
+    #  server closes the response, which closes the upstream download too.
+    response = Response(
+        upstream.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE),
+        status=upstream.status_code,
+        headers=_forwarded_headers(upstream),
+        direct_passthrough=True,
+    )
+    response.call_on_close(upstream.close)
+    return response
+
+
+def _forwarded_headers(upstream) -> dict:
+    """Headers of a dataverse download response to relay to the client."""
+    return {
+        header: upstream.headers[header]
+        for header in FORWARDED_DOWNLOAD_HEADERS
+        if header in upstream.headers
+    }
 
 
 @app.route("/metadata/<path:datasetId>", methods=["HEAD"])
 def getMetadata(datasetId: str):
     logging.info(f"Request for dataset's {datasetId} metadata.")
-    dataset = Dataset(dq.get_dataset_metadata(datasetId))
-    filename = "".join(i for i in datasetId if i not in "\\/:*?<>|") + ".ttl"
-    dataset.to_dcat_file(filename)
-    return send_file(filename)
+    media_type = _negotiate_rdf_format()
+    rdf_format, extension = RDF_FORMATS[media_type]
+    metadata = dq.get_dataset_metadata(datasetId)
+    filename = "".join(i for i in datasetId if i not in "\\/:*?<>|") + extension
+    version = get_dataset_version(metadata)
+    # Weak, since the tag identifies the version and format served, not its
+    #  bytes: serializations of the same graph may differ (e.g. blank nodes).
+    etag = hashlib.sha1(f"{datasetId}:{version}:{rdf_format}".encode()).hexdigest()
+    last_modified = get_dataset_last_modified(metadata)
+    if _is_not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = Response(
+            _get_dcat(datasetId, version, metadata, rdf_format),
+            mimetype=media_type,
+            headers={"Content-Disposition": f'inline; filename="{filename}"'},
+        )
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.vary.add("Accept")
+    return response
+
+
+@app.route("/metadata", methods=["POST"])
+def getMetadataBatch():
+    """DCAT description of several datasets.
+
+    The body is a JSON list of dataset IDs (or an object with such a list
+    under `ids`). The datasets are fetched and converted concurrently. When
+    the client prefers `application/x-ndjson`, one JSON line is streamed per
+    dataset as soon as it is ready, with either its JSON-LD description or
+    its error. Otherwise, the descriptions are merged into a single graph,
+    the number of failures is given by the `X-Failed-Count` header, and the
+    failures are listed in the `X-Failed-Datasets` header, as many as fit
+    (see `_failures_header`).
+    """
+    body = request.get_json(silent=True)
+    ids = body.get("ids") if isinstance(body, dict) else body
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        abort(400, "Expected a JSON list of dataset IDs.")
+    if len(ids) > BATCH_MAX_SIZE:
+        abort(413, f"At most {BATCH_MAX_SIZE} datasets can be requested at once.")
+    ids = list(dict.fromkeys(ids))
+    logging.info(f"Request for the metadata of {len(ids)} datasets.")
+
+    if _prefers_ndjson():
+        futures = {
+            batch_executor.submit(_get_dataset_dcat, i, "json-ld"): i for i in ids
+        }
+        return Response(_batch_lines(futures), mimetype="application/x-ndjson")
+
+    media_type = _negotiate_rdf_format()
+    rdf_format = RDF_FORMATS[media_type][0]
+    futures = {batch_executor.submit(_get_dataset_dcat, i, "nt"): i for i in ids}
+    triples, failures = [], []
+    for future in futures:
+        try:
+            triples.append(future.result())
+        except Exception as e:
+            failures.append({"id": futures[future], **_describe_error(e)})
+    # Blank node labels are unique across conversions, therefore N-Triples
+    #  can simply be concatenated.
+    dcat = b"".join(triples)
+    if rdf_format != "nt":
+        from rdflib import Graph
+
+        dcat = (
+            Graph()
+            .parse(data=dcat, format="nt")
+            .serialize(format=rdf_format, encoding="utf-8")
+        )
+    response = Response(dcat, mimetype=media_type)
+    response.headers["X-Failed-Count"] = str(len(failures))
+    response.headers["X-Failed-Datasets"] = _failures_header(failures)
+    response.vary.add("Accept")
+    return response
+
+
+def _batch_lines(futures: dict) -> Iterator[bytes]:
+    """JSON lines describing the result of each dataset of a batch."""
+    for future in as_completed(futures):
+        line = {"id": futures[future]}
+        try:
+            # The JSON-LD is re-encoded on a single line.
+            line.update(status=200, dcat=codec.loads(future.result()))
+        except Exception as e:
+            line.update(_describe_error(e))
+        yield codec.dumps(line) + b"\n"
+
+
+def _failures_header(failures: list) -> str:
+    """JSON list of the first failures of a batch that fit in a header.
+
+    The failures are listed in the order of the request, without their error
+    message if they do not fit with it, and the list is cut once they do not
+    fit in `BATCH_FAILURES_HEADER_MAX_SIZE` bytes at all.
+    """
+    listed = []
+    size = len("[]")
+    for failure in failures:
+        for entry in (failure, {"id": failure["id"], "status": failure["status"]}):
+            entry_size = len(json.dumps(entry)) + len(", ")
+            if size + entry_size <= BATCH_FAILURES_HEADER_MAX_SIZE:
+                listed.append(entry)
+                size += entry_size
+                break
+        else:
+            break
+    return json.dumps(listed)
+
+
+def _describe_error(error: Exception) -> dict:
+    """Status code and message describing why a dataset could not be served."""
+    if isinstance(error, HTTPError) and error.response is not None:
+        return {"status": error.response.status_code, "error": str(error)}
+    return {"status": 500, "error": str(error)}
+
+
+def _get_dataset_dcat(dataset_id: str, rdf_format: str) -> bytes:
+    """DCAT description of a dataset, serialized."""
+    metadata = dq.get_dataset_metadata(dataset_id)
+    version = get_dataset_version(metadata)
+    return _get_dcat(dataset_id, version, metadata, rdf_format)
+
+
+def _negotiate_rdf_format() -> str:
+    """Media type of the RDF serialization preferred by the client.
+
+    Defaults to Turtle when the client accepts none of the supported ones.
+    """
+    return request.accept_mimetypes.best_match(RDF_FORMATS, default="text/turtle")
+
+
+def _get_dcat(dataset_id: str, version: str, metadata: dict, rdf_format: str) -> bytes:
+    """DCAT description of a dataset, serialized, from the cache if available."""
+    key = f"dcat:{dataset_id}:{version}:{rdf_format}"
+    if cache is not None and (dcat := cache.get(key)) is not None:
+        return dcat
+    if (
+        dcat_store is not None
+        and rdf_format == "nt"
+        and (dcat := dcat_store.get(dataset_id, version)) is not None
+    ):
+        return dcat
+    return conversion_flight.do(key, _convert, key, metadata, rdf_format)
+
+
+def _convert(key: str, metadata: dict, rdf_format: str) -> bytes:
+    """Convert a dataset to DCAT, and cache the result under `key`."""
+    with CONVERSION_SECONDS.time(format=rdf_format):
+        dcat = conversion_service.convert(metadata, rdf_format)
+    if cache is not None:
+        cache.set(key, dcat)
+    return dcat
+
+
+@app.route("/catalog", methods=["GET"])
+def getCatalog():
+    """Page of the `dcat:Catalog` of all the datasets, from the DCAT store.
+
+    The pages are chained by the `next` link of the `Link` header. N-Triples
+    are streamed from the store, the other formats are serialized from a
+    graph of the page.
+    """
+    if dcat_store is None:
+        abort(404, "No DCAT store is configured.")
+    limit = _get_non_negative_int("limit", CATALOG_PAGE_SIZE)
+    if not 1 <= limit <= CATALOG_MAX_PAGE_SIZE:
+        abort(400, f"Parameter limit must be between 1 and {CATALOG_MAX_PAGE_SIZE}.")
+    after = 0
+    if "cursor" in request.args:
+        try:
+            after = decode_cursor(request.args["cursor"])
+        except ValueError as e:
+            abort(400, str(e))
+    logging.info("Request for a page of the catalogue.")
+
+    page = dcat_store.page(after, limit)
+    headers = {}
+    if len(page) == limit:
+        next_page = (
+            request.base_url
+            + "?"
+            + urlencode({"cursor": encode_cursor(page[-1][0]), "limit": limit})
+        )
+        headers["Link"] = f'<{next_page}>; rel="next"'
+    media_type = request.accept_mimetypes.best_match(
+        ["application/n-triples", *RDF_FORMATS], default="application/n-triples"
+    )
+    body = catalog_triples(request.base_url, page)
+    if media_type != "application/n-triples":
+        from rdflib import Graph
+
+        body = (
+            Graph()
+            .parse(data=b"".join(body), format="nt")
+            .serialize(format=RDF_FORMATS[media_type][0], encoding="utf-8")
+        )
+    response = Response(body, mimetype=media_type, headers=headers)
+    response.vary.add("Accept")
+    return response
 
 
 @app.route("/globalSearch", methods=["GET"])
 def globalSearch():
-    query = request.args.get("q")
+    try:
+        query, page, per_page, types = parse_search_args(request.args)
+    except ValueError as e:
+        abort(400, str(e))
     logging.info(f"Global search request with query: {query}")
-    return make_response(jsonify(dq.global_search(query)))
+    results = None
+    if search_index is not None:
+        results = search_index.search(query, page, per_page, types)
+    if results is None:
+        results = dq.global_search(query, page, per_page, types)
+    return _conditional(_json_response(results))
+
+
+def parse_search_args(args: MultiDict) -> tuple[str, int, int, tuple[str, ...]]:
+    """Parameters of a global search, normalized (see `normalize_search`).
+
+    Also used by the ASGI entry point, which queries the dataverse itself.
+
+    Args:
+        args (MultiDict): query parameters of the request
+
+    Raises:
+        ValueError: If a parameter is missing or invalid.
+
+    Returns:
+        tuple[str, int, int, tuple[str, ...]]: query, page, number of results
+            per page and types searched
+    """
+    query = args.get("q")
+    if query is None:
+        raise ValueError("Parameter q is required.")
+    numbers = []
+    for name, default in (("page", "1"), ("per_page", "10")):
+        value = args.get(name, default)
+        if not value.isdigit():
+            raise ValueError(f"Parameter {name} must be a non-negative integer.")
+        numbers.append(int(value))
+    page, per_page = numbers
+    if page < 1 or not 1 <= per_page <= SEARCH_MAX_PER_PAGE:
+        raise ValueError(
+            f"Parameters page and per_page must be positive, and per_page at "
+            f"most {SEARCH_MAX_PER_PAGE}."
+        )
+    types = [t for value in args.getlist("type") for t in value.split(",")]
+    query, types = normalize_search(query, types)
+    return query, page, per_page, types
+
+
+def _is_not_modified(etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Whether the client's cached copy of a resource is still valid.
+
+    `If-None-Match` takes precedence over `If-Modified-Since`.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _conditional(response: Response) -> Response:
+    """Tag a response with a hash of its content, answering 304 if unchanged."""
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", debug=True, port=8080)
+    # Development server only, debugging is enabled by `FLASK_DEBUG=1`. See
+    #  `gunicorn.conf.py` for production.
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
@@ -0,0 +1,112 @@
+"""ASGI entry point of the app, served by an asynchronous server, e.g.:
+
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn asgi:app
+
+The Flask app runs in a pool of `GUNICORN_THREADS` threads. Global searches
+are the exception: the dataverse is queried from the event loop by an
+`AsyncDataverseQuery`, whose response is put in the search cache before the
+request is handed to the Flask app, which then answers from the cache. Hence
+a worker waits for any number of slow searches without holding a thread for
+each. If the query fails, the Flask app queries the dataverse again and
+answers the error as usual.
+
+Requires the `async` extra (`pip install .[async]`), and the search cache
+(`DATAVERSE_SEARCH_CACHE_MAXSIZE` > 0), without which the searches are made
+by the Flask app.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+import httpx
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.datastructures import MultiDict
+
+import app as flask_app
+from dataverse_query.async_dataverse_query import AsyncDataverseQuery
+
+adq = AsyncDataverseQuery(
+    flask_app.DATAVERSE_URL,
+    max_connections=int(os.environ.get("DATAVERSE_ASYNC_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(os.environ.get("DATAVERSE_POOL_MAXSIZE", 16)),
+    **flask_app.UPSTREAM_OPTIONS,
+)
+
+# Threads running the Flask app. They are started on demand, hence after the
+#  workers are forked from a preloaded master.
+wsgi_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("GUNICORN_THREADS", 16)),
+    thread_name_prefix="wsgi",
+)
+
+
+class _WsgiToAsgiInstance(WsgiToAsgiInstance):
+    # `asgiref` runs every request in the same thread by default.
+    run_wsgi_app = SyncToAsync(
+        WsgiToAsgiInstance.__dict__["run_wsgi_app"].func,
+        thread_sensitive=False,
+        executor=wsgi_executor,
+    )
+
+
+class _WsgiToAsgi(WsgiToAsgi):
+    """Adapter of a WSGI app, running its requests in `wsgi_executor`."""
+
+    async def __call__(self, scope, receive, send):
+        instance = _WsgiToAsgiInstance(
+            self.wsgi_application, self.duplicate_header_limit
+        )
+        await instance(scope, receive, send)
+
+
+wsgi_app = _WsgiToAsgi(flask_app.app)
+
+
+async def app(scope, receive, send):
+    """ASGI app: the Flask app, with global searches queried asynchronously."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if (
+        scope["type"] == "http"
+        and scope["path"] == "/globalSearch"
+        and scope["method"] in ("GET", "HEAD")
+    ):
+        await _prefetch_search(scope["query_string"])
+    await wsgi_app(scope, receive, send)
+
+
+async def _prefetch_search(query_string: bytes):
+    """Put the results of a global search in the search cache, if needed.
+
+    The invalid searches, and the ones answered by the local search index,
+    are left to the Flask app.
+    """
+    if adq.search_cache is None:
+        return
+    args = MultiDict(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    try:
+        query, page, per_page, types = flask_app.parse_search_args(args)
+    except ValueError:
+        return
+    index = flask_app.search_index
+    if index is not None and index.search(query, page, per_page, types) is not None:
+        return
+    try:
+        await adq.global_search(query, page, per_page, types)
+    except httpx.HTTPError as e:
+        logging.warning(f"Asynchronous global search failed: {e!r}")
+
+
+async def _lifespan(receive, send):
+    """Answer the lifespan events, closing the connections on shutdown."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await adq.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
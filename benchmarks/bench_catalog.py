@@ -0,0 +1,62 @@
+"""Time to read a page of the catalogue from the DCAT store.
+
+Fills DCAT stores of increasing sizes with copies of the description of
+`examples/dataset.json`, and reports the time to read a page of the
+catalogue at its start and at its end, which should not depend on the size
+of the store.
+
+Usage:
+    python benchmarks/bench_catalog.py [--datasets N [N ...]] [--limit N]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import tempfile
+import time
+
+from dataverse_query.dataset import Dataset
+from dataverse_query.dcat_store import DcatStore, catalog_triples
+
+EXAMPLE = pathlib.Path(__file__).parents[1] / "examples" / "dataset.json"
+
+
+def read_page(store: DcatStore, after: int, limit: int, repeat: int = 20) -> float:
+    """Mean time to read and serialize a page of the catalogue, in seconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        b"".join(catalog_triples("http://localhost/catalog", store.page(after, limit)))
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--datasets", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    dcat = Dataset(json.loads(EXAMPLE.read_text())).serialize("nt", streaming=True)
+    print(f"{'datasets':>9} {'first page (ms)':>16} {'last page (ms)':>15}")
+    for datasets in args.datasets:
+        with tempfile.TemporaryDirectory() as directory:
+            store = DcatStore(os.path.join(directory, "store.db"))
+            with store._connection() as connection:
+                connection.executemany(
+                    "INSERT INTO datasets (id, uri, version, dcat) "
+                    "VALUES (?, ?, '1.0', ?)",
+                    (
+                        (f"doi:10.5072/FK2/{i:06d}", f"https://doi.org/{i}", dcat)
+                        for i in range(datasets)
+                    ),
+                )
+            first = read_page(store, 0, args.limit)
+            last = read_page(store, datasets - args.limit, args.limit)
+            print(f"{datasets:>9} {first * 1000:>16.2f} {last * 1000:>15.2f}")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
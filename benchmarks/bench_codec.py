@@ -0,0 +1,123 @@
+"""Time to decode and re-encode search pages of the dataverse, by JSON codec.
+
+Builds search responses with realistic dataset items (the fields returned by
+the `search/` API of a dataverse), and reports the time to decode them and
+to encode them again, with the standard library, with orjson when it is
+installed, and when the response is relayed as it is (raw bytes).
+
+Usage:
+    python benchmarks/bench_codec.py [--per-page N [N ...]]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def search_item(i: int) -> dict:
+    """Search item of a dataset, as returned by the dataverse."""
+    doi = f"doi:10.5072/FK2/{i:06d}"
+    return {
+        "name": f"Measurements of the thermal conductivity of alloy {i}",
+        "type": "dataset",
+        "url": f"https://doi.org/10.5072/FK2/{i:06d}",
+        "global_id": doi,
+        "description": "Thermal conductivity of an aluminium alloy measured by "
+        "laser flash analysis between 300 K and 900 K, with the raw signals, "
+        "the fitted diffusivities and the scripts used to process them. " * 3,
+        "published_at": "2023-03-14T09:26:53Z",
+        "publisher": "Materials Science Dataverse",
+        "citationHtml": f'Doe, Jane; Smith, John, 2023, "Measurements {i}", '
+        f'<a href="https://doi.org/10.5072/FK2/{i:06d}">{doi}</a>, V1',
+        "identifier_of_dataverse": "materials",
+        "name_of_dataverse": "Materials Science Dataverse",
+        "citation": f'Doe, Jane; Smith, John, 2023, "Measurements {i}", {doi}, V1',
+        "storageIdentifier": f"file://10.5072/FK2/{i:06d}",
+        "subjects": ["Engineering", "Physics"],
+        "fileCount": 12,
+        "versionId": 1000 + i,
+        "versionState": "RELEASED",
+        "majorVersion": 1,
+        "minorVersion": 0,
+        "createdAt": "2023-03-13T16:02:11Z",
+        "updatedAt": "2023-03-14T09:26:53Z",
+        "contacts": [{"name": "Doe, Jane", "affiliation": "Fraunhofer IWM"}],
+        "authors": ["Doe, Jane", "Smith, John"],
+        "keywords": ["thermal conductivity", "laser flash", "aluminium"],
+    }
+
+
+def search_response(per_page: int) -> bytes:
+    """Body of a page of the search of the dataverse."""
+    return json.dumps(
+        {
+            "status": "OK",
+            "data": {
+                "q": "*",
+                "total_count": 10000,
+                "start": 0,
+                "spelling_alternatives": {},
+                "items": [search_item(i) for i in range(per_page)],
+                "count_in_response": per_page,
+            },
+        }
+    ).encode()
+
+
+def best_time(function: Callable, repeat: int) -> float:
+    """Best time of a function over `repeat` runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-page", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    codecs = {
+        "json": (
+            json.loads,
+            lambda obj: json.dumps(
+                obj, ensure_ascii=False, separators=(",", ":")
+            ).encode(),
+        ),
+    }
+    if orjson is not None:
+        codecs["orjson"] = (orjson.loads, orjson.dumps)
+    else:
+        print("orjson is not installed (pip install .[fast]).")
+
+    print(
+        f"{'items':>6} {'size (kB)':>10} {'codec':<8} {'decode (ms)':>12} "
+        f"{'encode (ms)':>12} {'total (ms)':>11}"
+    )
+    for per_page in args.per_page:
+        body = search_response(per_page)
+        size = len(body) / 1000
+        for name, (loads, dumps) in codecs.items():
+            decode = best_time(lambda: loads(body), args.repeat)
+            doc = loads(body)
+            encode = best_time(lambda: dumps(doc), args.repeat)
+            print(
+                f"{per_page:>6} {size:>10.1f} {name:<8} {decode * 1000:>12.3f} "
+                f"{encode * 1000:>12.3f} {(decode + encode) * 1000:>11.3f}"
+            )
+        print(
+            f"{per_page:>6} {size:>10.1f} {'raw':<8} {0:>12.3f} {0:>12.3f} {0:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Throughput benchmark of the conversion of datasets to DCAT.
+
+Converts copies of a dataset JSON with a `ConversionService` using an
+increasing number of worker processes (and in the calling thread, `0`
+workers), and reports the datasets converted per second.
+
+Usage:
+    python benchmarks/bench_conversion_throughput.py [--datasets N] [FILE]
+"""
+
+import argparse
+import copy
+import json
+import os
+import pathlib
+import time
+
+from dataverse_query.conversion import ConversionService
+
+EXAMPLE = pathlib.Path(__file__).parents[1] / "examples" / "dataset.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", nargs="?", default=EXAMPLE, type=pathlib.Path)
+    parser.add_argument("--datasets", type=int, default=2000)
+    parser.add_argument("--format", default="nt")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({0, 1, 2, 4, os.cpu_count()}),
+        help="Numbers of worker processes to benchmark.",
+    )
+    args = parser.parse_args()
+
+    doc = json.loads(args.file.read_text())
+    docs = []
+    for i in range(args.datasets):
+        docs.append(copy.deepcopy(doc))
+        docs[-1]["persistentUrl"] += f"-{i}"
+
+    print(f"{os.cpu_count()} CPUs, {args.datasets} datasets")
+    for workers in args.workers:
+        service = ConversionService(workers)
+        # Start (and prewarm) the workers before timing.
+        for _, future in service.imap_unordered(
+            enumerate(docs[: 4 * max(workers, 1)]), args.format
+        ):
+            future.result()
+        start = time.perf_counter()
+        for _, future in service.imap_unordered(enumerate(docs), args.format):
+            future.result()
+        elapsed = time.perf_counter() - start
+        service.shutdown()
+        print(f"{workers:>3} workers: {args.datasets / elapsed:8.1f} datasets/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""End-to-end latency benchmark of the app, offline.
+
+Runs the app (with gunicorn or the Flask development server) against
+`stub_dataverse.py`, sends requests to its endpoints at a fixed rate for a
+while, and reports the latency percentiles of each endpoint, the throughput
+and the memory (RSS) of the server. The requests are sent at their scheduled
+time whether the previous ones were answered or not, and their latency is
+measured from that time, so that a slow server cannot hide its queueing
+delay.
+
+Usage:
+    python benchmarks/bench_end_to_end.py [--server dev|gunicorn] [--rps N]
+        [--duration SECONDS] [--endpoint NAME] [--latency SECONDS]
+        [--payload-size BYTES] [--error-rate RATE] [--json FILE]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+import stub_dataverse
+from load_test import SERVERS, free_port, wait_until_up
+
+ROOT = pathlib.Path(__file__).parents[1]
+DATASETS = 1000
+
+# Request sent to each endpoint, as a function of a random generator.
+ENDPOINTS = {
+    "collection": lambda r: ("GET", f"/dataset?limit=100&offset={r.randrange(900)}"),
+    "metadata": lambda r: (
+        "HEAD",
+        f"/metadata/doi:10.5072/FK2/{r.randrange(DATASETS):06d}",
+    ),
+    "search": lambda r: ("GET", f"/globalSearch?q=term{r.randrange(100)}"),
+    "download": lambda r: ("GET", f"/dataset/doi:10.5072/FK2/{r.randrange(DATASETS)}"),
+}
+
+
+def rss(pid: int) -> Optional[int]:
+    """Resident memory of a process and its descendants, in bytes (Linux)."""
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            kib = next(
+                int(line.split()[1]) for line in file if line.startswith("VmRSS")
+            )
+        with open(f"/proc/{pid}/task/{pid}/children") as file:
+            children = [int(child) for child in file.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return kib * 1024 + sum(rss(child) or 0 for child in children)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[min(int(p / 100 * len(values)), len(values) - 1)]
+
+
+def run(base_url: str, endpoints: list[str], rps: float, duration: float) -> dict:
+    """Send requests at a fixed rate, spread evenly over the endpoints.
+
+    Returns:
+        The latencies of the successful requests and the number of errors,
+        by endpoint.
+    """
+    results = {name: {"latencies": [], "errors": 0} for name in endpoints}
+    lock = threading.Lock()
+    local = threading.local()
+    generator = random.Random(0)
+
+    def send(name: str, method: str, path: str, scheduled: float):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        try:
+            with local.session.request(
+                method, base_url + path, stream=True, timeout=60
+            ) as response:
+                response.raise_for_status()
+                for _ in response.iter_content(64 * 1024):
+                    pass
+            latency, error = time.perf_counter() - scheduled, 0
+        except requests.RequestException:
+            latency, error = None, 1
+        with lock:
+            results[name]["errors"] += error
+            if latency is not None:
+                results[name]["latencies"].append(latency)
+
+    with ThreadPoolExecutor(max_workers=256) as executor:
+        start = time.perf_counter()
+        for i in range(int(rps * duration)):
+            scheduled = start + i / rps
+            time.sleep(max(scheduled - time.perf_counter(), 0))
+            name = endpoints[i % len(endpoints)]
+            method, path = ENDPOINTS[name](generator)
+            executor.submit(send, name, method, path, scheduled)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", default="gunicorn", choices=sorted(SERVERS))
+    parser.add_argument(
+        "--endpoint", action="append", choices=sorted(ENDPOINTS), dest="endpoints"
+    )
+    parser.add_argument("--rps", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--payload-size", type=int, default=1024 * 1024)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", type=pathlib.Path, help="File to write results.")
+    args = parser.parse_args()
+    endpoints = args.endpoints or list(ENDPOINTS)
+
+    stub_port, port = free_port(), free_port()
+    stub = stub_dataverse.start(
+        stub_port,
+        latency=args.latency,
+        payload_size=args.payload_size,
+        error_rate=args.error_rate,
+        datasets=DATASETS,
+    )
+    env = dict(
+        os.environ,
+        DATAVERSE_URL=f"http://127.0.0.1:{stub_port}/",
+        GUNICORN_ACCESS_LOG="",
+    )
+    server = subprocess.Popen(
+        SERVERS[args.server](port),
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    memory = []
+    sampling = threading.Event()
+
+    def sample_memory():
+        while not sampling.wait(0.5):
+            if (value := rss(server.pid)) is not None:
+                memory.append(value)
+
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_up(base_url + "/heartbeat")
+        sampler = threading.Thread(target=sample_memory)
+        sampler.start()
+        start = time.perf_counter()
+        results = run(base_url, endpoints, args.rps, args.duration)
+        elapsed = time.perf_counter() - start
+        sampling.set()
+        sampler.join()
+    finally:
+        server.terminate()
+        server.wait()
+        stub.terminate()
+        stub.wait()
+
+    report = {"server": args.server, "rps": args.rps, "endpoints": {}}
+    completed = 0
+    for name, result in results.items():
+        latencies = sorted(result["latencies"])
+        completed += len(latencies)
+        report["endpoints"][name] = summary = {
+            "requests": len(latencies) + result["errors"],
+            "errors": result["errors"],
+            **{
+                f"p{p}_ms": percentile(latencies, p) * 1e3 if latencies else None
+                for p in (50, 95, 99)
+            },
+        }
+        print(
+            f"{name:>10}: {summary['requests']:6d} requests, "
+            f"{summary['errors']:4d} errors, "
+            + ", ".join(
+                f"p{p} {summary[f'p{p}_ms'] or float('nan'):8.1f} ms"
+                for p in (50, 95, 99)
+            )
+        )
+    report["throughput_rps"] = completed / elapsed
+    report["peak_rss_mib"] = max(memory) / 2**20 if memory else None
+    report["final_rss_mib"] = memory[-1] / 2**20 if memory else None
+    print(
+        f"throughput {report['throughput_rps']:.1f} requests/s "
+        f"(target {args.rps:g}), "
+        + (
+            f"RSS peak {report['peak_rss_mib']:.1f} MiB, "
+            f"final {report['final_rss_mib']:.1f} MiB"
+            if memory
+            else "RSS unavailable"
+        )
+    )
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark of the search of the licence URI in the terms of use.
+
+Compares the search of the whole RFC 3987 regular expression (as it was done
+before `dataverse_query.licenses`) with `find_iri` on adversarial terms of use
+of growing length: whitespace-free runs without any IRI make the former take
+quadratic time, whereas the latter stays linear.
+
+Usage:
+    python benchmarks/bench_licenses.py [--max-length N] [--budget SECONDS]
+"""
+
+import argparse
+import time
+
+from dataverse_query.licenses import find_iri, get_rfc3987_regex, resolve_terms_of_use
+
+# Adversarial terms of use, by name, as a function of their length.
+INPUTS = {
+    "letters": lambda n: "a" * n,
+    "dotted scheme": lambda n: "a." * (n // 2),
+    "html without IRI": lambda n: "<p>" + "x" * (n - 7) + "</p>",
+    "colon at the end": lambda n: "a" * (n - 1) + ":",
+    "IRI at the end": lambda n: "a" * (n - 20) + " http://example.org/",
+}
+
+
+def timed(function, text):
+    """Seconds taken by a call."""
+    start = time.perf_counter()
+    function(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-length", type=int, default=1_000_000)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=5.0,
+        help="Skip the RFC 3987 search once it is expected to take longer.",
+    )
+    args = parser.parse_args()
+
+    for name, build in INPUTS.items():
+        print(name)
+        over_budget = False
+        length = 1000
+        while length <= args.max_length:
+            text = build(length)
+            if over_budget:
+                regex = "     skipped"
+            else:
+                seconds = timed(get_rfc3987_regex().search, text)
+                # Ten times longer texts take up to a hundred times longer.
+                over_budget = 100 * seconds > args.budget
+                regex = f"{seconds * 1e3:9.2f} ms"
+            print(
+                f"{length:>10} chars: RFC 3987 search {regex}, "
+                f"find_iri {timed(find_iri, text) * 1e3:9.2f} ms"
+            )
+            length *= 10
+
+    terms = '<a href="https://creativecommons.org/licenses/by/4.0/">CC BY</a>'
+    resolve_terms_of_use.cache_clear()
+    first = timed(resolve_terms_of_use, terms)
+    memoized = timed(resolve_terms_of_use, terms)
+    print(
+        f"resolve_terms_of_use: {first * 1e6:.1f} µs, "
+        f"memoized {memoized * 1e6:.1f} µs"
+    )
+
+
+if __name__ == "__main__":
+    main()
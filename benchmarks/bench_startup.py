@@ -0,0 +1,88 @@
+"""Cold start benchmark of the app.
+
+Measures, in fresh interpreters, the time from the import of `app` to its
+first `/heartbeat` response, and checks that the modules only needed to
+convert datasets to DCAT are not imported by then. Exits with an error when
+the median time exceeds the budget or a conversion module was imported, so
+that it can guard against regressions in the CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat N] [--budget SECONDS]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).parents[1]
+
+# Modules that must only be imported when a dataset is converted to DCAT.
+LAZY_MODULES = (
+    "rdflib",
+    "jsonpath_ng",
+    "pycountry",
+    "dataverse_query.dataset",
+    "dataverse_query.licenses",
+)
+
+# Run in a fresh interpreter: prints the seconds to the first heartbeat and
+#  the lazy modules imported.
+CHILD = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+response = app.app.test_client().get("/heartbeat")
+seconds = time.perf_counter() - start
+assert response.status_code == 200, response.status_code
+print(json.dumps([seconds, [m for m in {LAZY_MODULES!r} if m in sys.modules]]))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=1.0,
+        help="Maximum median seconds from the import to the first heartbeat.",
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(ROOT), PYTHONDONTWRITEBYTECODE="1")
+    times, imported = [], set()
+    for _ in range(args.repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            cwd=ROOT,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        seconds, modules = json.loads(output)
+        times.append(seconds)
+        imported.update(modules)
+
+    median = statistics.median(times)
+    print(
+        f"import to first /heartbeat: median {median * 1e3:.1f} ms, "
+        f"min {min(times) * 1e3:.1f} ms, max {max(times) * 1e3:.1f} ms "
+        f"(budget {args.budget * 1e3:.0f} ms)"
+    )
+    failed = False
+    if imported:
+        print(f"imported eagerly: {', '.join(sorted(imported))}")
+        failed = True
+    if median > args.budget:
+        print("over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
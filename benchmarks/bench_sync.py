@@ -0,0 +1,82 @@
+"""Cost of the incremental catalogue sync, against the stub dataverse.
+
+Syncs catalogues of increasing sizes from scratch, then again without any
+change, then after updating and deleting a few datasets, and reports the
+queries the stub answered and the time of each sync. The cost of a sync
+without changes must not depend on the size of the catalogue: the benchmark
+fails when it does.
+
+Usage:
+    python benchmarks/bench_sync.py [--datasets N [N ...]] [--churn N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+import stub_dataverse
+from load_test import free_port
+
+from dataverse_query.dataverse_query import DataverseQuery
+from dataverse_query.sync import CatalogueSync
+
+
+def sync(dq: DataverseQuery, state: str) -> tuple:
+    """Run a sync, returning the queries it made and its report."""
+    before = stub_dataverse.StubHandler.queries
+    sync = CatalogueSync(dq, state, targets=())
+    try:
+        report = sync.run()
+    finally:
+        sync.close()
+    return stub_dataverse.StubHandler.queries - before, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument(
+        "--churn", type=int, default=10, help="Datasets updated and deleted."
+    )
+    args = parser.parse_args()
+
+    handler = stub_dataverse.StubHandler
+    port = free_port()
+    server = stub_dataverse.StubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    dq = DataverseQuery(f"http://127.0.0.1:{port}/")
+
+    print(
+        f"{'datasets':>8} {'run':<10} {'queries':>8} {'updated':>8} "
+        f"{'deleted':>8} {'seconds':>8}"
+    )
+    idle_queries = set()
+    for datasets in args.datasets:
+        handler.datasets = datasets
+        handler.updates.clear()
+        handler.deleted.clear()
+        with tempfile.TemporaryDirectory() as directory:
+            state = os.path.join(directory, "state.db")
+            for run in ("full", "unchanged", "churn"):
+                if run == "churn":
+                    for i in range(args.churn):
+                        handler.updates[i] = f"2021-01-01T00:00:{i:02d}Z"
+                        handler.deleted.add(datasets - 1 - i)
+                queries, report = sync(dq, state)
+                if run == "unchanged":
+                    idle_queries.add(queries)
+                print(
+                    f"{datasets:>8} {run:<10} {queries:>8} {report.updated:>8} "
+                    f"{report.deleted:>8} {report.seconds:>8.2f}"
+                )
+    server.shutdown()
+
+    if len(idle_queries) > 1:
+        print("FAIL: the cost of a sync without changes grows with the catalogue.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
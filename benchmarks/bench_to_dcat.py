@@ -0,0 +1,94 @@
+"""Microbenchmark of the conversion of a dataset JSON to DCAT.
+
+Compares the time per conversion when the parsing plan of `Dataset` is
+compiled again for every conversion (as it was done before the plan was
+cached) with the time when the cached plan is reused, then the time and peak
+memory of a serialization through an RDFLib graph with the ones of a streamed
+serialization.
+
+Usage:
+    python benchmarks/bench_to_dcat.py [--repeat N] [--number N] [FILE]
+"""
+
+import argparse
+import json
+import pathlib
+import timeit
+import tracemalloc
+
+from dataverse_query.dataset import Dataset
+
+EXAMPLE = pathlib.Path(__file__).parents[1] / "examples" / "dataset.json"
+
+
+def convert(doc):
+    """Convert a dataset, reusing the cached parsing plan."""
+    Dataset(doc).to_dcat()
+
+
+def convert_without_plan_cache(doc):
+    """Convert a dataset, compiling the parsing plan again."""
+    Dataset.__dict__.get("_parsing_plan") and delattr(Dataset, "_parsing_plan")
+    Dataset(doc).to_dcat()
+
+
+def serialize(doc, rdf_format):
+    """Serialize a dataset through an RDFLib graph."""
+    Dataset(doc).serialize(rdf_format)
+
+
+def serialize_streaming(doc, rdf_format):
+    """Serialize a dataset without building a graph."""
+    Dataset(doc).serialize(rdf_format, streaming=True)
+
+
+def peak_memory(function):
+    """Peak memory allocated by a call, in KiB."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", nargs="?", default=EXAMPLE, type=pathlib.Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    doc = json.loads(args.file.read_text())
+    for label, function in (
+        ("plan compiled per conversion", convert_without_plan_cache),
+        ("cached plan", convert),
+    ):
+        function(doc)  # Warm up (imports, regex compilation, ...).
+        best = min(
+            timeit.repeat(lambda: function(doc), repeat=args.repeat, number=args.number)
+        )
+        print(f"{label:>30}: {best / args.number * 1e3:8.3f} ms/dataset")
+
+    for rdf_format in ("nt", "turtle"):
+        for label, function in (
+            (f"{rdf_format} through a graph", serialize),
+            (f"{rdf_format} streamed", serialize_streaming),
+        ):
+            function(doc, rdf_format)
+            best = min(
+                timeit.repeat(
+                    lambda: function(doc, rdf_format),
+                    repeat=args.repeat,
+                    number=args.number,
+                )
+            )
+            peak = peak_memory(lambda: function(doc, rdf_format))
+            print(
+                f"{label:>30}: {best / args.number * 1e3:8.3f} ms/dataset, "
+                f"peak {peak:8.1f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Load test of the app against a stub dataverse.
+
+Starts `stub_dataverse.py`, then runs the app with each server (the Flask
+development server and gunicorn, configured by `gunicorn.conf.py`), sends
+requests from concurrent clients for a while and reports the throughput and
+latency of each.
+
+Usage:
+    python benchmarks/load_test.py [--server dev|gunicorn] [--concurrency N]
+        [--duration SECONDS] [--request "METHOD PATH"]
+"""
+
+import argparse
+import os
+import pathlib
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+import stub_dataverse
+
+ROOT = pathlib.Path(__file__).parents[1]
+
+# Requests sent by default, in turn: a search relayed to the dataverse, and a
+#  DCAT conversion.
+DEFAULT_REQUESTS = (
+    "GET /globalSearch?q=test",
+    "HEAD /metadata/doi:10.5072/FK2/000001",
+)
+
+# Commands running the app on a port, by server.
+SERVERS = {
+    "dev": lambda port: [
+        sys.executable,
+        "-m",
+        "flask",
+        "--app",
+        "app",
+        "run",
+        "--port",
+        str(port),
+    ],
+    "gunicorn": lambda port: [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "app:app",
+    ],
+}
+
+
+def free_port() -> int:
+    """A TCP port no one listens on."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    """Wait until a server answers at a URL."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            requests.get(url, timeout=1).raise_for_status()
+            return
+        except requests.RequestException:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def load(base_url: str, requests_: list[tuple[str, str]], concurrency, duration):
+    """Send requests from concurrent clients for a while.
+
+    Returns:
+        The latencies of the successful requests and the number of errors.
+    """
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset: int):
+        session = requests.Session()
+        own_latencies, own_errors = [], 0
+        i = offset
+        while time.monotonic() < deadline:
+            method, path = requests_[i % len(requests_)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                session.request(method, base_url + path, timeout=60).raise_for_status()
+                own_latencies.append(time.perf_counter() - start)
+            except requests.RequestException:
+                own_errors += 1
+        with lock:
+            latencies.extend(own_latencies)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--server", action="append", choices=sorted(SERVERS), dest="servers"
+    )
+    parser.add_argument(
+        "--request", action="append", dest="requests", help='e.g. "GET /heartbeat"'
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds the stub dataverse waits before answering.",
+    )
+    args = parser.parse_args()
+    requests_ = [
+        tuple(request.split(" ", 1)) for request in args.requests or DEFAULT_REQUESTS
+    ]
+
+    stub_port = free_port()
+    stub = stub_dataverse.start(stub_port, latency=args.latency)
+    env = dict(
+        os.environ,
+        DATAVERSE_URL=f"http://127.0.0.1:{stub_port}/",
+        # Every request goes to the dataverse and converts the dataset.
+        DATAVERSE_CACHE=os.environ.get("DATAVERSE_CACHE", "none"),
+        GUNICORN_ACCESS_LOG="",
+    )
+    try:
+        for name in args.servers or sorted(SERVERS):
+            port = free_port()
+            server = subprocess.Popen(
+                SERVERS[name](port),
+                cwd=ROOT,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                wait_until_up(base_url + "/heartbeat")
+                latencies, errors = load(
+                    base_url, requests_, args.concurrency, args.duration
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            latencies.sort()
+            print(
+                f"{name:>10}: {len(latencies) / args.duration:8.1f} requests/s, "
+                f"median {statistics.median(latencies) * 1e3:7.1f} ms, "
+                f"p99 {latencies[int(0.99 * (len(latencies) - 1))] * 1e3:7.1f} ms, "
+                f"{errors} errors"
+            )
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
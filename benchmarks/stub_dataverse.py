@@ -0,0 +1,297 @@
+"""Stub of the API of a dataverse, for load tests and benchmarks.
+
+Answers the queries of the app (`search/`, `datasets/:persistentId/` and
+`access/dataset/:persistentId/`) after a configurable latency, so that the
+app can be benchmarked offline. The datasets are copies of
+`examples/dataset.json` with their own persistent ID, the archives are
+`--payload-size` bytes long, and `--error-rate` of the queries fail with a
+503 response. When the stub runs in the process of a benchmark or a test,
+the datasets can be updated (`StubHandler.updates`) and deleted
+(`StubHandler.deleted`, then answered by a 404 response) or made
+unavailable (`StubHandler.unavailable`), collections can be listed alongside
+them (`StubHandler.collections`), and the queries answered are counted
+(`StubHandler.queries`).
+
+Usage:
+    python benchmarks/stub_dataverse.py [--port N] [--latency SECONDS]
+        [--payload-size BYTES] [--error-rate RATE] [--datasets N]
+"""
+
+import argparse
+import datetime
+import http.server
+import json
+import pathlib
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+EXAMPLE = pathlib.Path(__file__).parents[1] / "examples" / "dataset.json"
+
+# Bytes the archives are made of, repeated.
+ARCHIVE_PATTERN = bytes(range(256))
+
+# Creation time of the first dataset, the following ones are a second apart.
+CREATED_AT = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def created_at(number: int) -> str:
+    """Creation (and publication) time of a dataset, given its number."""
+    time = CREATED_AT + datetime.timedelta(seconds=number)
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Answers the queries of the app to the API of a dataverse."""
+
+    protocol_version = "HTTP/1.1"
+    dataset = json.loads(EXAMPLE.read_text())
+    datasets = 1000
+    latency = 0.0
+    payload_size = 1024 * 1024
+    error_rate = 0.0
+    random = random.Random(0)
+    random_lock = threading.Lock()
+    # Update times of the datasets updated since their creation, by number.
+    updates = dict()
+    # Numbers of the datasets deleted.
+    deleted = set()
+    # Numbers of the datasets answered by a 503 response.
+    unavailable = set()
+    # Number of collections, created at the same time as the datasets of the
+    #  same numbers. Like on a dataverse, their search items have no
+    #  `updatedAt`.
+    collections = 0
+    queries = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        time.sleep(self.latency)
+        with self.random_lock:
+            StubHandler.queries += 1
+            failed = self.random.random() < self.error_rate
+        if failed:
+            self.send_json(503, {"status": "ERROR", "message": "Stub failure."})
+        elif url.path.startswith("/api/datasets/"):
+            persistent_id = query.get("persistentId", ["doi:10.5072/FK2/000000"])[0]
+            number = self.dataset_number(persistent_id)
+            if number in self.deleted:
+                body = {"status": "ERROR", "message": "Dataset not found."}
+                self.send_json(404, body)
+            elif number in self.unavailable:
+                body = {"status": "ERROR", "message": "Stub failure."}
+                self.send_json(503, body)
+            else:
+                body = {"status": "OK", "data": self.get_dataset(persistent_id)}
+                self.send_json(200, body)
+        elif url.path.startswith("/api/search"):
+            self.send_json(200, {"status": "OK", "data": self.search(query)})
+        elif url.path.startswith("/api/access/dataset/"):
+            self.send_archive()
+        else:
+            self.send_json(404, {"status": "ERROR", "message": "Not found."})
+
+    @staticmethod
+    def dataset_number(persistent_id: str) -> Optional[int]:
+        """Number of a dataset, given its persistent ID."""
+        try:
+            return int(persistent_id.rpartition("/")[2])
+        except ValueError:
+            return None
+
+    def get_dataset(self, persistent_id: str) -> dict:
+        """The example dataset, with the given persistent ID."""
+        protocol, _, identifier = persistent_id.partition(":")
+        updated_at = self.updates.get(self.dataset_number(persistent_id))
+        return {
+            **self.dataset,
+            "protocol": protocol,
+            "identifier": identifier,
+            "persistentUrl": f"https://doi.org/{identifier}",
+            "latestVersion": {
+                **self.dataset["latestVersion"],
+                "datasetPersistentId": persistent_id,
+                "lastUpdateTime": updated_at
+                or self.dataset["latestVersion"]["lastUpdateTime"],
+            },
+        }
+
+    def search(self, query: dict) -> dict:
+        """Page of the search results, all the objects match any query.
+
+        The results are the datasets, and the collections when they are
+        searched (`type=dataverse`). They are sorted by type and number, or
+        by date (update or publication time) with `sort=date`.
+        """
+        start = int(query.get("start", ["0"])[0])
+        per_page = int(query.get("per_page", ["10"])[0])
+        types = query.get("type", ["dataverse", "dataset", "file"])
+        items = []
+        if "dataverse" in types:
+            items += [self.collection_item(i) for i in range(self.collections)]
+        if "dataset" in types:
+            items += [
+                self.dataset_item(i)
+                for i in range(self.datasets)
+                if i not in self.deleted
+            ]
+        if query.get("sort") == ["date"]:
+            items.sort(
+                key=lambda item: item.get("updatedAt") or item["published_at"],
+                reverse=query.get("order") != ["asc"],
+            )
+        page = items[start : start + per_page]
+        return {
+            "q": query.get("q", [""])[0],
+            "total_count": len(items),
+            "start": start,
+            "count_in_response": len(page),
+            "items": page,
+        }
+
+    def dataset_item(self, number: int) -> dict:
+        """Search item of a dataset."""
+        return {
+            "type": "dataset",
+            "name": f"Dataset {number}",
+            "global_id": f"doi:10.5072/FK2/{number:06d}",
+            "url": f"https://doi.org/10.5072/FK2/{number:06d}",
+            "description": "Stub dataset.",
+            "published_at": created_at(number),
+            "updatedAt": self.updates.get(number) or created_at(number),
+        }
+
+    @staticmethod
+    def collection_item(number: int) -> dict:
+        """Search item of a collection."""
+        return {
+            "type": "dataverse",
+            "name": f"Collection {number}",
+            "identifier": f"collection{number}",
+            "url": f"http://localhost/dataverse/collection{number}",
+            "description": "Stub collection.",
+            "published_at": created_at(number),
+        }
+
+    def send_archive(self):
+        """Send the archive of a dataset, or the range of it requested."""
+        size = self.payload_size
+        start, end = 0, size - 1
+        status = 200
+        if byte_range := self.headers.get("Range"):
+            match = re.fullmatch(r"bytes=(\d*)-(\d*)", byte_range.strip())
+            if match is None or match.groups() == ("", ""):
+                start = size
+            elif match[1] == "":
+                start = max(size - int(match[2]), 0)
+            else:
+                start = int(match[1])
+                end = min(int(match[2]), size - 1) if match[2] else end
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", 'attachment; filename="dataset.zip"')
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        chunk = ARCHIVE_PATTERN * 256
+        position = start
+        while position <= end:
+            offset = position % len(ARCHIVE_PATTERN)
+            length = min(len(chunk) - offset, end - position + 1)
+            self.wfile.write(chunk[offset : offset + length])
+            position += length
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    """Threaded server accepting many concurrent connections."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start(port: int, **options) -> subprocess.Popen:
+    """Run the stub in a subprocess.
+
+    Args:
+        port: Port the stub listens on.
+        options: Command line options of the stub, e.g. `latency=0.05`.
+
+    Returns:
+        The process of the stub.
+    """
+    arguments = [sys.executable, __file__, "--port", str(port)]
+    for name, value in options.items():
+        arguments += [f"--{name.replace('_', '-')}", str(value)]
+    return subprocess.Popen(arguments, stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds waited before answering each query.",
+    )
+    parser.add_argument(
+        "--payload-size",
+        type=int,
+        default=1024 * 1024,
+        help="Size in bytes of the archives of the datasets.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of the queries answered with a 503 error.",
+    )
+    parser.add_argument(
+        "--datasets",
+        type=int,
+        default=1000,
+        help="Number of datasets in the search results.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the errors.")
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    StubHandler.payload_size = args.payload_size
+    StubHandler.error_rate = args.error_rate
+    StubHandler.datasets = args.datasets
+    StubHandler.random = random.Random(args.seed)
+    server = StubServer((args.host, args.port), StubHandler)
+    print(f"Stub dataverse listening on http://{args.host}:{args.port}/", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
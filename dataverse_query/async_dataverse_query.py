@@ -0,0 +1,266 @@
+"""Query dataverse via its API, asynchronously.
+
+Requires the optional dependency `httpx` (`pip install .[async]`).
+"""
+import asyncio
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+
+from dataverse_query import codec
+from dataverse_query.cache import CacheBackend
+from dataverse_query.dataverse_query import (
+    RETRY_STATUS_CODES,
+    UPSTREAM_REQUEST_SECONDS,
+    UPSTREAM_REQUESTS_IN_FLIGHT,
+)
+from dataverse_query.singleflight import AsyncSingleFlight
+from dataverse_query.utils import convert_to_global_search_response, normalize_search
+
+
+class AsyncDataverseQuery:
+    """Asynchronous counterpart of `DataverseQuery`.
+
+    The queries of an event loop go through a single `httpx.AsyncClient`,
+    so that the connections to the dataverse are pooled and kept alive
+    between calls, e.g.:
+
+        async with AsyncDataverseQuery(url) as adq:
+            results = await asyncio.gather(*(adq.global_search(q) for q in qs))
+
+    A client is bound to its event loop, hence each loop gets its own: an
+    instance can be shared by several loops (e.g. successive `asyncio.run`
+    calls, or the requests of `async def` Flask views, each run in a new
+    loop), but the connections are only reused within a loop.
+    """
+
+    def __init__(
+        self,
+        repo_url: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        connect_timeout: float = 5.0,
+        read_timeout: Optional[float] = 60.0,
+        cache: Optional[CacheBackend] = None,
+        search_cache: Optional[CacheBackend] = None,
+        max_backoff: float = 30.0,
+    ):
+        """Initialize the query object and its connection pool.
+
+        Args:
+            repo_url (str): url of the dataverse instance
+            max_connections (int): maximum number of concurrent connections
+            max_keepalive_connections (int): maximum number of idle
+                connections kept alive
+            max_retries (int): times a request is retried on connection
+                errors or on a 429/5xx response
+            backoff_factor (float): factor for the exponential backoff
+                between retries (in seconds)
+            connect_timeout (float): seconds to wait for a connection to
+                the dataverse
+            read_timeout (Optional[float]): seconds to wait between bytes
+                received from the dataverse, `None` waits forever
+            cache (Optional[CacheBackend]): cache for the metadata of the
+                datasets, `None` disables caching
+            search_cache (Optional[CacheBackend]): cache for the global
+                search responses, `None` disables caching
+            max_backoff (float): maximum number of seconds waited before
+                retrying a query, whatever the `Retry-After` header asks
+        """
+        self.base_url = urljoin(repo_url, "api/")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.search_cache = search_cache
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        # Event loops and their clients, by identity of the loop.
+        self._clients = dict()
+        # Identical queries in flight in a loop are made once.
+        self._flight = AsyncSingleFlight("async_dataverse_query")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Client of the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            # Forget the clients of the closed loops, their connections
+            #  cannot be used (nor closed) anymore.
+            for key, (other_loop, _) in list(self._clients.items()):
+                if other_loop.is_closed():
+                    del self._clients[key]
+            transport = httpx.AsyncHTTPTransport(
+                verify=False, retries=self.max_retries, limits=self._limits
+            )
+            client = httpx.AsyncClient(transport=transport, timeout=self._timeout)
+            entry = self._clients[id(loop)] = (loop, client)
+        return entry[1]
+
+    async def aclose(self):
+        """Close the connections kept alive by the client of the running loop."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.pop(id(loop), None)
+        if entry is not None and entry[0] is loop:
+            await entry[1].aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _execute_query(self, url: str, payload: Dict[str, str]) -> httpx.Response:
+        """Execute a query given the payload on the pre-defined url.
+
+        Connection errors are retried by the transport, 429/5xx responses
+        are retried here with an exponential backoff (or after the time
+        given by the `Retry-After` header).
+
+        Args:
+            url (str): url where the query will be done
+            payload (Dict[str, str]): Parameters for the query
+
+        Raises:
+            HTTPStatusError: If the query is not valid
+            TimeoutException: If the dataverse does not answer in time
+
+        Returns:
+            Response: Response to the query
+        """
+        path = url[len(self.base_url) :] if url.startswith(self.base_url) else url
+        for attempt in range(self.max_retries + 1):
+            status = "error"
+            start = time.perf_counter()
+            try:
+                with UPSTREAM_REQUESTS_IN_FLIGHT.track_in_progress(path=path):
+                    r = await self.client.get(url, params=payload)
+                status = r.status_code
+            finally:
+                UPSTREAM_REQUEST_SECONDS.observe(
+                    time.perf_counter() - start, path=path, status=status
+                )
+            if r.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                break
+            await asyncio.sleep(self._backoff(attempt, r))
+        r.raise_for_status()
+        return r
+
+    def _backoff(self, attempt: int, response: httpx.Response) -> float:
+        """Seconds to wait before retrying a query.
+
+        Args:
+            attempt (int): number of the failed attempt, starting from 0
+            response (Response): response of the failed attempt
+
+        Returns:
+            float: seconds to wait
+        """
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return min(self.backoff_factor * 2**attempt, self.max_backoff)
+
+    async def search_dataset(self, query: str):
+        url = urljoin(self.base_url, "search/")
+        return await self._execute_query(url, {"q": query})
+
+    async def get_dataset_metadata(self, dataset_id: str) -> Dict[str, str]:
+        """Get the information of a dataset given its ID.
+
+        Args:
+            dataset_id (str): unique identifier of a dataset
+
+        Returns:
+            Dict[str, str]: JSON information of a dataset
+        """
+        key = f"metadata:{dataset_id}"
+        if self.cache is not None and (metadata := self.cache.get(key)) is not None:
+            return metadata
+        return await self._flight.do(key, self._fetch_dataset_metadata, key, dataset_id)
+
+    async def _fetch_dataset_metadata(
+        self, key: str, dataset_id: str
+    ) -> Dict[str, str]:
+        """Query the information of a dataset, and cache it under `key`.
+
+        This is a helper method for `get_dataset_metadata`.
+        """
+        url = urljoin(self.base_url, "datasets/:persistentId/")
+        response = await self._execute_query(url, {"persistentId": dataset_id})
+        metadata = codec.loads(response.content)["data"]
+        if self.cache is not None:
+            self.cache.set(key, metadata)
+        return metadata
+
+    async def get_all_datasets(self) -> Dict[str, str]:
+        """Get all the datasets hosted.
+
+        Returns:
+            Dict[str, str]: JSON response of the dataverse search
+        """
+        url = urljoin(self.base_url, "search/")
+        response = await self._execute_query(url, {"q": "*", "type": "dataset"})
+        return codec.loads(response.content)
+
+    async def global_search(
+        self,
+        query: str,
+        page: int = 1,
+        per_page: int = 10,
+        types: Optional[Iterable[str]] = None,
+    ) -> Dict[str, str]:
+        """global search on dataverse
+        execute the search query on the dataverse
+
+        The query and types are normalized (see `normalize_search`), and the
+        responses are cached under the normalized parameters, like by
+        `DataverseQuery.global_search`.
+
+        Args:
+            query (str): search query to execute
+            page (int): number of the page of results, from 1
+            per_page (int): number of results per page
+            types (Optional[Iterable[str]]): types of the objects searched,
+                all of them by default
+
+        Returns:
+            Dict[str, str]: response compatible with global search datasource response
+
+        """
+        query, types = normalize_search(query, types)
+        key = f"search:{query}:{page}:{per_page}:{','.join(types)}"
+        if (
+            self.search_cache is not None
+            and (response := self.search_cache.get(key)) is not None
+        ):
+            return response
+        return await self._flight.do(
+            key, self._fetch_global_search, key, query, page, per_page, types
+        )
+
+    async def _fetch_global_search(
+        self, key: str, query: str, page: int, per_page: int, types: Tuple[str, ...]
+    ) -> Dict[str, str]:
+        """Query a page of search results, and cache its conversion under `key`.
+
+        This is a helper method for `global_search`, with normalized
+        parameters.
+        """
+        url = urljoin(self.base_url, "search/")
+        payload = {"q": query, "start": (page - 1) * per_page, "per_page": per_page}
+        if types:
+            payload["type"] = list(types)
+        json_payload = codec.loads((await self._execute_query(url, payload)).content)
+        response = convert_to_global_search_response(json_payload, self.base_url)
+        if self.search_cache is not None:
+            self.search_cache.set(key, response)
+        return response
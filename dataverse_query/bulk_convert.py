@@ -0,0 +1,337 @@
+"""Offline bulk conversion of Dataverse dataset JSONs to DCAT.
+
+Reads dataset JSONs (like `examples/dataset.json`, or the response of the
+`datasets/:persistentId/` API) from a directory, a tarball or an NDJSON file,
+converts them in parallel and writes either one concatenated N-Triples or
+N-Quads stream, or one file per dataset. The datasets converted are recorded
+in a checkpoint file, so that an interrupted run can be resumed. The dataset
+JSONs that cannot be read or converted are reported on stderr and skipped.
+
+Usage:
+    dataverse-dcat INPUT (--output FILE | --output-dir DIR) [options]
+"""
+import argparse
+import os
+import pathlib
+import sys
+import tarfile
+import time
+from typing import IO, Callable, Iterator, Optional
+
+from dataverse_query import codec
+from dataverse_query.conversion import ConversionService
+from dataverse_query.streaming import STREAMING_FORMATS
+from dataverse_query.utils import JSON
+
+# File extension of the per-dataset files, by RDFLib serialization format.
+EXTENSIONS = {
+    "turtle": ".ttl",
+    "nt": ".nt",
+    "nquads": ".nq",
+    "json-ld": ".jsonld",
+    "xml": ".rdf",
+}
+
+# Formats that can be concatenated into a single stream.
+STREAMABLE_FORMATS = ("nt", "nquads")
+
+
+def read_documents(
+    path: pathlib.Path, on_error: Optional[Callable[[str, Exception], None]] = None
+) -> Iterator[tuple[str, JSON]]:
+    """Read the dataset JSONs of a directory, tarball or NDJSON file lazily.
+
+    Args:
+        path: A directory (whose `.json` files are read recursively), a
+            tarball (whose `.json` members are read), a `.json` file or an
+            NDJSON file (one dataset per line).
+        on_error: Function called with the name of the source and the error
+            of each document that is not valid JSON, which is then skipped.
+            By default, the error is raised.
+
+    Returns:
+        An iterator of pairs of the name of the source of a dataset JSON
+        (path, member or line number) and the dataset JSON.
+    """
+    for source, data in _read_sources(path):
+        try:
+            doc = codec.loads(data)
+        except ValueError as e:
+            if on_error is None:
+                raise
+            on_error(source, e)
+            continue
+        yield source, doc
+
+
+def _read_sources(path: pathlib.Path) -> Iterator[tuple[str, bytes]]:
+    """Read the undecoded documents of `read_documents`, with their source."""
+    if path.is_dir():
+        for file in sorted(path.rglob("*.json")):
+            yield str(file.relative_to(path)), file.read_bytes()
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, mode="r|*") as tar:
+            for member in tar:
+                if member.isfile() and member.name.endswith(".json"):
+                    yield member.name, tar.extractfile(member).read()
+    elif path.suffix == ".json":
+        yield path.name, path.read_bytes()
+    else:
+        with path.open("rb") as file:
+            for number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield f"{path.name}:{number}", line
+
+
+def unwrap(doc: JSON) -> JSON:
+    """The dataset JSON of an API response, or the dataset JSON itself.
+
+    Raises:
+        ValueError: If the document is not a JSON object.
+    """
+    if not isinstance(doc, dict):
+        raise ValueError(f"Expected a JSON object, got {type(doc).__name__}.")
+    if "latestVersion" not in doc and isinstance(doc.get("data"), dict):
+        return doc["data"]
+    return doc
+
+
+def dataset_key(source: str, doc: JSON) -> str:
+    """Key identifying a dataset in the checkpoint: its persistent ID."""
+    return (
+        doc.get("latestVersion", {}).get("datasetPersistentId")
+        or doc.get("persistentUrl")
+        or source
+    )
+
+
+class Progress:
+    """Reports the progress of a conversion to stderr, periodically."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.converted = 0
+        self.skipped = 0
+        self.errors = 0
+        self.start = self.last_report = time.monotonic()
+
+    def report(self, force: bool = False):
+        """Report the progress if `interval` seconds passed since the last."""
+        now = time.monotonic()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        rate = self.converted / max(now - self.start, 1e-9)
+        print(
+            f"converted {self.converted}, skipped {self.skipped}, "
+            f"errors {self.errors}, {rate:.1f} datasets/s",
+            file=sys.stderr,
+        )
+
+    def error(self, source: str, error: Exception):
+        """Count and report a dataset that could not be converted."""
+        self.errors += 1
+        print(f"error converting {source}: {error!r}", file=sys.stderr)
+
+
+def open_for_resume(path: str) -> IO[bytes]:
+    """Open the output of an interrupted run to append to it.
+
+    A run interrupted while writing a dataset leaves an incomplete line at
+    the end of the output, which is dropped. The complete lines of that
+    dataset are kept, and written again when it is converted again: the
+    duplicate triples do not change the graph.
+
+    Args:
+        path: Path of the output, created if needed.
+
+    Returns:
+        The output, opened for appending.
+    """
+    output = open(path, "a+b")
+    end = size = output.seek(0, os.SEEK_END)
+    while end > 0:
+        start = max(end - 65536, 0)
+        output.seek(start)
+        chunk = output.read(end - start)
+        if (newline := chunk.rfind(b"\n")) != -1:
+            end = start + newline + 1
+            break
+        end = start
+    if end != size:
+        output.truncate(end)
+    return output
+
+
+def convert(
+    documents: Iterator[tuple[str, JSON]],
+    rdf_format: str,
+    service: ConversionService,
+    output: Optional[IO[bytes]] = None,
+    output_dir: Optional[pathlib.Path] = None,
+    checkpoint: Optional[pathlib.Path] = None,
+    progress: Optional[Progress] = None,
+    streaming: bool = False,
+) -> Progress:
+    """Convert dataset JSONs, writing their DCAT as they are converted.
+
+    Args:
+        documents: pairs of the name of the source of a dataset JSON and the
+            dataset JSON.
+        rdf_format: Name of the RDFLib serialization format.
+        service: Service running the conversions.
+        output: Binary stream where all the serializations are concatenated.
+        output_dir: Directory where each serialization is written to a file
+            (used when no `output` is provided).
+        checkpoint: File listing the keys of the datasets already converted,
+            which are skipped. The keys of the datasets converted are
+            appended to it.
+        progress: Progress of the conversion, to be updated and reported.
+        streaming: Whether to serialize without building graphs.
+
+    Returns:
+        The progress of the conversion.
+    """
+    progress = progress or Progress(float("inf"))
+    done = set()
+    if checkpoint is not None and checkpoint.exists():
+        done = set(checkpoint.read_text().splitlines())
+    checkpoint_file = checkpoint.open("a") if checkpoint is not None else None
+
+    def pending() -> Iterator[tuple[str, JSON]]:
+        for source, doc in documents:
+            try:
+                doc = unwrap(doc)
+                key = dataset_key(source, doc)
+            except Exception as e:
+                progress.error(source, e)
+                continue
+            if key in done:
+                progress.skipped += 1
+                continue
+            yield key, doc
+
+    try:
+        results = service.imap_unordered(pending(), rdf_format, streaming=streaming)
+        for key, future in results:
+            try:
+                dcat = future.result()
+            except Exception as e:
+                progress.error(key, e)
+                continue
+            if output is not None:
+                output.write(dcat)
+                output.flush()
+            else:
+                name = "".join(c for c in key if c not in "\\/:*?<>|")
+                (output_dir / (name + EXTENSIONS[rdf_format])).write_bytes(dcat)
+            if checkpoint_file is not None:
+                checkpoint_file.write(key + "\n")
+                checkpoint_file.flush()
+            progress.converted += 1
+            progress.report()
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+    return progress
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point of the `dataverse-dcat` command."""
+    parser = argparse.ArgumentParser(
+        description="Convert Dataverse dataset JSONs to DCAT."
+    )
+    parser.add_argument(
+        "input",
+        type=pathlib.Path,
+        help="Directory, tarball, JSON or NDJSON file of dataset JSONs.",
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
+        "--output",
+        help="File where the DCAT of all the datasets is concatenated "
+        "('-' for stdout). Requires the nt or nquads format.",
+    )
+    target.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        help="Directory where the DCAT of each dataset is written to a file.",
+    )
+    parser.add_argument("--format", default="nt", choices=sorted(EXTENSIONS))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (one per CPU by default, 0 for none).",
+    )
+    parser.add_argument(
+        "--graph",
+        action="store_true",
+        help="Serialize through an RDFLib graph even when the format can be "
+        f"streamed ({', '.join(STREAMING_FORMATS)}).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=pathlib.Path,
+        help="File recording the datasets converted, to resume a run.",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between progress reports on stderr.",
+    )
+    args = parser.parse_args(argv)
+    if args.output is not None and args.format not in STREAMABLE_FORMATS:
+        parser.error(f"--output requires one of the formats {STREAMABLE_FORMATS}.")
+
+    streaming = not args.graph and args.format in STREAMING_FORMATS
+    service = ConversionService(args.workers)
+    progress = Progress(args.progress_interval)
+    documents = read_documents(args.input, on_error=progress.error)
+    try:
+        if args.output_dir is not None:
+            os.makedirs(args.output_dir, exist_ok=True)
+            convert(
+                documents,
+                args.format,
+                service,
+                output_dir=args.output_dir,
+                checkpoint=args.checkpoint,
+                progress=progress,
+                streaming=streaming,
+            )
+        elif args.output == "-":
+            convert(
+                documents,
+                args.format,
+                service,
+                output=sys.stdout.buffer,
+                checkpoint=args.checkpoint,
+                progress=progress,
+                streaming=streaming,
+            )
+        else:
+            # Appending keeps the output of the previous run when resuming.
+            if args.checkpoint is not None:
+                output = open_for_resume(args.output)
+            else:
+                output = open(args.output, "wb")
+            with output:
+                convert(
+                    documents,
+                    args.format,
+                    service,
+                    output=output,
+                    checkpoint=args.checkpoint,
+                    progress=progress,
+                    streaming=streaming,
+                )
+    finally:
+        service.shutdown()
+        progress.report(force=True)
+    return 1 if progress.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
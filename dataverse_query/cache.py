@@ -0,0 +1,290 @@
+"""Caches for the responses of the dataverse and the DCAT rendered from them."""
+import abc
+import collections
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+
+class CacheBackend(abc.ABC):
+    """Interface of a size-bounded LRU cache whose entries expire.
+
+    Keys are strings and values any picklable object other than `None`.
+    Each backend counts its hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            maxsize (int): maximum number of entries kept in the cache
+            ttl (Optional[float]): seconds after which an entry expires,
+                `None` keeps the entries until they are evicted
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get the value cached for a key.
+
+        Args:
+            key (str): key of the entry
+
+        Returns:
+            Optional[Any]: the cached value, `None` if it is missing or
+                expired
+        """
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any):
+        """Cache a value, evicting the least recently used entries if needed.
+
+        Args:
+            key (str): key of the entry
+            value (Any): value to cache
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        """Remove an entry from the cache, if present.
+
+        Args:
+            key (str): key of the entry
+        """
+
+    @abc.abstractmethod
+    def clear(self):
+        """Remove all the entries from the cache."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Number of entries in the cache."""
+
+    def stats(self) -> dict:
+        """Counters of the cache.
+
+        Returns:
+            dict: number of hits, misses, evictions and entries
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+    def _expiry(self) -> Optional[float]:
+        """Time at which an entry set now expires."""
+        return None if self.ttl is None else time.time() + self.ttl
+
+
+class MemoryCache(CacheBackend):
+    """Cache kept in the memory of the process."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        super().__init__(maxsize, ttl)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (self._expiry(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache(CacheBackend):
+    """Cache stored as files in a directory.
+
+    Several processes (e.g. the workers of a server) may share the same
+    directory. Files are replaced atomically, and their modification time
+    tracks their last use. The counters are kept per process.
+
+    Each process estimates the number of entries from the ones it adds, and
+    only lists the directory once the estimate is over `maxsize`. It then
+    evicts a tenth of `maxsize` more than needed, so that the directory is
+    listed once every so many new entries. The entries added by the other
+    processes are only seen then, hence the cache may exceed `maxsize` by a
+    tenth per process sharing it.
+    """
+
+    SUFFIX = ".cache"
+    # Fraction of `maxsize` freed beyond the excess by an eviction.
+    EVICTION_HEADROOM = 0.1
+
+    def __init__(
+        self, directory: str, maxsize: int = 1024, ttl: Optional[float] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            directory (str): directory where the entries are stored
+            maxsize (int): maximum number of entries kept in the cache
+            ttl (Optional[float]): seconds after which an entry expires,
+                `None` keeps the entries until they are evicted
+        """
+        super().__init__(maxsize, ttl)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # Estimated number of entries, `None` until the directory is listed.
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        """Increment a counter of the cache."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _path(self, key: str) -> str:
+        """Path of the file storing the entry for a key."""
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                stored_key, expiry, value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self._count("misses")
+            return None
+        if stored_key != key or (expiry is not None and expiry <= time.time()):
+            self.delete(key)
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return value
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        added = not os.path.exists(path)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                pickle.dump((key, self._expiry(), value), file)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        with self._lock:
+            if self._size is not None and added:
+                self._size += 1
+            full = self._size is None or self._size > self.maxsize
+        if full:
+            self._evict()
+
+    def _evict(self):
+        """Remove the least recently used entries if there are over `maxsize`."""
+        entries = self._entries()
+        evicted = 0
+        if len(entries) > self.maxsize:
+            headroom = int(self.maxsize * self.EVICTION_HEADROOM)
+            entries.sort(key=lambda entry: entry[0])
+            for _, path in entries[: len(entries) - self.maxsize + headroom]:
+                try:
+                    os.unlink(path)
+                    evicted += 1
+                except FileNotFoundError:
+                    pass  # Evicted by another process.
+        with self._lock:
+            self._size = len(entries) - evicted
+            self.evictions += evicted
+
+    def _entries(self) -> list[tuple[float, str]]:
+        """Last use time and path of each entry of the cache."""
+        entries = []
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.name.endswith(self.SUFFIX):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        return entries
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for _, path in self._entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+
+def create_cache(
+    backend: str,
+    maxsize: int = 1024,
+    ttl: Optional[float] = None,
+    directory: Optional[str] = None,
+) -> Optional[CacheBackend]:
+    """Create a cache given the name of its backend.
+
+    Args:
+        backend (str): `memory`, `disk` or `none`
+        maxsize (int): maximum number of entries kept in the cache
+        ttl (Optional[float]): seconds after which an entry expires
+        directory (Optional[str]): directory of the `disk` backend
+
+    Raises:
+        ValueError: If the backend is unknown or a directory is missing
+
+    Returns:
+        Optional[CacheBackend]: the cache, `None` for the `none` backend
+    """
+    backend = backend.lower()
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryCache(maxsize, ttl)
+    if backend == "disk":
+        if not directory:
+            raise ValueError("The disk cache backend requires a directory.")
+        return DiskCache(directory, maxsize, ttl)
+    raise ValueError(f"Unknown cache backend {backend}.")
@@ -0,0 +1,256 @@
+"""Conversion of Dataverse dataset JSONs to serialized DCAT in worker processes.
+
+Converting a dataset is CPU-bound pure Python work, hence threads of the same
+process do not convert in parallel. A `ConversionService` spreads the
+conversions over a pool of worker processes instead.
+
+The conversion modules (and RDFLib) are only imported by the first
+conversion, so that importing this module is cheap.
+
+The timings of the conversions made by the workers are sent back with their
+results, and recorded in the metrics of the process that submitted them.
+"""
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Hashable, Iterable, Iterator, Optional
+
+from dataverse_query.metrics import Histogram, recording, replay
+from dataverse_query.utils import JSON
+
+# Recorded by `Dataset`, defined here so that they are registered (and the
+#  timings of the workers can be replayed) before the first conversion.
+CONVERSION_STEP_SECONDS = Histogram(
+    "dataverse_conversion_step_seconds",
+    "Time spent in each parsing method (JSON path evaluation included) by the "
+    "conversions of datasets to DCAT.",
+    ("method",),
+)
+SERIALIZATION_SECONDS = Histogram(
+    "dataverse_serialization_seconds",
+    "Time spent serializing the DCAT graphs of datasets with RDFLib, by format.",
+    ("format",),
+)
+
+
+def convert(
+    doc: JSON, rdf_format: str = "turtle", streaming: Optional[bool] = None
+) -> bytes:
+    """Convert a dataset JSON to DCAT.
+
+    Args:
+        doc: JSON representation of the dataset.
+        rdf_format: Name of the RDFLib serialization format.
+        streaming: Whether to serialize without building a graph (see
+            `Dataset.serialize`). By default, the formats of
+            `STREAMING_FORMATS` are streamed.
+
+    Returns:
+        The UTF-8 encoded serialization of the DCAT description.
+    """
+    from dataverse_query.dataset import Dataset
+    from dataverse_query.streaming import STREAMING_FORMATS
+
+    if streaming is None:
+        streaming = rdf_format in STREAMING_FORMATS
+    return Dataset(doc).serialize(rdf_format, streaming=streaming)
+
+
+def convert_recording(
+    doc: JSON, rdf_format: str = "turtle", streaming: Optional[bool] = None
+) -> tuple[bytes, list]:
+    """Convert a dataset JSON to DCAT, collecting the timings of the conversion.
+
+    Runs in the worker processes, see `convert` for the arguments.
+
+    Returns:
+        The serialization of the DCAT description, and the observations of
+        the histograms made by the conversion (see `metrics.recording`).
+    """
+    with recording() as observations:
+        dcat = convert(doc, rdf_format, streaming)
+    return dcat, observations
+
+
+def prewarm():
+    """Load everything a conversion needs, so the first one is not slower.
+
+    Runs once in each worker process when it starts.
+    """
+    from dataverse_query.dataset import Dataset
+    from dataverse_query.languages import get_language_index
+    from dataverse_query.licenses import get_rfc3987_regex
+
+    get_language_index()
+    get_rfc3987_regex()
+    Dataset.get_parsing_plan()
+
+
+class ConversionService:
+    """Converts dataset JSONs to serialized DCAT on a pool of processes.
+
+    The pool is created on first use, and again in a process forked after
+    that (e.g. a server worker forked from a preloaded master), since a pool
+    cannot be shared across a fork. It is also created again once broken,
+    i.e. after a worker process died (e.g. killed by the OOM killer): only
+    the conversions in flight at that time fail.
+    """
+
+    def __init__(self, workers: Optional[int] = None, start_method: str = "spawn"):
+        """Initialize the service.
+
+        Args:
+            workers (Optional[int]): number of worker processes, `None` uses
+                one per CPU and `0` converts in the calling thread instead
+            start_method (str): `multiprocessing` start method of the
+                workers
+        """
+        self.workers = os.cpu_count() if workers is None else workers
+        self.start_method = start_method
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Pool of worker processes of the current process."""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=prewarm,
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Forget a broken pool, so that the next conversion creates another."""
+        with self._lock:
+            if self._executor is executor:
+                logging.warning("A conversion worker died, restarting the pool.")
+                executor.shutdown(wait=False)
+                self._executor = None
+
+    def submit(
+        self, doc: JSON, rdf_format: str = "turtle", streaming: Optional[bool] = None
+    ) -> Future:
+        """Schedule the conversion of a dataset JSON.
+
+        Args:
+            doc (JSON): JSON representation of the dataset
+            rdf_format (str): name of the RDFLib serialization format
+            streaming (Optional[bool]): whether to serialize without building
+                a graph, by default if the format can be streamed
+
+        Returns:
+            Future: future of the serialized DCAT description
+        """
+        if self.workers == 0:
+            future = Future()
+            try:
+                future.set_result(convert(doc, rdf_format, streaming))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        executor = self._get_executor()
+        try:
+            worker_future = executor.submit(
+                convert_recording, doc, rdf_format, streaming
+            )
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            worker_future = self._get_executor().submit(
+                convert_recording, doc, rdf_format, streaming
+            )
+        future = Future()
+        worker_future.add_done_callback(
+            functools.partial(self._complete, future=future)
+        )
+        return future
+
+    @staticmethod
+    def _complete(worker_future: Future, future: Future):
+        """Complete a conversion with the result of its worker.
+
+        This is a helper method for `submit`: the timings of the conversion
+        are recorded here, and the future only gets the serialization.
+        """
+        if worker_future.cancelled():
+            future.cancel()
+        elif (error := worker_future.exception()) is not None:
+            future.set_exception(error)
+        else:
+            dcat, observations = worker_future.result()
+            replay(observations)
+            future.set_result(dcat)
+
+    def convert(
+        self, doc: JSON, rdf_format: str = "turtle", streaming: Optional[bool] = None
+    ) -> bytes:
+        """Convert a dataset JSON, waiting for the result.
+
+        The conversion is retried once if the pool breaks meanwhile.
+
+        Args:
+            doc (JSON): JSON representation of the dataset
+            rdf_format (str): name of the RDFLib serialization format
+            streaming (Optional[bool]): whether to serialize without building
+                a graph, by default if the format can be streamed
+
+        Raises:
+            BrokenProcessPool: If the pool broke again while retrying.
+
+        Returns:
+            bytes: serialized DCAT description
+        """
+        try:
+            return self.submit(doc, rdf_format, streaming).result()
+        except BrokenProcessPool:
+            return self.submit(doc, rdf_format, streaming).result()
+
+    def imap_unordered(
+        self,
+        docs: Iterable[tuple[Hashable, JSON]],
+        rdf_format: str = "turtle",
+        max_pending: Optional[int] = None,
+        streaming: Optional[bool] = None,
+    ) -> Iterator[tuple[Hashable, Future]]:
+        """Convert many dataset JSONs, keeping a bounded number in flight.
+
+        The documents are consumed lazily, so that at most `max_pending`
+        documents and results are held in memory at any time.
+
+        Args:
+            docs (Iterable[tuple[Hashable, JSON]]): pairs of a key
+                identifying a dataset and its JSON representation
+            rdf_format (str): name of the RDFLib serialization format
+            max_pending (Optional[int]): maximum number of conversions in
+                flight, twice the number of workers by default
+            streaming (Optional[bool]): whether to serialize without building
+                graphs, by default if the format can be streamed
+
+        Returns:
+            Iterator[tuple[Hashable, Future]]: pairs of a key and the
+                future of its (finished) conversion, in completion order
+        """
+        max_pending = max_pending or 2 * max(self.workers, 1)
+        pending = dict()
+        for key, doc in docs:
+            pending[self.submit(doc, rdf_format, streaming)] = key
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from ((pending.pop(future), future) for future in done)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from ((pending.pop(future), future) for future in done)
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
@@ -1,12 +1,13 @@
 """Module dedicated to the conversion of a Dataverse dataset JSON to DCAT."""
 
 import functools
-import itertools
-import re
-from html.parser import HTMLParser
-from typing import Any, Hashable, Union
+import hashlib
+import io
+import threading
+import time
+from typing import BinaryIO, Hashable, Iterator, NamedTuple, Optional, Union
 
-import pycountry
+from jsonpath_ng import JSONPath
 from jsonpath_ng.ext import parse
 from rdflib import (
     DCAT,
@@ -16,6 +17,7 @@ from rdflib import (
     RDF,
     XSD,
     BNode,
+    ConjunctiveGraph,
     Graph,
     Literal,
     Namespace,
@@ -23,6 +25,12 @@ from rdflib import (
 )
 from rdflib.term import Identifier
 
+from dataverse_query.conversion import CONVERSION_STEP_SECONDS, SERIALIZATION_SECONDS
+from dataverse_query.languages import resolve_language
+from dataverse_query.licenses import resolve_license, resolve_terms_of_use
+from dataverse_query.streaming import TripleWriter
+from dataverse_query.utils import JSON
+
 # from typing import Optional
 
 
@@ -32,167 +40,13 @@ from rdflib.term import Identifier
 Triple = [Identifier, Identifier, Identifier]
 # Pattern = tuple[Optional[Identifier], Optional[Identifier],
 #                 Optional[Identifier]]
-JSON = Any  # Placeholder for JSON type hint.
 
 # Additional namespaces.
 PAV = Namespace("http://pav-ontology.github.io/pav/")
 VCARD = Namespace("http://www.w3.org/2006/vcard/ns#")
 
-# RFC3987 regex (to match IRIs) (MIT Licensed)
-#  https://github.com/aas-core-works/abnf-to-regexp/blob
-#  /412da7ae24ec6ea20e75767e08af3b05176053f3/test_data/single-regexp/rfc3987
-#  /expected.out
-"""MIT License
-
-Copyright (c) 2021 Marko Ristin, Nico Braunisch, Robert Lehmann
-
-Permission is hereby granted, free of charge, to any person obtaining a copy
-of this software and associated documentation files (the "Software"), to deal
-in the Software without restriction, including without limitation the rights
-to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-copies of the Software, and to permit persons to whom the Software is
-furnished to do so, subject to the following conditions:
-
-The above copyright notice and this permission notice shall be included in all
-copies or substantial portions of the Software.
-
-THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
-SOFTWARE."""
-rfc3987 = (
-    r"[a-zA-Z][a-zA-Z0-9+\-.]*:(//(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
-    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
-    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
-    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
-    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
-    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:])*@)?"
-    r"(\[((([0-9A-Fa-f]{1,4}:){6,6}"
-    r"([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
-    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
-    r"|::([0-9A-Fa-f]{1,4}:){5,5}([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
-    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
-    r"|([0-9A-Fa-f]{1,4})?::([0-9A-Fa-f]{1,4}:){4,4}"
-    r"([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}|([0-9]|[1-9][0-9]|1[0-9]{2,2}"
-    r"|2[0-4][0-9]|25[0-5])\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]"
-    r"|25[0-5])\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
-    r"|(([0-9A-Fa-f]{1,4}:)?[0-9A-Fa-f]{1,4})?::([0-9A-Fa-f]{1,4}:)"
-    r"{3,3}([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
-    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
-    r"|(([0-9A-Fa-f]{1,4}:){2}[0-9A-Fa-f]{1,4})?::"
-    r"([0-9A-Fa-f]{1,4}:){2,2}([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}|"
-    r"([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
-    r"|(([0-9A-Fa-f]{1,4}:){3}[0-9A-Fa-f]{1,4})?::"
-    r"[0-9A-Fa-f]{1,4}:([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
-    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
-    r"|(([0-9A-Fa-f]{1,4}:){4}[0-9A-Fa-f]{1,4})?::"
-    r"([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
-    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
-    r"|(([0-9A-Fa-f]{1,4}:){5}[0-9A-Fa-f]{1,4})?::"
-    r"[0-9A-Fa-f]{1,4}|(([0-9A-Fa-f]{1,4}:){6}[0-9A-Fa-f]{1,4})?::)"
-    r"|[vV][0-9A-Fa-f]{1,}\.[a-zA-Z0-9\-._~!$&'()*+,;=:]{1,})\]"
-    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
-    r"|([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
-    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
-    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
-    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
-    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
-    r"|[!$&'()*+,;=])*)(:[0-9]*)?(/([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
-    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
-    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
-    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
-    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
-    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])*)*"
-    r"|/(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
-    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
-    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
-    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
-    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
-    r"|[!$&'()*+,;=:@]){1,}(/([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
-    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
-    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
-    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
-    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
-    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])*)*)?"
-    r"|([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
-    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
-    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
-    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
-    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
-    r"|[!$&'()*+,;=:@]){1,}(/([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
-    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
-    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
-    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
-    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
-    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])*)*"
-    r"|([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
-    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
-    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
-    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
-    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
-    r"|[!$&'()*+,;=:@]){0,0})(\?(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
-    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
-    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
-    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
-    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
-    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])|[\ue000-\uf8ff\uf0000"
-    r"-\uffffd\u100000-\u10fffd/?])*)?"
-    r"(\#(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
-    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
-    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
-    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
-    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
-    r"|[!$&'()*+,;=:@])|[/?])*)?"
-)
-# Modification: do not match empty string after ':'.
-rfc3987 = r"(?=[^\s]*:[^\s])" + rfc3987
-rfc3987 = re.compile(rfc3987, flags=re.IGNORECASE | re.UNICODE)
-
-
-# Convert HTML to text.
-class HTMLText(HTMLParser):
-    """Sublcass of `HTMLParser` meant to convert HTML into plain text."""
-
-    text: str = ""
-
-    def handle_data(self, data: str) -> None:
-        """Saves the text data from the HTML.
-
-        Overrides the method of the parent class.
-        """
-        self.text += data
-
-
-def html_to_text(data: str) -> str:
-    """Converts HTML into plain text."""
-    converter = HTMLText()
-    converter.feed(data)
-    return converter.text
+# Serializes the compilation of the parsing plans (see `get_parsing_plan`).
+_parsing_plan_lock = threading.Lock()
 
 
 # TODO: get rid of this algorithm and use the new Python 3.9's implementation.
@@ -221,7 +75,11 @@ def topological_sort(edges: set[tuple[Hashable, Hashable]]) -> tuple[Hashable, .
     result = []
     no_incoming_edges = set(graph.keys()) - {x for s in graph.values() for x in s}
     while no_incoming_edges:
-        node = no_incoming_edges.pop()
+        # Take the smallest node ready rather than an arbitrary one: functions
+        #  hash by identity, so the order of a set of them changes from one
+        #  process to the next.
+        node = min(no_incoming_edges, key=_sort_key)
+        no_incoming_edges.remove(node)
         result += [node]
         for m in set(graph[node]):
             graph[node].remove(m)
@@ -236,6 +94,19 @@ def topological_sort(edges: set[tuple[Hashable, Hashable]]) -> tuple[Hashable, .
     return tuple(result)
 
 
+def _sort_key(node: Hashable) -> tuple[str, str]:
+    """Key ordering the nodes of `topological_sort` the same in every process.
+
+    Args:
+        node: A node of the graph (e.g. a label, a function or `None`).
+
+    Returns:
+        The name of the type of the node and its qualified name (or its
+        string representation).
+    """
+    return type(node).__name__, getattr(node, "__qualname__", str(node))
+
+
 def jsonpath(path: str) -> callable:
     """Factory of decorators that annotate a function with a JSON path.
 
@@ -262,6 +133,38 @@ def jsonpath(path: str) -> callable:
     return decorator
 
 
+def metadata_field(block: str, type_name: str) -> callable:
+    """Factory of decorators that annotate a function with a metadata field.
+
+    Annotating a function with `metadata_field(block, type_name)` is
+    equivalent to annotating it with the JSON path
+    `$.latestVersion.metadataBlocks.<block>.fields[?(@.typeName ==
+    "<type_name>")]`, but instead of evaluating one such JSON path per
+    function, the fields of every metadata block are walked once per
+    dataset and dispatched to the functions according to their `typeName`
+    (see `Dataset.to_dcat`).
+
+    Args:
+        block: The name of the metadata block (e.g. `citation`).
+        type_name: The `typeName` of the fields passed to the function. It
+            is assigned, together with `block`, to the attribute
+            `dataset_parsing_field` of the function.
+
+    Returns:
+        A decorator.
+    """
+
+    def decorator(func: callable):
+        wrapped = jsonpath(
+            f"$.latestVersion.metadataBlocks.{block}.fields"
+            f'[?(@.typeName == "{type_name}")]'
+        )(func)
+        wrapped.dataset_parsing_field = (block, type_name)
+        return wrapped
+
+    return decorator
+
+
 def create_dependency_decorator(annotation_variable: str) -> callable:
     """Factory of factories of decorators that annotate a function.
 
@@ -315,6 +218,24 @@ has been specified that the provided label is required.
 """
 
 
+class ParsingStep(NamedTuple):
+    """A parsing method of a `Dataset` class, ready to be applied.
+
+    Attributes:
+        name: Name of the method in the class.
+        function: The (unbound) parsing method.
+        path: The JSON path of the method (see `jsonpath`), already parsed.
+            It is `None` for methods annotated with a metadata field.
+        field: The metadata block and `typeName` of the fields the method
+            parses (see `metadata_field`), if any.
+    """
+
+    name: str
+    function: callable
+    path: Optional[JSONPath]
+    field: Optional[tuple[str, str]] = None
+
+
 class Dataset:
     """Representation of a Dataverse dataset.
 
@@ -388,48 +309,180 @@ class Dataset:
             An RDFLib graph containing a DCAT description of the dataset.
         """
         g = Graph()
-        for method in self.get_topologically_sorted_parsing_methods():
-            results = (
-                x.value for x in parse(method.dataset_parsing_path).find(self.doc)
-            )
-            triples = itertools.chain(
-                *(method(doc_or_value) for doc_or_value in results)
-            )
-            # Uncomment for a list of methods executed and the triples they
-            #  produced.
-            # print(method)
-            for triple in triples:
-                # print(triple)
-                g.add(triple)
+        for triple in self.iter_triples():
+            g.add(triple)
         return g
 
-    def to_dcat_file(self, filename: str):
+    def iter_triples(self) -> Iterator[Triple]:
+        """Generate the triples of the DCAT description of this dataset.
+
+        The triples are generated lazily, in the order of the parsing plan,
+        without building a graph. A triple may be generated more than once.
+
+        Yields:
+            The triples of the DCAT description of the dataset.
+        """
+        fields = self._index_metadata_fields()
+        for step in self.get_parsing_plan():
+            start = time.perf_counter()
+            if step.field is None:
+                results = [x.value for x in step.path.find(self.doc)]
+            else:
+                results = fields.get(step.field, ())
+            if not results:
+                continue
+            method = step.function.__get__(self, type(self))
+            # The methods rely on the identifiers set by the methods that run
+            #  before them, hence each method runs to completion before the
+            #  next one.
+            triples = [
+                triple for doc_or_value in results for triple in method(doc_or_value)
+            ]
+            CONVERSION_STEP_SECONDS.observe(
+                time.perf_counter() - start, method=step.name
+            )
+            yield from triples
+
+    def _index_metadata_fields(self) -> dict[tuple[str, str], list[JSON]]:
+        """Index the fields of the metadata blocks of the dataset.
+
+        This is a helper method for `to_dcat`. The fields of each metadata
+        block are walked once, so that the methods annotated with
+        `metadata_field` do not need to scan them again.
+
+        Returns:
+            The fields of the metadata blocks, in order, grouped by the name
+            of their block and their `typeName`.
+        """
+        index = dict()
+        blocks = self.doc.get("latestVersion", {}).get("metadataBlocks", {})
+        for block_name, block in blocks.items():
+            for field in block.get("fields", ()):
+                index.setdefault((block_name, field.get("typeName")), []).append(field)
+        return index
+
+    def serialize(
+        self,
+        format: str = "turtle",
+        destination: Optional[BinaryIO] = None,
+        streaming: bool = False,
+    ) -> Optional[bytes]:
+        """Serialize the DCAT description of the dataset.
+
+        Args:
+            format: Name of the RDFLib serialization format (e.g. `turtle`,
+                `json-ld`, `nt` or `xml`). For quad formats (e.g. `nquads`),
+                the triples are put in a graph named after the persistent
+                URL of the dataset.
+            destination: Binary stream to write the serialization to. When
+                not provided, the serialization is returned instead.
+            streaming: Whether to write the triples as they are generated,
+                without building a graph (see `TripleWriter`). Only the
+                formats in `STREAMING_FORMATS` are supported.
+
+        Returns:
+            The UTF-8 encoded serialization when no destination is provided,
+            otherwise `None`.
+        """
+        if streaming:
+            stream = io.BytesIO() if destination is None else destination
+            TripleWriter(
+                stream,
+                format,
+                bnode_prefix=self.get_bnode_prefix(),
+                graph=URIRef(self.doc["persistentUrl"]),
+            ).write(self.iter_triples())
+            return stream.getvalue() if destination is None else None
+
+        g = self.to_dcat()
+        if format in {"nquads", "trig", "trix"}:
+            quads = ConjunctiveGraph()
+            context = quads.get_context(URIRef(self.doc["persistentUrl"]))
+            context += g
+            g = quads
+        with SERIALIZATION_SECONDS.time(format=format):
+            if destination is None:
+                return g.serialize(format=format, encoding="utf-8")
+            g.serialize(destination=destination, format=format, encoding="utf-8")
+
+    def get_bnode_prefix(self) -> str:
+        """Prefix of the blank node labels of the streamed serialization.
+
+        It is derived from the persistent URL, so that the labels are the
+        same every time the dataset is serialized, and different from the
+        ones of any other dataset.
+
+        Returns:
+            The prefix of the blank node labels.
+        """
+        digest = hashlib.sha1(self.doc["persistentUrl"].encode()).hexdigest()
+        return f"d{digest[:16]}n"
+
+    def to_dcat_file(self, filename: str, format: str = "turtle"):
         """Export the DCAT description of the dataset to a file
 
         Args:
             filename (str): filename (with extension) for the export
+            format (str): name of the RDFLib serialization format
         """
-        g = self.to_dcat()
-        g.serialize(destination=filename)
+        with open(filename, "wb") as file:
+            self.serialize(format, file)
 
     def get_topologically_sorted_parsing_methods(self) -> tuple[callable, ...]:
-        """Methods of this class that parse a JSON representation.
+        """Methods of this object that parse a JSON representation.
 
         Returns:
-            A tuple of methods of this class that parse the JSON
+            A tuple of methods of this object that parse the JSON
             representation of the dataset, topologically sorted (the order
             is assigned using the `provides` and `requires` decorators).
         """
-        dataset_parsing_methods: list[callable] = [
-            function_or_attribute
-            for item in dir(self)
+        return tuple(
+            step.function.__get__(self, type(self)) for step in self.get_parsing_plan()
+        )
+
+    @classmethod
+    def get_parsing_plan(cls) -> tuple[ParsingStep, ...]:
+        """Parsing plan of this class.
+
+        The plan does not depend on the JSON representation of the dataset,
+        therefore it is compiled on first use and then reused by all the
+        instances of the class. Each subclass gets its own plan. Concurrent
+        first uses wait for a single compilation.
+
+        Returns:
+            The parsing steps of this class, topologically sorted.
+        """
+        # Look the plan up in the namespace of the class itself, so that a
+        #  subclass does not reuse the plan of its parent.
+        plan = cls.__dict__.get("_parsing_plan")
+        if plan is None:
+            with _parsing_plan_lock:
+                plan = cls.__dict__.get("_parsing_plan")
+                if plan is None:
+                    plan = cls._parsing_plan = cls._compile_parsing_plan()
+        return plan
+
+    @classmethod
+    def _compile_parsing_plan(cls) -> tuple[ParsingStep, ...]:
+        """Compile the parsing plan of this class.
+
+        This is a helper method for `get_parsing_plan`.
+
+        Returns:
+            The parsing steps of this class, topologically sorted (the order
+            is assigned using the `provides` and `requires` decorators), with
+            their JSON paths already parsed.
+        """
+        dataset_parsing_methods: dict[callable, str] = {
+            function_or_attribute: item
+            for item in dir(cls)
             if hasattr(
-                function_or_attribute := getattr(self, item), "dataset_parsing_path"
+                function_or_attribute := getattr(cls, item), "dataset_parsing_path"
             )
-        ]
+        }
 
-        requirements = self._requirements
-        provided = self._provided
+        requirements = cls._requirements
+        provided = cls._provided
 
         directed_edges = {
             (requirement, provided_item)
@@ -438,21 +491,24 @@ class Dataset:
             for provided_item in provided(method)
         }
         sorted_provided = topological_sort(directed_edges)
-        sorted_methods = tuple(
-            sorted(
-                dataset_parsing_methods,
-                key=lambda method: min(
-                    sorted_provided.index(x) for x in provided(method)
-                ),
-            )
+        sorted_methods = sorted(
+            dataset_parsing_methods,
+            key=lambda method: min(sorted_provided.index(x) for x in provided(method)),
         )
-        return sorted_methods
+        plan = []
+        for method in sorted_methods:
+            field = getattr(method, "dataset_parsing_field", None)
+            path = None if field else parse(method.dataset_parsing_path)
+            plan.append(
+                ParsingStep(dataset_parsing_methods[method], method, path, field)
+            )
+        return tuple(plan)
 
     @staticmethod
     def _provided(method: callable) -> set[Union[callable, str]]:
         """Labels provided by a method.
 
-        This is a helper method for `get_topologically_sorted_parsing_methods`.
+        This is a helper method for `_compile_parsing_plan`.
 
         When no label is provided, the method itself is considered a label.
 
@@ -469,7 +525,7 @@ class Dataset:
     def _requirements(method: callable) -> set[str]:
         """Labels required by a method.
 
-        This is a helper method for `get_topologically_sorted_parsing_methods`.
+        This is a helper method for `_compile_parsing_plan`.
 
         Returns:
             Set of labels required by the method. When no labels are
@@ -488,7 +544,7 @@ class Dataset:
     @provides("dataset")
     @requires("publisher")
     @jsonpath("$")
-    def general_dataset(self, doc: JSON) -> set[Triple]:
+    def general_dataset(self, doc: JSON) -> Iterator[Triple]:
         """Compute the triples for the dataset object itself.
 
         Args:
@@ -496,21 +552,11 @@ class Dataset:
                 path provided to the `jsonpath` decorator that is applied to
                 this function.
 
-        Returns:
+        Yields:
             The triples representing the dataset entity.
         """
-        self.identifiers["dataset"] = (dataset := BNode())
-        print(doc["latestVersion"])
-        # Find URL in license, if not strip HTML.
-        license_string = doc["latestVersion"]["termsOfUse"]
-        if match := rfc3987.search(license_string):
-            license_string = match.string[match.start() : match.end()]
-            license_datatype = XSD.anyURI
-        else:
-            license_string = html_to_text(license_string)
-            license_datatype = XSD.string
-
-        triples = {
+        self.identifiers["dataset"] = (dataset := URIRef(doc["persistentUrl"]))
+        yield from (
             (dataset, RDF.type, DCAT.Dataset),
             (
                 dataset,
@@ -546,95 +592,80 @@ class Dataset:
             (
                 dataset,
                 DCTERMS.license,
-                Literal(license_string, datatype=license_datatype),
+                resolve_terms_of_use(doc["latestVersion"]["termsOfUse"]),
             ),
-        }
-        if doc["latestVersion"]["license"].upper() != "NONE":
-            triples |= {(dataset, DCTERMS.license, doc["license"])}
-        return triples
+        )
+        if license := resolve_license(doc["latestVersion"].get("license")):
+            yield dataset, DCTERMS.license, license
 
     @provides("publisher")
     @jsonpath("$.publisher")
-    def general_publisher(self, publisher: str) -> set[Triple]:
+    def general_publisher(self, publisher: str) -> Iterator[Triple]:
         """Compute the triples for the publisher entity.
 
         Args:
             publisher: Name of the publisher.
 
-        Returns:
+        Yields:
             The triples representing the publisher entity.
         """
         self.identifiers["publisher"] = (publisher_id := BNode())
-        return {
-            (publisher_id, RDF.type, FOAF.Agent),
-            (publisher_id, FOAF.name, Literal(publisher, datatype=XSD.string)),
-        }
+        yield publisher_id, RDF.type, FOAF.Agent
+        yield publisher_id, FOAF.name, Literal(publisher, datatype=XSD.string)
 
     @requires("dataset")
-    @jsonpath(
-        "$.latestVersion.metadataBlocks.citation.fields" '[?(@.typeName == "title")]'
-    )
-    def block_citation_title(self, doc: JSON) -> set[Triple]:
+    @metadata_field("citation", "title")
+    def block_citation_title(self, doc: JSON) -> Iterator[Triple]:
         """Compute the triple defining the title of the dataset.
 
         Args:
-            doc: Child of dataset JSON representation determined by the JSON
-                path provided to the `jsonpath` decorator that is applied to
-                this function.
+            doc: Field of a metadata block of the dataset JSON
+                representation determined by the `metadata_field` decorator
+                that is applied to this function.
 
-        Returns:
+        Yields:
             The triple representing the title of the dataset.
         """
-        return {
-            (
-                self.identifiers["dataset"],
-                DCTERMS.title,
-                Literal(doc["value"], datatype=XSD.string),
-            ),
-        }
+        yield (
+            self.identifiers["dataset"],
+            DCTERMS.title,
+            Literal(doc["value"], datatype=XSD.string),
+        )
 
     @requires("dataset")
-    @jsonpath(
-        "$.latestVersion.metadataBlocks.citation.fields"
-        '[?(@.typeName == "alternativeTitle")]'
-    )
-    def block_citation_alternative_title(self, doc: JSON) -> set[Triple]:
+    @metadata_field("citation", "alternativeTitle")
+    def block_citation_alternative_title(self, doc: JSON) -> Iterator[Triple]:
         """Compute the triples for an alternative title of the dataset.
 
         Args:
-            doc: Child of dataset JSON representation determined by the JSON
-                path provided to the `jsonpath` decorator that is applied to
-                this function.
+            doc: Field of a metadata block of the dataset JSON
+                representation determined by the `metadata_field` decorator
+                that is applied to this function.
 
-        Returns:
+        Yields:
             The triples representing an alternative title for the dataset.
         """
-        return {
-            (
-                self.identifiers["dataset"],
-                DCTERMS.title,
-                Literal(doc["value"], datatype=XSD.string),
-            ),
-        }
+        yield (
+            self.identifiers["dataset"],
+            DCTERMS.title,
+            Literal(doc["value"], datatype=XSD.string),
+        )
 
     @requires("dataset")
-    @jsonpath(
-        "$.latestVersion.metadataBlocks.citation.fields" '[?(@.typeName == "author")]'
-    )
-    def block_citation_author(self, doc: JSON) -> set[Triple]:
+    @metadata_field("citation", "author")
+    def block_citation_author(self, doc: JSON) -> Iterator[Triple]:
         """Compute the triples for an author entity.
 
         Additionally, connects it to the dataset.
 
         Args:
-            doc: Child of dataset JSON representation determined by the JSON
-                path provided to the `jsonpath` decorator that is applied to
-                this function.
+            doc: Field of a metadata block of the dataset JSON
+                representation determined by the `metadata_field` decorator
+                that is applied to this function.
 
-        Returns:
+        Yields:
             The triples representing the author entity.
         """
-        triples = set()
         for author in doc["value"]:
             author_name = (
                 author["authorName"]["value"] if "authorName" in author else None
@@ -655,31 +686,24 @@ class Dataset:
             if author_type == FOAF.Organization:
                 author_affiliation = None
 
-            triples |= {(author_identifier := BNode(), RDF.type, author_type)}
+            yield (author_identifier := BNode()), RDF.type, author_type
             if author_affiliation:
-                triples |= {
-                    (organization := BNode(), RDF.type, FOAF.Organization),
-                    (author_identifier, FOAF.member, organization),
-                }
-        return triples
+                yield (organization := BNode()), RDF.type, FOAF.Organization
+                yield author_identifier, FOAF.member, organization
 
     @requires("dataset")
-    @jsonpath(
-        "$.latestVersion.metadataBlocks.citation.fields"
-        '[?(@.typeName == "datasetContact")]'
-    )
-    def block_citation_dataset_contact(self, doc: JSON) -> set[Triple]:
+    @metadata_field("citation", "datasetContact")
+    def block_citation_dataset_contact(self, doc: JSON) -> Iterator[Triple]:
         """Compute the triples describing a contact entity for the dataset.
 
         Args:
-            doc: Child of dataset JSON representation determined by the JSON
-                path provided to the `jsonpath` decorator that is applied to
-                this function.
+            doc: Field of a metadata block of the dataset JSON
+                representation determined by the `metadata_field` decorator
+                that is applied to this function.
 
-        Returns:
+        Yields:
             The triples representing the contact person
         """
-        triples = set()
         for contact in doc["value"]:
             contact_name = (
                 contact["datasetContactName"]["value"]
@@ -709,61 +733,44 @@ class Dataset:
 
             contact_identifier = BNode()
             if contact_type == FOAF.Organization:
-                triples |= {
-                    (contact_identifier, RDF.type, VCARD.Organization),
-                }
+                yield contact_identifier, RDF.type, VCARD.Organization
             else:
-                triples |= {
-                    (contact_identifier, RDF.type, VCARD.Kind),
-                }
+                yield contact_identifier, RDF.type, VCARD.Kind
 
             if contact_affiliation:
-                triples |= {
-                    (
-                        contact_identifier,
-                        VCARD["organization-name"],
-                        Literal(contact_affiliation, datatype=XSD.string),
-                    ),
-                }
-
-            triples |= {
-                (
+                yield (
                     contact_identifier,
-                    VCARD.fn,
-                    Literal(contact_name, datatype=XSD.string),
+                    VCARD["organization-name"],
+                    Literal(contact_affiliation, datatype=XSD.string),
                 )
-            }
+
+            yield (
+                contact_identifier,
+                VCARD.fn,
+                Literal(contact_name, datatype=XSD.string),
+            )
             if contact_email:
-                triples |= {
-                    (
-                        contact_identifier,
-                        VCARD.hasEmail,
-                        URIRef(f"mailto:{contact_email}"),
-                    )
-                }
-
-            triples |= {
-                (self.identifiers["dataset"], DCAT.contactPoint, contact_identifier)
-            }
-        return triples
+                yield (
+                    contact_identifier,
+                    VCARD.hasEmail,
+                    URIRef(f"mailto:{contact_email}"),
+                )
+
+            yield self.identifiers["dataset"], DCAT.contactPoint, contact_identifier
 
     @requires("dataset")
-    @jsonpath(
-        "$.latestVersion.metadataBlocks.citation.fields"
-        '[?(@.typeName == "dsDescription")]'
-    )
-    def block_citation_description(self, doc: JSON) -> set[Triple]:
+    @metadata_field("citation", "dsDescription")
+    def block_citation_description(self, doc: JSON) -> Iterator[Triple]:
         """Compute the triples for a description of the dataset.
 
         Args:
-            doc: Child of dataset JSON representation determined by the JSON
-                path provided to the `jsonpath` decorator that is applied to
-                this function.
+            doc: Field of a metadata block of the dataset JSON
+                representation determined by the `metadata_field` decorator
+                that is applied to this function.
 
-        Returns:
+        Yields:
             The triples representing the description.
         """
-        triples = set()
         for description in doc["value"]:
             value = description["dsDescriptionValue"]["value"]
             value = None if value == "value unavailable" else value
@@ -776,170 +783,31 @@ class Dataset:
                     f"(Description provided on " f"{description['dsDescriptionDate']})"
                 )
 
-            triples |= {
-                (
-                    self.identifiers["dataset"],
-                    DCTERMS.description,
-                    Literal(value, datatype=XSD.string),
-                )
-            }
-        return triples
+            yield (
+                self.identifiers["dataset"],
+                DCTERMS.description,
+                Literal(value, datatype=XSD.string),
+            )
 
     @requires("dataset")
-    @jsonpath(
-        "$.latestVersion.metadataBlocks.citation.fields" '[?(@.typeName == "language")]'
-    )
-    def block_citation_language(self, doc: JSON) -> set[Triple]:
+    @metadata_field("citation", "language")
+    def block_citation_language(self, doc: JSON) -> Iterator[Triple]:
         """Compute the triples describing one of the languages of the dataset.
 
-        Uses several auxiliary attributes located just below this method.
+        The languages are resolved with `resolve_language`.
 
         Args:
-            doc: Child of dataset JSON representation determined by the JSON
-                path provided to the `jsonpath` decorator that is applied to
-                this function.
+            doc: Field of a metadata block of the dataset JSON
+                representation determined by the `metadata_field` decorator
+                that is applied to this function.
 
-        Returns:
+        Yields:
             The triples representing the language.
         """
-        triples = set()
-
         # A dataset may have multiple languages.
         for language in doc["value"]:
-            # Even multiple names may come separated via a comma for the
-            #  same language.
-            names = language.split(",")
-            names = (name.strip() for name in names)
-            # Some names are exclusive to the Dataverse, translate to
-            # ISO-639 english names.
-            names = (
-                self.block_citation_language_synonyms_Dataverse.get(name, name)
-                for name in names
-            )
-            # This name may be the one supported by `pycountry`, or not,
-            #  therefore we add all possibilities to the iterator.
-            names = (
-                name
-                for main_name in names
-                for name in itertools.chain(
-                    (main_name,),
-                    self.block_citation_language_synonyms_ISO.get(main_name, set()),
-                )
-            )
-
-            # Finally, loop over all the possibilities and try to find a match.
-            #  Then create the triple according to
-            #  https://www.w3.org/TR/vocab-dcat-2/#Property:language.
-            #
-            #  A two-letter code will always be defined for any language
-            #  received, because it should be in ISO 639-1. However,
-            #  when the value is 'Not applicable' or 'Not linguistic
-            #  content', the three-letter code should be used.
-            result = None
-            for name in names:
-                if name.lower() in {
-                    "No linguistic content".lower(),
-                    "Not applicable".lower(),
-                }:
-                    result = "zxx"
-                    break
-
-                result = pycountry.languages.get(name=name)
-                if result is not None:
-                    result = result.alpha_2
-                    break
-
-            if result is None:
-                raise ValueError(f"Unsupported language {language}.")
-
-            result = URIRef(
-                f"http://id.loc.gov/vocabulary/"
-                f"iso639-{1 if len(result) <= 2 else 2}"
-                f"/%s" % result
+            yield (
+                self.identifiers["dataset"],
+                DCTERMS.language,
+                resolve_language(language),
             )
-
-            result = (self.identifiers["dataset"], DCTERMS.language, result)
-
-            triples.add(result)
-
-        return triples
-
-    # - Dataverse theoretically conforms to ISO 639-1, but actually, not all
-    #   language names provided belong to the "All English Names" column for
-    #   languages represented by ISO 639-1. For example `Greek (Modern)`
-    #   from he Dataverse is 'Modern Greek (1453-)' on ISO 639-1.
-    #   See https://github.com/IQSS/dataverse/blob/
-    #   9161cd6c5d9665b2a7b8c14b8e726a6712093ee0/scripts/api/data/
-    #   metadatablocks/citation.tsv
-
-    # - Moreover, the `pycountry` library only accepts one of the official
-    #   names from https://www.loc.gov/standards/iso639-2/php/English_list.php.
-    #   Dataverse may refer to the language with a different official name.
-
-    # - Finally `pycountry` uses the underlying OS library, so one should
-    #   not trust that the same official name will be associated to the same
-    #   language across all operating systems.
-
-    # Therefore, it makes sense to create lists of synonyms to mitigate the
-    # above problems.
-
-    # All ISO 639-1 official names for languages with more than one official
-    # name. As all synonyms have the same importance, they are first
-    # specified as sets, and then later transformed to a hash table for fast
-    # access.
-    block_citation_language_synonyms_ISO_sets = {
-        frozenset({"Castillian", "Spanish"}),
-        frozenset({"Catalan", "Valencian"}),
-        frozenset({"Chichewa", "Chewa", "Nyanja"}),
-        frozenset({"Zhuang", "Chuang"}),
-        frozenset(
-            {
-                "Church Slavic",
-                "Old Slavonic",
-                "Church Slavonic",
-                "Old Bulgarian",
-                "Old Church Slavonic",
-            }
-        ),
-        frozenset({"Divehi", "Dhivehi", "Maldivian"}),
-        frozenset({"Dutch", "Flemish"}),
-        frozenset({"Gaelic", "Scottish Gaelic"}),
-        frozenset({"Kikuyu", "Gikuyu"}),
-        frozenset({"Kalaallisut", "Greenlandic"}),
-        frozenset({"Haitian", "Haitian Creole"}),
-        frozenset({"Kuanyama", "Kwanyama"}),
-        frozenset({"Kirghiz", "Kyrgyz"}),
-        frozenset({"Limburgan", "Limburger", "Limburgish"}),
-        frozenset({"Romanian", "Moldavian", "Moldovan"}),
-        frozenset({"Navajo", "Navaho"}),
-        frozenset({"Ndebele, North", "North Ndebele"}),
-        frozenset({"Ndebele, South", "South Ndebele"}),
-        frozenset({"Norwegian Nynorsk", "Nynorsk, Norwegian"}),
-        frozenset({"Sichuan Yi", "Nuosu"}),
-        frozenset({"Interlingue", "Occidental"}),
-        frozenset({"Ossetian", "Ossetic"}),
-        frozenset({"Panjabi", "Punjabi"}),
-        frozenset({"Pushto", "Pashto"}),
-        frozenset({"Sinhala", "Sinhalese"}),
-        frozenset({"Uighur", "Uyghur"}),
-    }
-    block_citation_language_synonyms_ISO = {
-        name: name_set - {name}
-        for name_set in block_citation_language_synonyms_ISO_sets
-        for name in name_set
-    }
-    del block_citation_language_synonyms_ISO_sets
-
-    # Synonyms for Dataverse non-official names, format: Dict[str, str],
-    # {'dataverse_name': 'one_of_the_official_names'}.
-    block_citation_language_synonyms_Dataverse = {
-        "Bangla": "Bengali",
-        "Fula": "Fulah",
-        "Pulaar": "Fulah",
-        "Pular": "Fulah",
-        "Letzeburgesch": "Luxembourgish",
-        "Persian (Farsi)": "Persian",
-        "Sanskrit (Saṁskṛta)": "Sanskrit",
-        "Tibetan Standard": "Tibetan",
-        "Tibetan, Central": "Tibetan",
-    }
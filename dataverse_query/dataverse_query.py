@@ -1,36 +1,221 @@
 """Query dataverse via its API."""
-from typing import Dict
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
 from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
+from urllib3.util.retry import Retry
 
-from dataverse_query.utils import convert_to_global_search_response
+from dataverse_query import codec
+from dataverse_query.cache import CacheBackend
+from dataverse_query.metrics import Gauge, Histogram
+from dataverse_query.singleflight import SingleFlight
+from dataverse_query.utils import (
+    convert_to_global_search_response,
+    get_item_updated_at,
+    normalize_search,
+)
+
+# Status codes for which an idempotent request to the dataverse is retried.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "dataverse_upstream_request_seconds",
+    "Duration of the queries to the dataverse, until the response headers are "
+    "received, by API path and status code.",
+    ("path", "status"),
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = Gauge(
+    "dataverse_upstream_requests_in_flight",
+    "Queries to the dataverse waiting for a response, by API path.",
+    ("path",),
+)
 
 
 class DataverseQuery:
-    """Class used for querying the dataverse through its API."""
+    """Class used for querying the dataverse through its API.
+
+    All the queries go through a single `requests.Session`, so that the
+    connections to the dataverse are pooled and kept alive between calls.
+    Identical JSON queries made concurrently by several threads are sent
+    once, the threads share the decoded response.
+    """
 
-    def __init__(self, repo_url: str):
+    def __init__(
+        self,
+        repo_url: str,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        connect_timeout: float = 5.0,
+        read_timeout: Optional[float] = 60.0,
+        cache: Optional[CacheBackend] = None,
+        search_cache: Optional[CacheBackend] = None,
+    ):
+        """Initialize the query object and its connection pool.
+
+        Args:
+            repo_url (str): url of the dataverse instance
+            pool_connections (int): number of hosts whose connection pools
+                are kept
+            pool_maxsize (int): maximum number of connections kept alive
+                per host
+            max_retries (int): times a request is retried on connection
+                errors or on a 429/5xx response
+            backoff_factor (float): factor for the exponential backoff
+                between retries (in seconds)
+            connect_timeout (float): seconds to wait for a connection to
+                the dataverse
+            read_timeout (Optional[float]): seconds to wait between bytes
+                received from the dataverse, `None` waits forever
+            cache (Optional[CacheBackend]): cache for the metadata of the
+                datasets, `None` disables caching
+            search_cache (Optional[CacheBackend]): cache for the global
+                search responses, `None` disables caching
+        """
         self.base_url = urljoin(repo_url, "api/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.search_cache = search_cache
+        self._flight = SingleFlight("dataverse")
+        self.session = self._create_session(
+            pool_connections, pool_maxsize, max_retries, backoff_factor
+        )
+
+    @staticmethod
+    def _create_session(
+        pool_connections: int,
+        pool_maxsize: int,
+        max_retries: int,
+        backoff_factor: float,
+    ) -> requests.Session:
+        """Create the pooled session used for all the queries.
 
-    def _execute_query(self, url: str, payload: Dict[str, str]) -> requests.Response:
+        Args:
+            pool_connections (int): number of hosts whose connection pools
+                are kept
+            pool_maxsize (int): maximum number of connections per host
+            max_retries (int): times a request is retried
+            backoff_factor (float): factor for the exponential backoff
+
+        Returns:
+            Session: session with a retrying, bounded connection pool
+        """
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=True,
+        )
+        session = requests.Session()
+        session.verify = False
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """Close the connections kept alive by the session."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _execute_query(
+        self,
+        url: str,
+        payload: Dict[str, str],
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
         """Execute a query given the payload on the pre-defined url.
 
         Args:
             url (str): url where the query will be done
             payload (Dict[str, str]): Parameters for the query
+            headers (Optional[Dict[str, str]]): Additional request headers
+            stream (bool): Whether to defer downloading the response body
+                until it is iterated over
 
         Raises:
             HTTPError: If the query is not valid
+            Timeout: If the dataverse does not answer in time
 
         Returns:
             Response: Response to the query
         """
-        r = requests.get(url, params=payload, verify=False)
-        r.raise_for_status()
+        path = url[len(self.base_url) :] if url.startswith(self.base_url) else url
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with UPSTREAM_REQUESTS_IN_FLIGHT.track_in_progress(path=path):
+                r = self.session.get(
+                    url,
+                    params=payload,
+                    headers=headers,
+                    stream=stream,
+                    timeout=self.timeout,
+                )
+            status = r.status_code
+        finally:
+            UPSTREAM_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, path=path, status=status
+            )
+        try:
+            r.raise_for_status()
+        except HTTPError:
+            r.close()
+            raise
         return r
 
+    def _get_json(self, url: str, payload: Dict[str, str]) -> Dict[str, str]:
+        """Execute a query and decode its JSON response.
+
+        The query is coalesced with the identical queries in flight, hence
+        the response must not be mutated.
+
+        Args:
+            url (str): url of the query
+            payload (Dict[str, str]): query parameters
+
+        Returns:
+            Dict[str, str]: JSON response
+        """
+        key = ("json", url, tuple(sorted(payload.items())))
+        return self._flight.do(
+            key, lambda: codec.loads(self._execute_query(url, payload).content)
+        )
+
+    def _get_raw(self, url: str, payload: Dict[str, str]) -> bytes:
+        """Execute a query and return the bytes of its response, undecoded.
+
+        Meant for responses relayed as they are. The query is coalesced with
+        the identical queries in flight.
+
+        Args:
+            url (str): url of the query
+            payload (Dict[str, str]): query parameters
+
+        Returns:
+            bytes: body of the response
+        """
+        key = ("raw", url, tuple(sorted(payload.items())))
+        return self._flight.do(key, lambda: self._execute_query(url, payload).content)
+
     def search_dataset(self, query: str):
         url = urljoin(self.base_url, "search/")
         return self._execute_query(url, {"q": query})
@@ -50,6 +235,36 @@ class DataverseQuery:
         )
         return response.content
 
+    def stream_dataset(
+        self, dataset_id: str, byte_range: Optional[str] = None
+    ) -> requests.Response:
+        """Open a streamed download of the files of a dataset given its ID.
+
+        The body of the returned response has not been read yet: the caller
+        is expected to iterate over it (e.g. with `iter_content`) and to
+        close it once done, which also aborts an unfinished download.
+
+        Args:
+            dataset_id (str): unique identifier of a dataset
+            byte_range (Optional[str]): value of an HTTP `Range` header to
+                download only part of the archive
+
+        Returns:
+            Response: Streamed response of the dataverse
+        """
+        url = urljoin(self.base_url, "access/dataset/:persistentId/")
+        # The archive is already compressed, ask for the raw bytes so that
+        #  the headers (e.g. `Content-Length`) describe the streamed body.
+        headers = {"Accept-Encoding": "identity"}
+        if byte_range:
+            headers["Range"] = byte_range
+        return self._execute_query(
+            url,
+            {"persistentId": dataset_id, "download_name": "test_download.zip"},
+            headers=headers,
+            stream=True,
+        )
+
     def get_dataset_metadata(self, dataset_id: str) -> Dict[str, str]:
         """Get the information of a dataset given its ID.
 
@@ -59,31 +274,246 @@ class DataverseQuery:
         Returns:
             Dict[str, str]: JSON information of a dataset
         """
+        key = f"metadata:{dataset_id}"
+        if self.cache is not None and (metadata := self.cache.get(key)) is not None:
+            return metadata
+
+        return self._flight.do(key, self._fetch_dataset_metadata, key, dataset_id)
+
+    def _fetch_dataset_metadata(self, key: str, dataset_id: str) -> Dict[str, str]:
+        """Query the metadata of a dataset, and cache it under `key`.
+
+        This is a helper method for `get_dataset_metadata`, run once for all
+        the threads asking for the same dataset at the same time.
+        """
         url = urljoin(self.base_url, "datasets/:persistentId/")
-        json_payload = self._execute_query(url, {"persistentId": dataset_id}).json()
-        return json_payload["data"]
+        response = self._execute_query(url, {"persistentId": dataset_id})
+        json_payload = codec.loads(response.content)
+        metadata = json_payload["data"]
+        if self.cache is not None:
+            self.cache.set(key, metadata)
+        return metadata
 
-    def get_all_datasets(self) -> Dict[str, str]:
+    def get_all_datasets(self, raw: bool = False) -> Union[Dict[str, str], bytes]:
         """Get all the datasets hosted.
 
+        Args:
+            raw (bool): whether to return the JSON response undecoded, to
+                relay it as it is
+
+        Returns:
+            Union[Dict[str, str], bytes]: JSON response of the dataverse
+                search, decoded or not
+        """
+        url = urljoin(self.base_url, "search/")
+        payload = {"q": "*", "type": "dataset"}
+        return self._get_raw(url, payload) if raw else self._get_json(url, payload)
+
+    def harvest_datasets(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        per_page: int = 100,
+        max_in_flight: int = 4,
+        types: Tuple[str, ...] = ("dataset",),
+    ) -> Tuple[int, Iterator[Dict[str, str]]]:
+        """Harvest the datasets hosted, page by page.
+
+        The first page is fetched right away, the following ones while the
+        returned iterator is consumed, with up to `max_in_flight` pages
+        being fetched concurrently. Closing the iterator cancels the pages
+        not requested yet.
+
+        Args:
+            offset (int): number of datasets to skip
+            limit (Optional[int]): maximum number of datasets to harvest,
+                `None` harvests all of them, 0 only counts them
+            per_page (int): number of datasets requested per page (the
+                dataverse allows up to 1000)
+            max_in_flight (int): maximum number of pages fetched
+                concurrently
+            types (Tuple[str, ...]): types of the objects harvested
+
+        Returns:
+            Tuple[int, Iterator[Dict[str, str]]]: total number of datasets
+                hosted and an iterator over the search items of the
+                harvested datasets
+        """
+        if limit == 0:
+            # The dataverse would answer `per_page=0` with a default page.
+            return self._search_datasets_page(0, 1, types)["total_count"], iter(())
+        end = None if limit is None else offset + limit
+        first_size = per_page if end is None else min(per_page, end - offset)
+        first_page = self._search_datasets_page(offset, first_size, types)
+        total_count = first_page["total_count"]
+        end = total_count if end is None else min(end, total_count)
+        return total_count, self._iter_datasets(
+            first_page, first_size, offset, end, per_page, max_in_flight, types
+        )
+
+    def _iter_datasets(
+        self,
+        first_page: Dict[str, str],
+        first_size: int,
+        offset: int,
+        end: int,
+        per_page: int,
+        max_in_flight: int,
+        types: Tuple[str, ...],
+    ) -> Iterator[Dict[str, str]]:
+        """Iterate over the items of the pages of a harvest, in order.
+
+        This is a helper method for `harvest_datasets`. The iteration stops
+        early if a page is shorter than requested, which happens when the
+        catalogue shrinks during the harvest.
+        """
+        yield from first_page["items"]
+        if len(first_page["items"]) < first_size:
+            return
+        executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        pending = collections.deque()
+        try:
+            for start in range(offset + first_size, end, per_page):
+                size = min(per_page, end - start)
+                future = executor.submit(self._search_datasets_page, start, size, types)
+                pending.append((future, size))
+                if len(pending) < max_in_flight:
+                    continue
+                future, size = pending.popleft()
+                yield from (items := future.result()["items"])
+                if len(items) < size:
+                    return
+            while pending:
+                future, size = pending.popleft()
+                yield from (items := future.result()["items"])
+                if len(items) < size:
+                    return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _search_datasets_page(
+        self, start: int, per_page: int, types: Tuple[str, ...] = ("dataset",)
+    ) -> Dict[str, str]:
+        """Get one page of the search of all the datasets hosted.
+
+        Args:
+            start (int): number of datasets to skip
+            per_page (int): number of datasets in the page
+            types (Tuple[str, ...]): types of the objects searched
+
         Returns:
-            Dict[str, str]: [description]
+            Dict[str, str]: data of the search response
         """
         url = urljoin(self.base_url, "search/")
-        return self._execute_query(url, {"q": "*", "type": "dataset"}).json()
+        payload = {"q": "*", "type": tuple(types), "start": start, "per_page": per_page}
+        return self._get_json(url, payload)["data"]
+
+    def count_datasets(self) -> int:
+        """Get the number of datasets hosted.
 
-    def global_search(self, query: str) -> Dict[str, str]:
+        Returns:
+            int: total count of the search of all the datasets
+        """
+        return self._search_datasets_page(0, 1)["total_count"]
+
+    def iter_recently_updated(
+        self,
+        since: Optional[str] = None,
+        per_page: int = 100,
+        types: Tuple[str, ...] = ("dataset",),
+    ) -> Iterator[Dict[str, str]]:
+        """Iterate over the objects hosted, most recent first.
+
+        The search is sorted by date, and the iteration stops at the first
+        object updated before `since`, so that only the first pages are
+        requested when few objects changed. The objects updated at `since`
+        exactly are included, since other objects may have been updated
+        within the same second. The objects without an update or
+        publication time are skipped.
+
+        Args:
+            since (Optional[str]): ISO 8601 time of the last update already
+                known (compared with `get_item_updated_at` of the search
+                items), `None` iterates over all the objects
+            per_page (int): number of objects requested per page
+            types (Tuple[str, ...]): types of the objects searched
+
+        Returns:
+            Iterator[Dict[str, str]]: search items of the objects updated
+                since `since`
+        """
+        url = urljoin(self.base_url, "search/")
+        start = 0
+        while True:
+            payload = {
+                "q": "*",
+                "type": tuple(types),
+                "sort": "date",
+                "order": "desc",
+                "start": start,
+                "per_page": per_page,
+            }
+            items = self._get_json(url, payload)["data"]["items"]
+            for item in items:
+                if (updated_at := get_item_updated_at(item)) is None:
+                    continue
+                if since is not None and updated_at < since:
+                    return
+                yield item
+            if len(items) < per_page:
+                return
+            start += per_page
+
+    def global_search(
+        self,
+        query: str,
+        page: int = 1,
+        per_page: int = 10,
+        types: Optional[Iterable[str]] = None,
+    ) -> Dict[str, str]:
         """global search on dataverse
         execute the search query on the dataverse
 
+        The query and types are normalized (see `normalize_search`), and the
+        responses are cached under the normalized parameters.
+
         Args:
             query (str): search query to execute
+            page (int): number of the page of results, from 1
+            per_page (int): number of results per page (the dataverse allows
+                up to 1000)
+            types (Optional[Iterable[str]]): types of the objects searched
+                (`dataverse`, `dataset` or `file`), all of them by default
 
         Returns:
             Dict[str, str]: response compatible with global search datasource response
 
+        """
+        query, types = normalize_search(query, types)
+        key = f"search:{query}:{page}:{per_page}:{','.join(types)}"
+        if (
+            self.search_cache is not None
+            and (response := self.search_cache.get(key)) is not None
+        ):
+            return response
+        return self._flight.do(
+            key, self._fetch_global_search, key, query, page, per_page, types
+        )
+
+    def _fetch_global_search(
+        self, key: str, query: str, page: int, per_page: int, types: Tuple[str, ...]
+    ) -> Dict[str, str]:
+        """Query a page of search results, and cache its conversion under `key`.
+
+        This is a helper method for `global_search`, with normalized
+        parameters.
         """
         url = urljoin(self.base_url, "search/")
-        json_payload = self._execute_query(url, {"q": query}).json()
+        payload = {"q": query, "start": (page - 1) * per_page, "per_page": per_page}
+        if types:
+            payload["type"] = types
+        json_payload = codec.loads(self._execute_query(url, payload).content)
         response = convert_to_global_search_response(json_payload, self.base_url)
+        if self.search_cache is not None:
+            self.search_cache.set(key, response)
         return response
@@ -0,0 +1,157 @@
+"""Persistent store of the DCAT descriptions of the datasets of a dataverse.
+
+The N-Triples of each dataset are stored in an SQLite database, with the
+version they describe, and kept up to date by the incremental sync
+(`dataverse-sync STATE --dcat-store STORE`). The blank node labels of a
+dataset are derived from its persistent URL, hence the descriptions of
+several datasets can be concatenated into a catalogue.
+
+The datasets are numbered in the order they were stored, an update moving a
+dataset to the end. A page of the catalogue is read from the position
+after the last dataset of the previous page, so that reading a page does
+not depend on the size of the catalogue, and no dataset is missed by a
+client paging through the catalogue while it is updated.
+"""
+import io
+import sqlite3
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    uri TEXT NOT NULL,
+    version TEXT NOT NULL,
+    dcat BLOB NOT NULL
+);
+"""
+
+
+class DcatStore:
+    """N-Triples of the datasets, by persistent ID and version.
+
+    The store can be read by several threads while another process updates
+    it.
+    """
+
+    def __init__(self, path: str):
+        """Open the store, creating it if needed.
+
+        Args:
+            path (str): path of the SQLite database
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread to the database."""
+        if (connection := getattr(self._local, "connection", None)) is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        """Close the connection of the current thread."""
+        if (connection := getattr(self._local, "connection", None)) is not None:
+            connection.close()
+            self._local.connection = None
+
+    def put(self, dataset_id: str, uri: str, version: str, dcat: bytes):
+        """Store the DCAT description of a dataset, replacing the previous one.
+
+        Args:
+            dataset_id (str): persistent ID of the dataset
+            uri (str): URI of the dataset, the subject of its description
+                (its persistent URL)
+            version (str): version of the dataset (see `get_dataset_version`)
+            dcat (bytes): N-Triples description of the dataset
+        """
+        with self._connection() as connection:
+            connection.execute("DELETE FROM datasets WHERE id = ?", (dataset_id,))
+            connection.execute(
+                "INSERT INTO datasets (id, uri, version, dcat) VALUES (?, ?, ?, ?)",
+                (dataset_id, uri, version, dcat),
+            )
+
+    def get(self, dataset_id: str, version: str) -> Optional[bytes]:
+        """Get the DCAT description of a version of a dataset.
+
+        Args:
+            dataset_id (str): persistent ID of the dataset
+            version (str): version of the dataset
+
+        Returns:
+            Optional[bytes]: the N-Triples description, `None` if the store
+                does not have this version
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT dcat FROM datasets WHERE id = ? AND version = ?",
+                (dataset_id, version),
+            )
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    def delete(self, dataset_id: str):
+        """Remove a dataset from the store, if present."""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM datasets WHERE id = ?", (dataset_id,))
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM datasets").fetchone()[0]
+
+    def page(self, after: int = 0, limit: int = 100) -> List[Tuple[int, str, bytes]]:
+        """Read a page of the datasets, in the order they were stored.
+
+        Args:
+            after (int): position of the last dataset of the previous page,
+                `0` for the first page
+            limit (int): maximum number of datasets in the page
+
+        Returns:
+            List[Tuple[int, str, bytes]]: position, URI and N-Triples
+                description of each dataset of the page
+        """
+        return (
+            self._connection()
+            .execute(
+                "SELECT position, uri, dcat FROM datasets WHERE position > ? "
+                "ORDER BY position LIMIT ?",
+                (after, limit),
+            )
+            .fetchall()
+        )
+
+
+def catalog_triples(
+    catalog_uri: str, page: List[Tuple[int, str, bytes]]
+) -> Iterator[bytes]:
+    """N-Triples of a page of a `dcat:Catalog`, chunk by chunk.
+
+    Args:
+        catalog_uri (str): URI of the catalogue
+        page (List[Tuple[int, str, bytes]]): page of the store (see
+            `DcatStore.page`)
+
+    Returns:
+        Iterator[bytes]: the catalogue triples, then the description of each
+            dataset
+    """
+    from rdflib import DCAT, RDF, URIRef
+
+    from dataverse_query.streaming import TripleWriter
+
+    catalog = URIRef(catalog_uri)
+    stream = io.BytesIO()
+    writer = TripleWriter(stream)
+    writer.write([(catalog, RDF.type, DCAT.Catalog)])
+    writer.write((catalog, DCAT.dataset, URIRef(uri)) for _, uri, _ in page)
+    yield stream.getvalue()
+    for _, _, dcat in page:
+        yield dcat
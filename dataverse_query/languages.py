@@ -0,0 +1,273 @@
+"""Resolution of the language names of Dataverse to `id.loc.gov` URIs.
+
+Every English name, synonym, Dataverse alias and ISO 639 code of the
+languages of ISO 639-1 is indexed once (case-insensitively), so that
+resolving a language takes a single dictionary lookup.
+"""
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from importlib.metadata import version
+from typing import Optional
+
+from rdflib import URIRef
+
+# - Dataverse theoretically conforms to ISO 639-1, but actually, not all
+#   language names provided belong to the "All English Names" column for
+#   languages represented by ISO 639-1. For example `Greek (Modern)`
+#   from he Dataverse is 'Modern Greek (1453-)' on ISO 639-1.
+#   See https://github.com/IQSS/dataverse/blob/
+#   9161cd6c5d9665b2a7b8c14b8e726a6712093ee0/scripts/api/data/
+#   metadatablocks/citation.tsv
+
+# - Moreover, the `pycountry` library only accepts one of the official
+#   names from https://www.loc.gov/standards/iso639-2/php/English_list.php.
+#   Dataverse may refer to the language with a different official name.
+
+# - Finally `pycountry` uses the underlying OS library, so one should
+#   not trust that the same official name will be associated to the same
+#   language across all operating systems.
+
+# Therefore, it makes sense to create lists of synonyms to mitigate the
+# above problems, and to resolve the names with an index built from the
+# database bundled with `pycountry` in a fixed order (which can be persisted).
+
+# All ISO 639-1 official names for languages with more than one official
+# name. As all synonyms have the same importance, they are specified as sets.
+ISO_SYNONYMS = {
+    frozenset({"Castillian", "Spanish"}),
+    frozenset({"Catalan", "Valencian"}),
+    frozenset({"Chichewa", "Chewa", "Nyanja"}),
+    frozenset({"Zhuang", "Chuang"}),
+    frozenset(
+        {
+            "Church Slavic",
+            "Old Slavonic",
+            "Church Slavonic",
+            "Old Bulgarian",
+            "Old Church Slavonic",
+        }
+    ),
+    frozenset({"Divehi", "Dhivehi", "Maldivian"}),
+    frozenset({"Dutch", "Flemish"}),
+    frozenset({"Gaelic", "Scottish Gaelic"}),
+    frozenset({"Kikuyu", "Gikuyu"}),
+    frozenset({"Kalaallisut", "Greenlandic"}),
+    frozenset({"Haitian", "Haitian Creole"}),
+    frozenset({"Kuanyama", "Kwanyama"}),
+    frozenset({"Kirghiz", "Kyrgyz"}),
+    frozenset({"Limburgan", "Limburger", "Limburgish"}),
+    frozenset({"Romanian", "Moldavian", "Moldovan"}),
+    frozenset({"Navajo", "Navaho"}),
+    frozenset({"Ndebele, North", "North Ndebele"}),
+    frozenset({"Ndebele, South", "South Ndebele"}),
+    frozenset({"Norwegian Nynorsk", "Nynorsk, Norwegian"}),
+    frozenset({"Sichuan Yi", "Nuosu"}),
+    frozenset({"Interlingue", "Occidental"}),
+    frozenset({"Ossetian", "Ossetic"}),
+    frozenset({"Panjabi", "Punjabi"}),
+    frozenset({"Pushto", "Pashto"}),
+    frozenset({"Sinhala", "Sinhalese"}),
+    frozenset({"Uighur", "Uyghur"}),
+}
+
+# Synonyms for Dataverse non-official names, format: Dict[str, str],
+# {'dataverse_name': 'one_of_the_official_names'}.
+DATAVERSE_SYNONYMS = {
+    "Bangla": "Bengali",
+    "Fula": "Fulah",
+    "Greek (Modern)": "Modern Greek (1453-)",
+    "Pulaar": "Fulah",
+    "Pular": "Fulah",
+    "Letzeburgesch": "Luxembourgish",
+    "Persian (Farsi)": "Persian",
+    "Sanskrit (Saṁskṛta)": "Sanskrit",
+    "Tibetan Standard": "Tibetan",
+    "Tibetan, Central": "Tibetan",
+}
+
+
+# Values of Dataverse for languages without linguistic content.
+NO_LINGUISTIC_CONTENT = ("No linguistic content", "Not applicable")
+
+# Environment variable with the path of the file where the index is persisted.
+INDEX_FILE_VARIABLE = "DATAVERSE_LANGUAGE_INDEX"
+
+
+def language_uri(code: str) -> str:
+    """URI of a language at `id.loc.gov`.
+
+    See https://www.w3.org/TR/vocab-dcat-2/#Property:language.
+
+    Args:
+        code: ISO 639-1 (two letters) or ISO 639-2 (three letters) code.
+
+    Returns:
+        The URI of the language.
+    """
+    return f"http://id.loc.gov/vocabulary/iso639-{1 if len(code) <= 2 else 2}/{code}"
+
+
+def build_language_index() -> dict[str, str]:
+    """Build the index of the languages of ISO 639-1.
+
+    Earlier sources take precedence over later ones: official names, ISO
+    synonyms, Dataverse aliases, ISO codes and finally inverted and common
+    names. A two-letter code is defined for every language of ISO 639-1,
+    whereas the three-letter code `zxx` is used for the values without
+    linguistic content.
+
+    Returns:
+        Lower case names and codes of the languages, mapped to their URIs.
+    """
+    import pycountry
+
+    index = {name.lower(): language_uri("zxx") for name in NO_LINGUISTIC_CONTENT}
+
+    # Like `pycountry`, the first language with a given name wins.
+    names = dict()
+    for language in pycountry.languages:
+        names.setdefault(language.name.lower(), language)
+    for name, language in names.items():
+        if hasattr(language, "alpha_2"):
+            index.setdefault(name, language_uri(language.alpha_2))
+
+    for name_set in ISO_SYNONYMS:
+        for name in sorted(name_set):
+            if (uri := index.get(name.lower())) is not None:
+                for synonym in name_set:
+                    index.setdefault(synonym.lower(), uri)
+                break
+    for alias, name in DATAVERSE_SYNONYMS.items():
+        if (uri := index.get(name.lower())) is not None:
+            index.setdefault(alias.lower(), uri)
+
+    languages = [
+        language for language in pycountry.languages if hasattr(language, "alpha_2")
+    ]
+    for language in languages:
+        uri = language_uri(language.alpha_2)
+        for code in ("alpha_2", "alpha_3", "bibliographic"):
+            if hasattr(language, code):
+                index.setdefault(getattr(language, code).lower(), uri)
+    for language in languages:
+        uri = language_uri(language.alpha_2)
+        for name in ("inverted_name", "common_name"):
+            if hasattr(language, name):
+                index.setdefault(getattr(language, name).lower(), uri)
+    return index
+
+
+def synonyms_digest() -> str:
+    """Digest of the tables of synonyms the index is built from.
+
+    Returns:
+        SHA-1 of `ISO_SYNONYMS`, `DATAVERSE_SYNONYMS` and
+        `NO_LINGUISTIC_CONTENT`, in a canonical order.
+    """
+    tables = [
+        sorted(sorted(name_set) for name_set in ISO_SYNONYMS),
+        sorted(DATAVERSE_SYNONYMS.items()),
+        list(NO_LINGUISTIC_CONTENT),
+    ]
+    return hashlib.sha1(json.dumps(tables).encode()).hexdigest()
+
+
+def save_language_index(index: dict[str, str], path: str):
+    """Persist the index of the languages to a JSON file, atomically.
+
+    Args:
+        index: The index of the languages.
+        path: Path of the file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".tmp", delete=False
+    ) as file:
+        contents = {
+            "pycountry": version("pycountry"),
+            "synonyms": synonyms_digest(),
+            "index": index,
+        }
+        json.dump(contents, file)
+    os.replace(file.name, path)
+
+
+def load_language_index(path: str) -> Optional[dict[str, str]]:
+    """Load the index of the languages persisted to a JSON file.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        The index, or `None` if the file does not exist, cannot be read, is
+        malformed or was built with another version of `pycountry` or other
+        synonyms.
+    """
+    try:
+        with open(path) as file:
+            contents = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(contents, dict)
+        or not isinstance(contents.get("index"), dict)
+        or contents.get("pycountry") != version("pycountry")
+        or contents.get("synonyms") != synonyms_digest()
+    ):
+        return None
+    return contents["index"]
+
+
+_language_index = None
+_language_index_lock = threading.Lock()
+
+
+def get_language_index() -> dict[str, str]:
+    """The index of the languages, built on first use.
+
+    When the environment variable `DATAVERSE_LANGUAGE_INDEX` is set, the
+    index is loaded from the file it points to, or built and persisted there
+    (e.g. so that worker processes do not build it again). Concurrent first
+    uses wait for a single build.
+
+    Returns:
+        Lower case names and codes of the languages, mapped to their URIs.
+    """
+    global _language_index
+    if _language_index is None:
+        with _language_index_lock:
+            if _language_index is None:
+                path = os.environ.get(INDEX_FILE_VARIABLE)
+                index = load_language_index(path) if path else None
+                if index is None:
+                    index = build_language_index()
+                    if path:
+                        save_language_index(index, path)
+                _language_index = index
+    return _language_index
+
+
+@functools.lru_cache(maxsize=1024)
+def resolve_language(language: str) -> URIRef:
+    """Resolve a language of a dataset to its URI.
+
+    Args:
+        language: Name or code of the language. It may also hold several
+            comma separated names of the same language, the first known one
+            is used.
+
+    Raises:
+        ValueError: If the language is not known.
+
+    Returns:
+        The URI of the language at `id.loc.gov`.
+    """
+    index = get_language_index()
+    for name in (language, *language.split(",")):
+        if (uri := index.get(name.strip().lower())) is not None:
+            return URIRef(uri)
+    raise ValueError(f"Unsupported language {language}.")
@@ -0,0 +1,303 @@
+"""Resolution of the licence of a dataset to a URI.
+
+The terms of use of a dataset are free HTML, which usually links to the
+licence. Looking for an IRI with the RFC 3987 regular expression right away
+takes quadratic time on long texts (its lookahead scans the rest of every
+whitespace-free run), hence a cheap, bounded pattern first finds where an IRI
+may start, and the RFC 3987 expression only validates from there.
+"""
+import functools
+import re
+import threading
+from html.parser import HTMLParser
+from typing import Optional, Union
+
+from rdflib import XSD, Literal, URIRef
+
+# RFC3987 regex (to match IRIs) (MIT Licensed)
+#  https://github.com/aas-core-works/abnf-to-regexp/blob
+#  /412da7ae24ec6ea20e75767e08af3b05176053f3/test_data/single-regexp/rfc3987
+#  /expected.out
+"""MIT License
+
+Copyright (c) 2021 Marko Ristin, Nico Braunisch, Robert Lehmann
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE."""
+rfc3987 = (
+    r"[a-zA-Z][a-zA-Z0-9+\-.]*:(//(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
+    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
+    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
+    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
+    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
+    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:])*@)?"
+    r"(\[((([0-9A-Fa-f]{1,4}:){6,6}"
+    r"([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
+    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
+    r"|::([0-9A-Fa-f]{1,4}:){5,5}([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
+    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
+    r"|([0-9A-Fa-f]{1,4})?::([0-9A-Fa-f]{1,4}:){4,4}"
+    r"([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}|([0-9]|[1-9][0-9]|1[0-9]{2,2}"
+    r"|2[0-4][0-9]|25[0-5])\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]"
+    r"|25[0-5])\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
+    r"|(([0-9A-Fa-f]{1,4}:)?[0-9A-Fa-f]{1,4})?::([0-9A-Fa-f]{1,4}:)"
+    r"{3,3}([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
+    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
+    r"|(([0-9A-Fa-f]{1,4}:){2}[0-9A-Fa-f]{1,4})?::"
+    r"([0-9A-Fa-f]{1,4}:){2,2}([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}|"
+    r"([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
+    r"|(([0-9A-Fa-f]{1,4}:){3}[0-9A-Fa-f]{1,4})?::"
+    r"[0-9A-Fa-f]{1,4}:([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
+    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
+    r"|(([0-9A-Fa-f]{1,4}:){4}[0-9A-Fa-f]{1,4})?::"
+    r"([0-9A-Fa-f]{1,4}:[0-9A-Fa-f]{1,4}"
+    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5]))"
+    r"|(([0-9A-Fa-f]{1,4}:){5}[0-9A-Fa-f]{1,4})?::"
+    r"[0-9A-Fa-f]{1,4}|(([0-9A-Fa-f]{1,4}:){6}[0-9A-Fa-f]{1,4})?::)"
+    r"|[vV][0-9A-Fa-f]{1,}\.[a-zA-Z0-9\-._~!$&'()*+,;=:]{1,})\]"
+    r"|([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"\.([0-9]|[1-9][0-9]|1[0-9]{2,2}|2[0-4][0-9]|25[0-5])"
+    r"|([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
+    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
+    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
+    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
+    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
+    r"|[!$&'()*+,;=])*)(:[0-9]*)?(/([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
+    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
+    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
+    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
+    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
+    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])*)*"
+    r"|/(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
+    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
+    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
+    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
+    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
+    r"|[!$&'()*+,;=:@]){1,}(/([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
+    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
+    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
+    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
+    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
+    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])*)*)?"
+    r"|([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
+    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
+    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
+    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
+    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
+    r"|[!$&'()*+,;=:@]){1,}(/([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
+    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
+    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
+    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
+    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
+    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])*)*"
+    r"|([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
+    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
+    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
+    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
+    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
+    r"|[!$&'()*+,;=:@]){0,0})(\?(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900"
+    r"-\ufdcf\ufdf0-\uffef\u10000-\u1fffd\u20000-\u2fffd\u30000"
+    r"-\u3fffd\u40000-\u4fffd\u50000-\u5fffd\u60000-\u6fffd\u70000"
+    r"-\u7fffd\u80000-\u8fffd\u90000-\u9fffd\ua0000-\uafffd\ub0000"
+    r"-\ubfffd\uc0000-\ucfffd\ud0000-\udfffd\ue1000-\uefffd]"
+    r"|%[0-9A-Fa-f][0-9A-Fa-f]|[!$&'()*+,;=:@])|[\ue000-\uf8ff\uf0000"
+    r"-\uffffd\u100000-\u10fffd/?])*)?"
+    r"(\#(([a-zA-Z0-9\-._~\xa0-\ud7ff\uf900-\ufdcf\ufdf0-\uffef\u10000"
+    r"-\u1fffd\u20000-\u2fffd\u30000-\u3fffd\u40000-\u4fffd\u50000"
+    r"-\u5fffd\u60000-\u6fffd\u70000-\u7fffd\u80000-\u8fffd\u90000"
+    r"-\u9fffd\ua0000-\uafffd\ub0000-\ubfffd\uc0000-\ucfffd\ud0000"
+    r"-\udfffd\ue1000-\uefffd]|%[0-9A-Fa-f][0-9A-Fa-f]"
+    r"|[!$&'()*+,;=:@])|[/?])*)?"
+)
+# Modification: do not match empty string after ':'.
+rfc3987 = r"(?=[^\s]*:[^\s])" + rfc3987
+_rfc3987_regex = None
+_rfc3987_lock = threading.Lock()
+
+
+def get_rfc3987_regex() -> re.Pattern:
+    """The RFC 3987 regular expression, compiled on first use.
+
+    Compiling it takes most of a second, which would otherwise be paid by
+    every process importing this module, whether it converts datasets or not.
+    Concurrent first uses wait for a single compilation.
+    """
+    global _rfc3987_regex
+    if _rfc3987_regex is None:
+        with _rfc3987_lock:
+            if _rfc3987_regex is None:
+                _rfc3987_regex = re.compile(rfc3987, flags=re.IGNORECASE | re.UNICODE)
+    return _rfc3987_regex
+
+
+# Convert HTML to text.
+class HTMLText(HTMLParser):
+    """Sublcass of `HTMLParser` meant to convert HTML into plain text."""
+
+    text: str = ""
+
+    def handle_data(self, data: str) -> None:
+        """Saves the text data from the HTML.
+
+        Overrides the method of the parent class.
+        """
+        self.text += data
+
+
+def html_to_text(data: str) -> str:
+    """Converts HTML into plain text."""
+    converter = HTMLText()
+    converter.feed(data)
+    return converter.text
+
+
+# Maximum lengths of the scheme and of the whole IRI looked for.
+MAX_SCHEME_LENGTH = 32
+MAX_IRI_LENGTH = 2048
+
+# Where an IRI may start: a scheme, a colon and something else than a space.
+_CANDIDATE = re.compile(
+    rf"[a-zA-Z][a-zA-Z0-9+\-.]{{0,{MAX_SCHEME_LENGTH - 1}}}:[^\s]", flags=re.UNICODE
+)
+
+# Canonical URIs of well-known licences.
+CREATIVE_COMMONS_ZERO = "https://creativecommons.org/publicdomain/zero/1.0/"
+CANONICAL_LICENSES = {
+    "CC0": CREATIVE_COMMONS_ZERO,
+    "CC0 1.0": CREATIVE_COMMONS_ZERO,
+    "PUBLIC DOMAIN": "https://creativecommons.org/publicdomain/mark/1.0/",
+    **{
+        f"CC {variant.upper().replace('-', ' ')} {version}": (
+            f"https://creativecommons.org/licenses/{variant}/{version}/"
+        )
+        for variant in ("by", "by-sa", "by-nd", "by-nc", "by-nc-sa", "by-nc-nd")
+        for version in ("2.0", "2.5", "3.0", "4.0")
+    },
+}
+_CANONICAL_URIS = {
+    re.sub(r"^https://|/$", "", uri): uri for uri in CANONICAL_LICENSES.values()
+}
+
+
+def find_iri(text: str) -> Optional[str]:
+    """Find the first IRI in a text.
+
+    Args:
+        text: The text to look into.
+
+    Returns:
+        The first IRI of the text (at most `MAX_IRI_LENGTH` characters long),
+        if any.
+    """
+    for candidate in _CANDIDATE.finditer(text):
+        start = candidate.start()
+        if match := get_rfc3987_regex().match(text, start, start + MAX_IRI_LENGTH):
+            return match[0]
+    return None
+
+
+def canonical_license_uri(uri: str) -> str:
+    """The canonical form of the URI of a well-known licence.
+
+    Args:
+        uri: URI of a licence.
+
+    Returns:
+        The canonical URI of the licence, or the URI given if the licence is
+        not known.
+    """
+    key = re.sub(
+        r"^https?://(www\.)?|/(legalcode(\.[a-z\-]+)?|deed\.[a-z\-]+)?$",
+        "",
+        uri.lower(),
+    )
+    return _CANONICAL_URIS.get(key, uri)
+
+
+@functools.lru_cache(maxsize=1024)
+def resolve_terms_of_use(terms_of_use: str) -> Literal:
+    """Resolve the terms of use of a dataset.
+
+    The results are memoized, since many datasets of a dataverse share the
+    same terms of use.
+
+    Args:
+        terms_of_use: The terms of use of the dataset (HTML).
+
+    Returns:
+        The (canonical) URI found in the terms of use, or their plain text if
+        none is found.
+    """
+    if (iri := find_iri(terms_of_use)) is not None:
+        return Literal(canonical_license_uri(iri), datatype=XSD.anyURI)
+    return Literal(html_to_text(terms_of_use), datatype=XSD.string)
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_license_name(name: str) -> Optional[URIRef]:
+    """Resolve the name of a licence, see `resolve_license`."""
+    key = re.sub(r"[\s\-_]+", " ", name.upper()).strip()
+    key = re.sub(r" (INTERNATIONAL|UNIVERSAL|UNPORTED|LICENSE)\b", "", key)
+    if key in {"", "NONE"}:
+        return None
+    if key in CANONICAL_LICENSES:
+        return URIRef(CANONICAL_LICENSES[key])
+    if (iri := find_iri(name)) is not None:
+        return URIRef(canonical_license_uri(iri))
+    return None
+
+
+def resolve_license(license: Union[str, dict, None]) -> Optional[URIRef]:
+    """Resolve the licence of a dataset to a URI.
+
+    Args:
+        license: The `license` of the version of the dataset: either a name
+            (e.g. `CC0`, `NONE`) or, since Dataverse 5.10, an object with the
+            `name` and `uri` of the licence.
+
+    Returns:
+        The canonical URI of the licence, if it is known.
+    """
+    if isinstance(license, dict):
+        if uri := license.get("uri"):
+            return URIRef(canonical_license_uri(uri))
+        license = license.get("name")
+    if not license:
+        return None
+    return _resolve_license_name(license)
@@ -0,0 +1,310 @@
+"""Metrics of the app, exposed in the Prometheus text format.
+
+A minimal, dependency-free subset of the Prometheus client: counters, gauges
+and histograms with labels, kept in the memory of the process. Recording a
+value takes a lock and a few additions, so that the instrumentation can stay
+on in production. Metrics are registered in `REGISTRY` when created, and
+`REGISTRY.render()` gives the body of a `/metrics` response. The names of
+counters end with `_total`.
+
+Each process has its own metrics: with several server workers, each worker
+reports the requests it served. The observations of the histograms made in
+another process (e.g. a conversion worker) can be collected there with
+`recording` and replayed in the process exposing the metrics with `replay`.
+"""
+import abc
+import bisect
+import contextlib
+import math
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+# Content type of the Prometheus text format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets of the histograms of durations (seconds) and of sizes (bytes).
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = tuple(4**i for i in range(4, 13))
+
+Sample = tuple[str, dict[str, str], float]
+# Name of a histogram, observed value and labels.
+Observation = tuple[str, float, dict[str, str]]
+
+# Observations collected by `recording` in the current thread, if any.
+_recording = threading.local()
+
+
+class Registry:
+    """Set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = dict()
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric"):
+        """Add a metric to the registry.
+
+        Raises:
+            ValueError: If a metric with the same name is registered already.
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is registered already.")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional["Metric"]:
+        """The metric with a given name, `None` if there is none."""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All the metrics, in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                labels = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(
+                    f"{name}{{{labels}}} {_format(value)}"
+                    if labels
+                    else f"{name} {_format(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric(abc.ABC):
+    """Metric with a value per combination of label values."""
+
+    type: str
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        """Create a metric and register it.
+
+        Args:
+            name: Name of the metric.
+            documentation: Description of the metric.
+            labelnames: Names of the labels of the metric.
+            registry: Registry of the metric, `None` does not register it.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = dict()
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        """Values of the labels, in the order of `labelnames`."""
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abc.abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """Samples of the metric: name, labels and value."""
+
+
+class Counter(Metric):
+    """Value that only goes up."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(Metric):
+    """Value that goes up and down."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextlib.contextmanager
+    def track_in_progress(self, **labels):
+        """Context manager counting the executions of a block in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values, counted in buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        """Create a histogram and register it.
+
+        Args:
+            name: Name of the metric.
+            documentation: Description of the metric.
+            labelnames: Names of the labels of the metric.
+            buckets: Upper bounds of the buckets, in increasing order (the
+                `+Inf` bucket is added).
+            registry: Registry of the metric, `None` does not register it.
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        if (observations := getattr(_recording, "observations", None)) is not None:
+            observations.append((self.name, value, labels))
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if (state := self._values.get(key)) is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Context manager observing the seconds a block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = [
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items()
+            ]
+        for key, counts, total in values:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {
+                    **labels,
+                    "le": _format(bound),
+                }, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CallbackMetric(Metric):
+    """Metric whose values are read from a function when rendered.
+
+    Meant for values kept elsewhere, e.g. the counters of a cache.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        type: str,
+        function: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: tuple[str, ...] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        """Create the metric and register it.
+
+        Args:
+            name: Name of the metric.
+            documentation: Description of the metric.
+            type: `counter` or `gauge`.
+            function: Function returning the values of the metric, by values
+                of the labels.
+            labelnames: Names of the labels of the metric.
+            registry: Registry of the metric, `None` does not register it.
+        """
+        self.type = type
+        self.function = function
+        super().__init__(name, documentation, labelnames, registry)
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in self.function().items():
+            yield self.name, self._labels(key), value
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[list[Observation]]:
+    """Context manager collecting the observations of the histograms.
+
+    The observations made by the current thread within the block are
+    appended to the list it yields instead of being recorded, so that they
+    can be sent to another process and recorded there by `replay`.
+    """
+    previous = getattr(_recording, "observations", None)
+    _recording.observations = observations = []
+    try:
+        yield observations
+    finally:
+        _recording.observations = previous
+
+
+def replay(observations: list[Observation], registry: Registry = REGISTRY):
+    """Record observations collected by `recording`.
+
+    The observations of histograms not registered in `registry` are dropped.
+    """
+    for name, value, labels in observations:
+        if isinstance(histogram := registry.get(name), Histogram):
+            histogram.observe(value, **labels)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value or a documentation string."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    """Format a sample value."""
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,377 @@
+"""Local full-text index of the catalogue, answering global searches offline.
+
+The search items of the dataverse (`search/` API) are indexed in an SQLite
+database with FTS5, and searched with BM25 ranking: the names weigh most,
+then the keywords and subjects, the authors and the descriptions. The index
+stores the global search result of each item (see
+`utils.convert_to_global_search_response`), so that a search is answered
+without querying the dataverse.
+
+The index is built by the `dataverse-index` command:
+    dataverse-index rebuild INDEX [--url URL] [--types dataverse,dataset]
+    dataverse-index update INDEX [--url URL]
+
+`rebuild` harvests all the objects of the given types, `update` only the
+ones updated since the most recent object indexed. `update` does not see the
+objects deleted from the dataverse, which stay in the index until the next
+`rebuild` (or are removed by `dataverse-sync --search-index INDEX`).
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dataverse_query import codec
+from dataverse_query.metrics import Counter
+from dataverse_query.utils import (
+    SEARCH_TYPES,
+    convert_to_global_search_response,
+    get_item_updated_at,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_updated_at ON items (updated_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    name, keywords, authors, description,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS properties (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# Weights of the columns of `items_fts` in the BM25 ranking.
+COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+SEARCHES = Counter(
+    "dataverse_search_index_searches_total",
+    "Global searches looked up in the local index, by result (hit, or miss "
+    "answered by the dataverse).",
+    ("result",),
+)
+
+
+def item_id(item: Dict[str, str]) -> str:
+    """Identifier of a search item: its persistent ID, or its URL."""
+    return (
+        item.get("global_id")
+        or item.get("file_persistent_id")
+        or item.get("identifier")
+        or item["url"]
+    )
+
+
+def fts_query(query: str) -> Optional[str]:
+    """FTS5 query matching the objects containing all the words of a query.
+
+    The last word of a query being typed is often incomplete, hence the
+    words are matched as prefixes.
+
+    Args:
+        query (str): normalized search query
+
+    Returns:
+        Optional[str]: the FTS5 query, `None` if the query has no words
+    """
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words) if words else None
+
+
+class SearchIndex:
+    """Full-text index of the search items of a dataverse.
+
+    The index can be searched by several threads while another process
+    updates it.
+    """
+
+    def __init__(self, path: str, base_url: str = ""):
+        """Open the index, creating it if needed.
+
+        Args:
+            path (str): path of the SQLite database
+            base_url (str): base url of the API of the dataverse, to link
+                the results to
+        """
+        self.path = path
+        self.base_url = base_url
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread to the database."""
+        if (connection := getattr(self._local, "connection", None)) is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        """Close the connection of the current thread."""
+        if (connection := getattr(self._local, "connection", None)) is not None:
+            connection.close()
+            self._local.connection = None
+
+    def get_property(self, key: str) -> Optional[str]:
+        """Get a property of the index (e.g. the types indexed)."""
+        row = (
+            self._connection()
+            .execute("SELECT value FROM properties WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    @property
+    def types(self) -> Tuple[str, ...]:
+        """Types of the objects indexed."""
+        value = self.get_property("types")
+        return tuple(value.split(",")) if value else ()
+
+    def last_updated(self) -> Optional[str]:
+        """Most recent update time of the objects indexed."""
+        return (
+            self._connection().execute("SELECT max(updated_at) FROM items").fetchone()
+        )[0]
+
+    def add(self, items: Iterable[Dict[str, str]]) -> int:
+        """Index search items, replacing the previous version of each.
+
+        Args:
+            items (Iterable[Dict[str, str]]): items of the search API
+
+        Returns:
+            int: number of items indexed
+        """
+        with self._connection() as connection:
+            return self._add(connection, items)
+
+    def rebuild(self, items: Iterable[Dict[str, str]], types: Tuple[str, ...]) -> int:
+        """Replace the content of the index, in a single transaction.
+
+        Args:
+            items (Iterable[Dict[str, str]]): items of the search API, of
+                all the objects of the given types
+            types (Tuple[str, ...]): types of the objects indexed
+
+        Returns:
+            int: number of items indexed
+        """
+        with self._connection() as connection:
+            connection.execute("DELETE FROM items_fts")
+            connection.execute("DELETE FROM items")
+            count = self._add(connection, items)
+            connection.execute(
+                "INSERT OR REPLACE INTO properties VALUES ('types', ?)",
+                (",".join(sorted(types)),),
+            )
+        return count
+
+    def _add(
+        self, connection: sqlite3.Connection, items: Iterable[Dict[str, str]]
+    ) -> int:
+        count = 0
+        for item in items:
+            self._remove(connection, item_id(item))
+            result = convert_to_global_search_response(
+                {"data": {"items": [item]}}, self.base_url
+            )[0]
+            rowid = connection.execute(
+                "INSERT INTO items (id, type, updated_at, result) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    item_id(item),
+                    item.get("type", ""),
+                    get_item_updated_at(item) or "",
+                    codec.dumps(result).decode(),
+                ),
+            ).lastrowid
+            connection.execute(
+                "INSERT INTO items_fts (rowid, name, keywords, authors, "
+                "description) VALUES (?, ?, ?, ?, ?)",
+                (
+                    rowid,
+                    item.get("name") or "",
+                    " ".join(
+                        (item.get("keywords") or []) + (item.get("subjects") or [])
+                    ),
+                    " ".join(item.get("authors") or []),
+                    item.get("description") or "",
+                ),
+            )
+            count += 1
+        return count
+
+    def remove(self, ids: Iterable[str]):
+        """Remove objects from the index, given their identifiers."""
+        with self._connection() as connection:
+            for id in ids:
+                self._remove(connection, id)
+
+    @staticmethod
+    def _remove(connection: sqlite3.Connection, id: str):
+        row = connection.execute("SELECT rowid FROM items WHERE id = ?", (id,))
+        if (row := row.fetchone()) is not None:
+            connection.execute("DELETE FROM items_fts WHERE rowid = ?", row)
+            connection.execute("DELETE FROM items WHERE rowid = ?", row)
+
+    def clear(self):
+        """Remove all the objects from the index."""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM items_fts")
+            connection.execute("DELETE FROM items")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM items").fetchone()[0]
+
+    def search(
+        self,
+        query: str,
+        page: int = 1,
+        per_page: int = 10,
+        types: Tuple[str, ...] = (),
+    ) -> Optional[List[Dict[str, str]]]:
+        """Search the index, like `DataverseQuery.global_search`.
+
+        Args:
+            query (str): normalized search query (see `normalize_search`),
+                `*` matches all the objects
+            page (int): number of the page of results, from 1
+            per_page (int): number of results per page
+            types (Tuple[str, ...]): normalized types of the objects
+                searched, all the types (`SEARCH_TYPES`) by default
+
+        Returns:
+            Optional[List[Dict[str, str]]]: the page of results, `None` if the
+                index cannot answer (types not all indexed, query without
+                words, or no results), in which case the dataverse should be
+                queried
+        """
+        results = self._search(query, page, per_page, types)
+        SEARCHES.inc(result="miss" if results is None else "hit")
+        return results
+
+    def _search(
+        self, query: str, page: int, per_page: int, types: Tuple[str, ...]
+    ) -> Optional[List[Dict[str, str]]]:
+        # Unless the index holds all the types, it cannot answer a search of
+        #  all of them like the dataverse would.
+        if not set(types or SEARCH_TYPES) <= set(self.types):
+            return None
+        where, parameters = "", []
+        if types:
+            where = f" AND items.type IN ({','.join('?' * len(types))})"
+            parameters = list(types)
+        limit = (per_page, (page - 1) * per_page)
+        if query == "*":
+            rows = self._connection().execute(
+                f"SELECT result FROM items WHERE 1{where} "
+                "ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (*parameters, *limit),
+            )
+        elif (match := fts_query(query)) is not None:
+            weights = ", ".join(map(str, COLUMN_WEIGHTS))
+            rows = self._connection().execute(
+                "SELECT items.result FROM items_fts "
+                "JOIN items ON items.rowid = items_fts.rowid "
+                f"WHERE items_fts MATCH ?{where} "
+                f"ORDER BY bm25(items_fts, {weights}) LIMIT ? OFFSET ?",
+                (match, *parameters, *limit),
+            )
+        else:
+            return None
+        results = [codec.loads(result) for result, in rows]
+        return results or None
+
+
+def rebuild(index: SearchIndex, dq, types: Tuple[str, ...], per_page: int) -> int:
+    """Index all the objects of the given types, from scratch.
+
+    Args:
+        index (SearchIndex): the index
+        dq (DataverseQuery): query object of the dataverse
+        types (Tuple[str, ...]): types of the objects indexed
+        per_page (int): number of objects requested per page
+
+    Returns:
+        int: number of objects indexed
+    """
+    _, items = dq.harvest_datasets(per_page=per_page, types=types)
+    return index.rebuild(items, types)
+
+
+def update(index: SearchIndex, dq, per_page: int) -> int:
+    """Index the objects updated since the most recent one indexed.
+
+    Args:
+        index (SearchIndex): the index
+        dq (DataverseQuery): query object of the dataverse
+        per_page (int): number of objects requested per page
+
+    Returns:
+        int: number of objects indexed
+
+    Raises:
+        ValueError: If the index was never rebuilt.
+    """
+    if not index.types:
+        raise ValueError("The index must be rebuilt before it is updated.")
+    items = dq.iter_recently_updated(index.last_updated(), per_page, index.types)
+    return index.add(items)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the `dataverse-index` command."""
+    from dataverse_query.dataverse_query import DataverseQuery
+
+    parser = argparse.ArgumentParser(
+        description="Build the local search index of a dataverse."
+    )
+    parser.add_argument("command", choices=("rebuild", "update"))
+    parser.add_argument("index", help="Path of the SQLite database of the index.")
+    parser.add_argument(
+        "--url",
+        default=os.environ.get(
+            "DATAVERSE_URL", "https://entrepot.recherche.data.gouv.fr/"
+        ),
+        help="URL of the dataverse (DATAVERSE_URL by default).",
+    )
+    parser.add_argument(
+        "--types",
+        default="dataverse,dataset",
+        help="Comma-separated types of the objects indexed by rebuild.",
+    )
+    parser.add_argument("--per-page", type=int, default=100)
+    args = parser.parse_args(argv)
+    types = tuple(sorted(set(args.types.split(","))))
+    if not set(types) <= set(SEARCH_TYPES):
+        parser.error(f"--types must be among {', '.join(SEARCH_TYPES)}.")
+
+    start = time.monotonic()
+    with DataverseQuery(args.url) as dq:
+        index = SearchIndex(args.index, dq.base_url)
+        if args.command == "rebuild":
+            count = rebuild(index, dq, types, args.per_page)
+        else:
+            try:
+                count = update(index, dq, args.per_page)
+            except ValueError as e:
+                parser.error(str(e))
+    print(
+        f"indexed {count} objects in {time.monotonic() - start:.1f}s, "
+        f"{len(index)} in the index",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Coalescing of concurrent identical calls.
+
+A `SingleFlight` runs a call once for all the threads asking for the same key
+at the same time: the first thread runs it, the others wait for its result
+(or its exception) instead of running it too. Nothing is kept once the call
+returns, the results are cached elsewhere. `AsyncSingleFlight` does the same
+for the coroutines of an event loop.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from dataverse_query.metrics import Counter
+
+SHARED_CALLS = Counter(
+    "dataverse_singleflight_shared_total",
+    "Calls that waited for the result of an identical call in flight instead "
+    "of running, by group.",
+    ("group",),
+)
+
+
+class SingleFlight:
+    """Group of calls coalesced by key."""
+
+    def __init__(self, name: str = "default"):
+        """Initialize the group.
+
+        Args:
+            name (str): name of the group in the metrics
+        """
+        self.name = name
+        self._calls = dict()
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        """Call a function, unless a call with the same key is in flight.
+
+        The threads joining a call in flight get the very same result
+        object, which must therefore not be mutated.
+
+        Args:
+            key (Hashable): key identifying the call
+            function (Callable): function to call
+            args: positional arguments of the function
+            kwargs: keyword arguments of the function
+
+        Returns:
+            Any: the result of the call
+
+        Raises:
+            Exception: The exception raised by the call.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            SHARED_CALLS.inc(group=self.name)
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        """Number of calls in flight."""
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Group of coroutine calls coalesced by key, within each event loop."""
+
+    def __init__(self, name: str = "default"):
+        """Initialize the group.
+
+        Args:
+            name (str): name of the group in the metrics
+        """
+        self.name = name
+        self._calls = dict()
+
+    async def do(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        """Await a coroutine function, unless a call with the same key is in flight.
+
+        Only the calls of the running event loop are joined.
+
+        Args:
+            key (Hashable): key identifying the call
+            function (Callable): coroutine function to call
+            args: positional arguments of the function
+            kwargs: keyword arguments of the function
+
+        Returns:
+            Any: the result of the call
+
+        Raises:
+            Exception: The exception raised by the call.
+        """
+        loop = asyncio.get_running_loop()
+        # The futures belong to a loop, the calls of other loops are apart.
+        call_key = (id(loop), key)
+        if (future := self._calls.get(call_key)) is not None:
+            SHARED_CALLS.inc(group=self.name)
+            # Shielded, so that a cancelled follower does not cancel the call.
+            return await asyncio.shield(future)
+
+        future = self._calls[call_key] = loop.create_future()
+        try:
+            result = await function(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Marks the exception as retrieved, even if no call joined.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[call_key]
+
+    def __len__(self) -> int:
+        """Number of calls in flight."""
+        return len(self._calls)
@@ -0,0 +1,118 @@
+"""Serialization of triples straight to a stream, without an RDFLib graph."""
+import re
+from typing import BinaryIO, Iterable, Optional
+
+from rdflib import DCAT, DCTERMS, FOAF, OWL, RDF, XSD, BNode, Literal, URIRef
+from rdflib.term import Identifier
+
+# Formats that `TripleWriter` can write.
+STREAMING_FORMATS = ("nt", "nquads", "turtle")
+
+# Prefixes used when writing Turtle.
+TURTLE_PREFIXES = {
+    "dcat": str(DCAT),
+    "dcterms": str(DCTERMS),
+    "foaf": str(FOAF),
+    "owl": str(OWL),
+    "pav": "http://pav-ontology.github.io/pav/",
+    "rdf": str(RDF),
+    "vcard": "http://www.w3.org/2006/vcard/ns#",
+    "xsd": str(XSD),
+}
+
+# Local names that can be written as part of a prefixed name as they are.
+_LOCAL_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]*")
+
+# Characters that must be escaped in IRIs and string literals.
+_IRI_ESCAPES = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+_STRING_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"}
+_STRING_ESCAPE = re.compile(r'[\\"\n\r]')
+
+
+class TripleWriter:
+    """Writes triples to a binary stream as soon as they are generated.
+
+    No graph, and thus no index, is built: memory use does not depend on
+    the number of triples. Triples are not deduplicated.
+
+    Blank nodes are labelled by order of first appearance after a prefix,
+    hence writing the same triples twice gives the same bytes, and the
+    output of writers with different prefixes can be concatenated.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        format: str = "nt",
+        bnode_prefix: str = "b",
+        graph: Optional[URIRef] = None,
+    ):
+        """Initialize the writer.
+
+        Args:
+            stream: Binary stream where the triples are written.
+            format: One of `STREAMING_FORMATS`.
+            bnode_prefix: Prefix of the labels of the blank nodes (letters,
+                digits and underscores).
+            graph: Name of the graph of the triples, for N-Quads.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        if format not in STREAMING_FORMATS:
+            raise ValueError(f"Unsupported streaming format {format}.")
+        if format == "nquads" and graph is None:
+            raise ValueError("N-Quads require the name of the graph.")
+        self.stream = stream
+        self.format = format
+        self.bnode_prefix = bnode_prefix
+        self.graph = graph
+        self._bnodes = dict()
+        self._header_written = False
+
+    def write(self, triples: Iterable[tuple[Identifier, Identifier, Identifier]]):
+        """Write triples to the stream.
+
+        Args:
+            triples: The triples to write.
+        """
+        if self.format == "turtle" and not self._header_written:
+            self.stream.write(
+                "".join(
+                    f"@prefix {prefix}: <{namespace}> .\n"
+                    for prefix, namespace in TURTLE_PREFIXES.items()
+                ).encode()
+            )
+        self._header_written = True
+        term = self._term
+        suffix = f" {term(self.graph)} .\n" if self.format == "nquads" else " .\n"
+        write = self.stream.write
+        for s, p, o in triples:
+            write(f"{term(s)} {term(p)} {term(o)}{suffix}".encode())
+
+    def _term(self, node: Identifier) -> str:
+        """Serialization of an RDF term."""
+        if isinstance(node, BNode):
+            label = self._bnodes.get(node)
+            if label is None:
+                label = self._bnodes[node] = f"_:{self.bnode_prefix}{len(self._bnodes)}"
+            return label
+        if isinstance(node, Literal):
+            value = _STRING_ESCAPE.sub(lambda m: _STRING_ESCAPES[m[0]], str(node))
+            if node.language:
+                return f'"{value}"@{node.language}'
+            if node.datatype:
+                return f'"{value}"^^{self._iri(node.datatype)}'
+            return f'"{value}"'
+        return self._iri(node)
+
+    def _iri(self, iri: URIRef) -> str:
+        """Serialization of an IRI, as a prefixed name if possible in Turtle."""
+        if self.format == "turtle":
+            for prefix, namespace in TURTLE_PREFIXES.items():
+                if iri.startswith(namespace) and _LOCAL_NAME.fullmatch(
+                    local_name := iri[len(namespace) :]
+                ):
+                    return f"{prefix}:{local_name}"
+        escaped = _IRI_ESCAPES.sub(lambda m: f"\\u{ord(m[0]):04X}", str(iri))
+        return f"<{escaped}>"
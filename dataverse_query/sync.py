@@ -0,0 +1,477 @@
+"""Incremental synchronization of a local copy of the catalogue of a dataverse.
+
+A sync only fetches and converts the datasets updated since the previous
+one: the search of the dataverse is walked by date, most recent first, down
+to the high-water mark (the most recent update time seen by the previous
+sync). The datasets deleted are detected by comparing the number of datasets
+hosted with the number known, and listed only when they differ; each dataset
+missing from the list is deleted only once the dataverse confirms it is gone.
+When nothing changed, a sync costs two queries to the dataverse whatever the
+size of the catalogue.
+
+The datasets that fail do not hold back the high-water mark, they are
+recorded instead. The ones that failed for a transient reason (e.g. the
+dataverse was unavailable) are retried by the next sync, the ones that
+failed permanently (e.g. a conversion error) only once they are updated.
+
+The state of the sync (version and update time of each dataset, failures,
+high-water mark) is kept in an SQLite database, and the DCAT of the datasets
+updated is handed to `SyncTarget`s, e.g. a directory of files, the DCAT store
+or the local search index:
+    dataverse-sync STATE [--output-dir DIR] [--dcat-store STORE]
+        [--search-index INDEX] [--url URL]
+"""
+import abc
+import argparse
+import logging
+import os
+import pathlib
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from requests import HTTPError
+
+from dataverse_query import codec
+from dataverse_query.conversion import ConversionService
+from dataverse_query.utils import JSON, get_dataset_version
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    id TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    deleted_at TEXT
+);
+CREATE TABLE IF NOT EXISTS failures (
+    id TEXT PRIMARY KEY,
+    item TEXT NOT NULL,
+    permanent INTEGER NOT NULL,
+    error TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS properties (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class SyncTarget(abc.ABC):
+    """Destination of the changes found by a sync."""
+
+    @abc.abstractmethod
+    def update(self, item: Dict[str, str], metadata: JSON, dcat: bytes):
+        """Store a dataset added or updated.
+
+        Args:
+            item (Dict[str, str]): search item of the dataset
+            metadata (JSON): JSON information of the dataset
+            dcat (bytes): serialized DCAT description of the dataset
+        """
+
+    @abc.abstractmethod
+    def delete(self, dataset_id: str):
+        """Remove a dataset deleted.
+
+        Args:
+            dataset_id (str): persistent ID of the dataset
+        """
+
+
+class DirectoryTarget(SyncTarget):
+    """Writes the DCAT of each dataset to a file of a directory."""
+
+    def __init__(self, directory: pathlib.Path, extension: str = ".nt"):
+        self.directory = directory
+        self.extension = extension
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, dataset_id: str) -> pathlib.Path:
+        name = "".join(c for c in dataset_id if c not in "\\/:*?<>|")
+        return self.directory / (name + self.extension)
+
+    def update(self, item: Dict[str, str], metadata: JSON, dcat: bytes):
+        self._path(item["global_id"]).write_bytes(dcat)
+
+    def delete(self, dataset_id: str):
+        self._path(dataset_id).unlink(missing_ok=True)
+
+
+class SearchIndexTarget(SyncTarget):
+    """Keeps the local search index up to date."""
+
+    def __init__(self, index):
+        """Initialize the target.
+
+        Args:
+            index (SearchIndex): the local search index
+        """
+        self.index = index
+
+    def update(self, item: Dict[str, str], metadata: JSON, dcat: bytes):
+        self.index.add([item])
+
+    def delete(self, dataset_id: str):
+        self.index.remove([dataset_id])
+
+
+class DcatStoreTarget(SyncTarget):
+    """Keeps the DCAT store up to date (requires the N-Triples format)."""
+
+    def __init__(self, store):
+        """Initialize the target.
+
+        Args:
+            store (DcatStore): the DCAT store
+        """
+        self.store = store
+
+    def update(self, item: Dict[str, str], metadata: JSON, dcat: bytes):
+        self.store.put(
+            item["global_id"],
+            metadata["persistentUrl"],
+            get_dataset_version(metadata),
+            dcat,
+        )
+
+    def delete(self, dataset_id: str):
+        self.store.delete(dataset_id)
+
+
+@dataclass
+class SyncReport:
+    """Outcome of a sync."""
+
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    errors: int = 0
+    # Datasets that failed permanently at their current update time.
+    skipped: int = 0
+    seconds: float = 0.0
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether fetching a dataset would fail again with the same error.
+
+    Args:
+        error (Exception): error raised fetching a dataset
+
+    Returns:
+        bool: `True` for the client errors of the dataverse (4xx responses
+            but 429), `False` for the other errors, e.g. connection errors
+            and 5xx responses
+    """
+    response = getattr(error, "response", None)
+    return (
+        isinstance(error, HTTPError)
+        and response is not None
+        and 400 <= response.status_code < 500
+        and response.status_code != 429
+    )
+
+
+class CatalogueSync:
+    """Incremental sync of the datasets of a dataverse to targets."""
+
+    def __init__(
+        self,
+        dq,
+        state_path: str,
+        targets: Iterable[SyncTarget],
+        service: Optional[ConversionService] = None,
+        rdf_format: str = "nt",
+        per_page: int = 100,
+        max_in_flight: int = 8,
+    ):
+        """Initialize the sync, creating its state if needed.
+
+        Args:
+            dq (DataverseQuery): query object of the dataverse, preferably
+                without cache
+            state_path (str): path of the SQLite database of the state
+            targets (Iterable[SyncTarget]): destinations of the changes
+            service (Optional[ConversionService]): service converting the
+                datasets, converting in the calling thread by default
+            rdf_format (str): name of the RDFLib serialization format
+            per_page (int): number of datasets requested per search page
+            max_in_flight (int): number of datasets fetched concurrently
+        """
+        self.dq = dq
+        self.targets = list(targets)
+        self.service = service or ConversionService(0)
+        self.rdf_format = rdf_format
+        self.per_page = per_page
+        self.max_in_flight = max_in_flight
+        self.connection = sqlite3.connect(state_path)
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    @property
+    def high_water_mark(self) -> Optional[str]:
+        """Most recent update time of the datasets synced."""
+        row = self.connection.execute(
+            "SELECT value FROM properties WHERE key = 'high_water_mark'"
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _set_high_water_mark(self, value: str):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO properties VALUES ('high_water_mark', ?)",
+                (value,),
+            )
+
+    def known_updates(self) -> Dict[str, str]:
+        """Update times of the datasets not deleted, by persistent ID."""
+        return dict(
+            self.connection.execute(
+                "SELECT id, updated_at FROM datasets WHERE deleted_at IS NULL"
+            )
+        )
+
+    def failures(self, permanent: bool) -> Dict[str, Dict[str, str]]:
+        """Search items of the datasets that failed, by persistent ID.
+
+        Args:
+            permanent (bool): whether to list the permanent failures, or the
+                transient ones
+
+        Returns:
+            Dict[str, Dict[str, str]]: search items of the datasets, as they
+                were when they failed
+        """
+        rows = self.connection.execute(
+            "SELECT id, item FROM failures WHERE permanent = ?", (int(permanent),)
+        )
+        return {dataset_id: codec.loads(item) for dataset_id, item in rows}
+
+    def run(self) -> SyncReport:
+        """Sync the datasets updated or deleted since the previous sync.
+
+        Returns:
+            SyncReport: numbers of datasets updated, unchanged (listed again
+                but already synced), deleted, failed and skipped (failed
+                permanently by a previous sync, and not updated since)
+        """
+        start = time.monotonic()
+        report = SyncReport()
+        mark = self.high_water_mark
+        known = self.known_updates()
+        permanent = self.failures(permanent=True)
+        items = dict()
+        for item in self.dq.iter_recently_updated(mark, self.per_page):
+            dataset_id, updated_at = item["global_id"], item["updatedAt"]
+            if known.get(dataset_id) == updated_at:
+                report.unchanged += 1
+            elif dataset_id in permanent and (
+                permanent[dataset_id]["updatedAt"] == updated_at
+            ):
+                report.skipped += 1
+            else:
+                items[dataset_id] = item
+        # The high-water mark moves past the datasets that fail, which are
+        #  recorded instead: the transient failures are retried now.
+        new_mark = max((item["updatedAt"] for item in items.values()), default=mark)
+        for dataset_id, item in self.failures(permanent=False).items():
+            items.setdefault(dataset_id, item)
+
+        items = list(items.values())
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            # Chunks bound the number of dataset JSONs held in memory.
+            for i in range(0, len(items), self.per_page):
+                chunk = items[i : i + self.per_page]
+                self._update(chunk, executor, report)
+        if new_mark is not None and new_mark != mark:
+            self._set_high_water_mark(new_mark)
+
+        report.deleted = self._delete_missing()
+        report.seconds = time.monotonic() - start
+        return report
+
+    def _update(
+        self,
+        items: List[Dict[str, str]],
+        executor: ThreadPoolExecutor,
+        report: SyncReport,
+    ):
+        """Fetch, convert and store datasets, recording the failures."""
+        items_by_id = {item["global_id"]: item for item in items}
+        documents = dict(executor.map(self._fetch, items_by_id))
+        for dataset_id, doc in documents.items():
+            if isinstance(doc, Exception):
+                self._fail(items_by_id[dataset_id], doc, is_permanent(doc), report)
+        results = self.service.imap_unordered(
+            ((id, doc) for id, doc in documents.items() if isinstance(doc, dict)),
+            self.rdf_format,
+            streaming=True,
+        )
+        for dataset_id, future in results:
+            item, metadata = items_by_id[dataset_id], documents[dataset_id]
+            try:
+                dcat = future.result()
+            except Exception as e:
+                # The conversion of the same JSON would fail again, unless
+                #  a worker process died.
+                permanent = not isinstance(e, BrokenProcessPool)
+                self._fail(item, e, permanent, report)
+                continue
+            try:
+                for target in self.targets:
+                    target.update(item, metadata, dcat)
+            except Exception as e:
+                self._fail(item, e, False, report)
+                continue
+            self._record(dataset_id, metadata, item["updatedAt"])
+            report.updated += 1
+
+    def _fetch(self, dataset_id: str) -> Tuple[str, Union[JSON, Exception]]:
+        """JSON information of a dataset, or the error fetching it."""
+        try:
+            return dataset_id, self.dq.get_dataset_metadata(dataset_id)
+        except Exception as e:
+            return dataset_id, e
+
+    def _fail(
+        self,
+        item: Dict[str, str],
+        error: Exception,
+        permanent: bool,
+        report: SyncReport,
+    ):
+        """Record a dataset that could not be synced."""
+        dataset_id = item["global_id"]
+        kind = "permanently" if permanent else "for now"
+        logging.warning(f"Could not sync dataset {dataset_id} {kind}: {error!r}")
+        report.errors += 1
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)",
+                (dataset_id, codec.dumps(item).decode(), int(permanent), repr(error)),
+            )
+
+    def _record(self, dataset_id: str, metadata: JSON, updated_at: str):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, NULL)",
+                (dataset_id, get_dataset_version(metadata), updated_at),
+            )
+            self.connection.execute("DELETE FROM failures WHERE id = ?", (dataset_id,))
+
+    def _delete_missing(self) -> int:
+        """Record the datasets deleted, listing them only if some were.
+
+        The list is paged, hence a dataset can be missing from it because
+        the catalogue changed while it was listed: each dataset missing is
+        only deleted once the dataverse answers that it does not exist.
+
+        Returns:
+            int: number of datasets deleted
+        """
+        known = self.known_updates()
+        if self.dq.count_datasets() >= len(known):
+            return 0
+        _, items = self.dq.harvest_datasets(per_page=1000)
+        missing = set(known).difference(item["global_id"] for item in items)
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        deleted = 0
+        for dataset_id in sorted(missing):
+            if not self._is_deleted(dataset_id):
+                continue
+            for target in self.targets:
+                target.delete(dataset_id)
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE datasets SET deleted_at = ? WHERE id = ?",
+                    (now, dataset_id),
+                )
+                self.connection.execute(
+                    "DELETE FROM failures WHERE id = ?", (dataset_id,)
+                )
+            deleted += 1
+        return deleted
+
+    def _is_deleted(self, dataset_id: str) -> bool:
+        """Whether the dataverse answers that a dataset does not exist."""
+        try:
+            self.dq.get_dataset_metadata(dataset_id)
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return True
+            logging.warning(f"Could not check dataset {dataset_id}: {e!r}")
+        except Exception as e:
+            logging.warning(f"Could not check dataset {dataset_id}: {e!r}")
+        return False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the `dataverse-sync` command."""
+    from dataverse_query.bulk_convert import EXTENSIONS
+    from dataverse_query.dataverse_query import DataverseQuery
+    from dataverse_query.dcat_store import DcatStore
+    from dataverse_query.search_index import SearchIndex
+    from dataverse_query.streaming import STREAMING_FORMATS
+
+    parser = argparse.ArgumentParser(
+        description="Sync the datasets of a dataverse updated since the last sync."
+    )
+    parser.add_argument("state", help="Path of the SQLite database of the state.")
+    parser.add_argument(
+        "--url",
+        default=os.environ.get(
+            "DATAVERSE_URL", "https://entrepot.recherche.data.gouv.fr/"
+        ),
+        help="URL of the dataverse (DATAVERSE_URL by default).",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        help="Directory where the DCAT of each dataset is written to a file.",
+    )
+    parser.add_argument(
+        "--dcat-store", help="DCAT store to keep up to date (nt format only)."
+    )
+    parser.add_argument("--format", default="nt", choices=STREAMING_FORMATS)
+    parser.add_argument("--search-index", help="Local search index to keep up to date.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes converting the datasets (0 for none).",
+    )
+    args = parser.parse_args(argv)
+    if args.dcat_store is not None and args.format != "nt":
+        parser.error("--dcat-store requires the nt format.")
+
+    with DataverseQuery(args.url) as dq:
+        targets = []
+        if args.output_dir is not None:
+            targets.append(DirectoryTarget(args.output_dir, EXTENSIONS[args.format]))
+        if args.dcat_store is not None:
+            targets.append(DcatStoreTarget(DcatStore(args.dcat_store)))
+        if args.search_index is not None:
+            targets.append(
+                SearchIndexTarget(SearchIndex(args.search_index, dq.base_url))
+            )
+        service = ConversionService(args.workers)
+        sync = CatalogueSync(dq, args.state, targets, service, args.format)
+        try:
+            report = sync.run()
+        finally:
+            sync.close()
+            service.shutdown()
+    print(
+        f"updated {report.updated}, unchanged {report.unchanged}, "
+        f"deleted {report.deleted}, errors {report.errors}, "
+        f"skipped {report.skipped} in {report.seconds:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
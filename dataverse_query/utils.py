@@ -1,4 +1,50 @@
-from typing import Dict
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+JSON = Any  # Placeholder for JSON type hint.
+
+# RDF serializations of the DCAT of a dataset, by media type: name of the
+#  RDFLib serialization format and file extension.
+RDF_FORMATS = {
+    "text/turtle": ("turtle", ".ttl"),
+    "application/ld+json": ("json-ld", ".jsonld"),
+    "application/n-triples": ("nt", ".nt"),
+    "application/rdf+xml": ("xml", ".rdf"),
+}
+
+# Types of the objects the dataverse search can be restricted to.
+SEARCH_TYPES = ("dataverse", "dataset", "file")
+
+
+def normalize_search(
+    query: str, types: Optional[Iterable[str]] = None
+) -> Tuple[str, Tuple[str, ...]]:
+    """Normalize the parameters of a search, so that equivalent searches match.
+
+    The case of the query is kept: the dataverse (Solr) treats `AND`, `OR`
+    and `NOT` as operators and some fields (e.g. `authorName:`) as case
+    sensitive, hence queries differing by case are different searches.
+
+    Args:
+        query (str): search query
+        types (Optional[Iterable[str]]): types of the objects searched
+
+    Raises:
+        ValueError: If a type is not one of `SEARCH_TYPES`.
+
+    Returns:
+        Tuple[str, Tuple[str, ...]]: query with its whitespace collapsed, and
+            the sorted lower-cased types without duplicates
+    """
+    query = " ".join(query.split())
+    types = tuple(sorted({t.strip().lower() for t in types or () if t.strip()}))
+    for t in types:
+        if t not in SEARCH_TYPES:
+            raise ValueError(f"Unknown search type {t}.")
+    return query, types
 
 
 def convert_to_global_search_response(
@@ -49,3 +95,85 @@ def convert_to_global_search_response(
     ]
 
     return datasource
+
+
+def get_dataset_version(dataset: Dict[str, str]) -> str:
+    """Get a string identifying the version of a dataset.
+
+    Args:
+        dataset (Dict[str, str]): JSON information of a dataset
+
+    Returns:
+        str: version number and last update time of the latest version
+    """
+    latest_version = dataset["latestVersion"]
+    return (
+        f"{latest_version.get('versionNumber')}"
+        f".{latest_version.get('versionMinorNumber')}"
+        f"@{latest_version.get('lastUpdateTime')}"
+    )
+
+
+def get_dataset_last_modified(dataset: Dict[str, str]) -> Optional[datetime]:
+    """Get the time of the last update of a dataset.
+
+    Args:
+        dataset (Dict[str, str]): JSON information of a dataset
+
+    Returns:
+        Optional[datetime]: last update time of the latest version (in UTC),
+            `None` if it is missing or invalid
+    """
+    last_update = dataset["latestVersion"].get("lastUpdateTime")
+    try:
+        # `fromisoformat` does not accept the "Z" suffix before Python 3.11.
+        return datetime.fromisoformat(last_update.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_item_updated_at(item: Dict[str, str]) -> Optional[str]:
+    """Get the time of the last update of an object of the search API.
+
+    Args:
+        item (Dict[str, str]): search item of an object
+
+    Returns:
+        Optional[str]: ISO 8601 update time of the object, or its publication
+            time for the objects without one (e.g. collections), `None` if
+            it has neither
+    """
+    return item.get("updatedAt") or item.get("published_at") or None
+
+
+def encode_cursor(offset: int) -> str:
+    """Encode the position of a page of a listing as an opaque cursor.
+
+    Args:
+        offset (int): number of items preceding the page
+
+    Returns:
+        str: URL-safe cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): the cursor
+
+    Raises:
+        ValueError: If the cursor is not valid
+
+    Returns:
+        int: number of items preceding the page
+    """
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor {cursor}.")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"Invalid cursor {cursor}.")
+    return offset
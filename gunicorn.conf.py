@@ -0,0 +1,51 @@
+"""Configuration of gunicorn, the production server of the app.
+
+Gunicorn reads this file from the working directory (`gunicorn app:app`),
+every setting can be tuned through an environment variable. See
+https://docs.gunicorn.org/en/stable/settings.html.
+
+The app is loaded before forking the workers (`preload_app`), and warmed up
+(parsing plan, language index, RFC 3987 regex), so that all the workers share
+those structures copy-on-write instead of building them each.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', 8080)}")
+
+# Threaded workers: most of the time of a request is spent waiting for the
+#  dataverse, and streamed responses must not block a whole worker. The ASGI
+#  entry point (`gunicorn asgi:app`) needs `uvicorn_worker.UvicornWorker`,
+#  whose requests other than the global searches run in `threads` threads.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+
+# Seconds an idle connection is kept alive, a silent worker is restarted
+#  after, and workers are given to finish their requests on restart.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Restart the workers after this many requests (0 never restarts them).
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+# Access log file, "-" logs to stdout and an empty value disables it.
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    """Warm up the preloaded app, before the workers are forked."""
+    if not preload_app or os.environ.get("DATAVERSE_WARMUP", "1") == "0":
+        return
+    from dataverse_query.conversion import prewarm
+
+    prewarm()
+    server.log.info("Conversion modules warmed up.")
+    # Keep the garbage collector from touching (hence copying) the objects
+    #  shared with the workers.
+    gc.freeze()
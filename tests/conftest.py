@@ -0,0 +1,72 @@
+"""Fixtures shared by the tests."""
+
+import json
+import pathlib
+import sys
+import threading
+from typing import Callable
+
+import pytest
+
+ROOT = pathlib.Path(__file__).parents[1]
+EXAMPLE = ROOT / "examples" / "dataset.json"
+
+sys.path.insert(0, str(ROOT / "benchmarks"))
+import stub_dataverse  # noqa: E402
+
+
+@pytest.fixture
+def example() -> dict:
+    """The example dataset JSON."""
+    return json.loads(EXAMPLE.read_text())
+
+
+@pytest.fixture
+def make_dataset() -> Callable[[int], dict]:
+    """Factory of copies of the example dataset, with their own persistent ID."""
+
+    def make(number: int) -> dict:
+        doc = json.loads(EXAMPLE.read_text())
+        identifier = f"10.5072/FK2/{number:06d}"
+        doc["identifier"] = identifier
+        doc["persistentUrl"] = f"https://doi.org/{identifier}"
+        doc["latestVersion"]["datasetPersistentId"] = f"doi:{identifier}"
+        return doc
+
+    return make
+
+
+@pytest.fixture
+def stub():
+    """Stub dataverse running in a thread, with 20 datasets.
+
+    The fixture is the handler class of the stub, whose attributes (e.g.
+    `datasets`, `updates`, `deleted`, `unavailable` or `collections`) can be
+    changed by the test. Its `url` is the URL of the stub.
+    """
+
+    class Handler(stub_dataverse.StubHandler):
+        datasets = 20
+        updates = dict()
+        deleted = set()
+        unavailable = set()
+        collections = 0
+
+    server = stub_dataverse.StubServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    Handler.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield Handler
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub, monkeypatch):
+    """Test client of the app, querying the stub dataverse without caches."""
+    import app
+    from dataverse_query.dataverse_query import DataverseQuery
+
+    monkeypatch.setattr(app, "dq", DataverseQuery(stub.url, max_retries=0))
+    monkeypatch.setattr(app, "cache", None)
+    return app.app.test_client()
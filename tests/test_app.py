@@ -0,0 +1,123 @@
+"""Tests of the routes of the app, against the stub dataverse."""
+
+import json
+
+from rdflib import DCAT, RDF, Graph, URIRef
+
+from dataverse_query.conversion import ConversionService
+from dataverse_query.dataset import Dataset
+from dataverse_query.dcat_store import DcatStore
+
+DATASET = "doi:10.5072/FK2/000001"
+
+
+def test_metadata_etag_is_weak(client):
+    response = client.head(f"/metadata/{DATASET}", headers={"Accept": "text/turtle"})
+
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert weak
+
+    for if_none_match in (f'W/"{etag}"', f'"{etag}"'):
+        response = client.head(
+            f"/metadata/{DATASET}",
+            headers={"Accept": "text/turtle", "If-None-Match": if_none_match},
+        )
+        assert response.status_code == 304
+        assert response.get_etag() == (etag, True)
+
+
+def test_unsatisfiable_range_is_relayed_without_body(client, stub):
+    response = client.get(
+        f"/dataset/{DATASET}", headers={"Range": f"bytes={stub.payload_size}-"}
+    )
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{stub.payload_size}"
+    assert "Content-Type" not in response.headers
+    assert response.data == b""
+
+
+def test_listing_with_zero_limit_has_no_next_page(client):
+    response = client.get("/dataset?limit=0")
+
+    assert response.status_code == 200
+    assert response.json == []
+    assert response.headers["X-Total-Count"] == "20"
+    assert "Link" not in response.headers
+
+
+def test_batch_failures_header_is_capped(client, stub):
+    import app
+
+    ids = [f"doi:10.5072/FK2/{number:06d}" for number in range(1, 101)]
+    stub.deleted = set(range(2, 101))
+
+    response = client.post(
+        "/metadata", json=ids, headers={"Accept": "application/n-triples"}
+    )
+
+    assert response.status_code == 200
+    assert b"10.5072/FK2/000001" in response.data
+    assert response.headers["X-Failed-Count"] == "99"
+    header = response.headers["X-Failed-Datasets"]
+    assert len(header) <= app.BATCH_FAILURES_HEADER_MAX_SIZE
+    failures = json.loads(header)
+    assert 0 < len(failures) < 99
+    assert [failure["id"] for failure in failures] == ids[1 : len(failures) + 1]
+    assert all(failure["status"] == 404 for failure in failures)
+
+
+def test_catalog_pages_link_to_the_datasets(
+    client, make_dataset, tmp_path, monkeypatch
+):
+    import app
+
+    store = DcatStore(str(tmp_path / "store.db"))
+    for number in range(3):
+        doc = make_dataset(number)
+        dcat = Dataset(doc).serialize("nt", streaming=True)
+        store.put(f"doi:{doc['identifier']}", doc["persistentUrl"], "1.0", dcat)
+    monkeypatch.setattr(app, "dcat_store", store)
+
+    datasets = set()
+    url = "/catalog?limit=2"
+    while url:
+        response = client.get(url, headers={"Accept": "text/turtle"})
+        assert response.status_code == 200
+        graph = Graph().parse(data=response.data, format="turtle")
+        catalog = URIRef("http://localhost/catalog")
+        for dataset in graph.objects(catalog, DCAT.dataset):
+            assert (dataset, RDF.type, DCAT.Dataset) in graph
+            datasets.add(dataset)
+        link = response.headers.get("Link")
+        url = link[1 : link.index(">")] if link else None
+
+    assert datasets == {
+        URIRef(f"https://doi.org/10.5072/FK2/{number:06d}") for number in range(3)
+    }
+
+
+def test_worker_conversion_timings_are_exposed(client, monkeypatch):
+    import app
+
+    def sample(name: str) -> float:
+        for line in client.get("/metrics").text.splitlines():
+            if line.startswith(name + " "):
+                return float(line.rpartition(" ")[2])
+        return 0.0
+
+    serialization = 'dataverse_serialization_seconds_count{format="json-ld"}'
+    step = 'dataverse_conversion_step_seconds_count{method="general_dataset"}'
+    before = sample(serialization), sample(step)
+    service = ConversionService(1)
+    monkeypatch.setattr(app, "conversion_service", service)
+    try:
+        response = client.head(
+            f"/metadata/{DATASET}", headers={"Accept": "application/ld+json"}
+        )
+    finally:
+        service.shutdown()
+
+    assert response.status_code == 200
+    assert (sample(serialization), sample(step)) == (before[0] + 1, before[1] + 1)
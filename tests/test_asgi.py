@@ -0,0 +1,70 @@
+"""Tests of the ASGI entry point, against the stub dataverse."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("asgiref")
+httpx = pytest.importorskip("httpx")
+
+import app  # noqa: E402
+import asgi  # noqa: E402
+from dataverse_query.async_dataverse_query import AsyncDataverseQuery  # noqa: E402
+from dataverse_query.cache import MemoryCache  # noqa: E402
+from dataverse_query.dataverse_query import DataverseQuery  # noqa: E402
+
+
+@pytest.fixture
+def asgi_client(stub, monkeypatch):
+    """Factory of clients of the ASGI app, querying the stub dataverse.
+
+    Also returns the global searches made by the Flask app.
+    """
+    search_cache = MemoryCache()
+    dq = DataverseQuery(stub.url, max_retries=0, search_cache=search_cache)
+    adq = AsyncDataverseQuery(stub.url, max_retries=0, search_cache=search_cache)
+    monkeypatch.setattr(app, "dq", dq)
+    monkeypatch.setattr(app, "cache", None)
+    monkeypatch.setattr(asgi, "adq", adq)
+    searches = []
+    fetch = dq._fetch_global_search
+    monkeypatch.setattr(
+        dq, "_fetch_global_search", lambda *args: searches.append(args) or fetch(*args)
+    )
+
+    def make() -> httpx.AsyncClient:
+        transport = httpx.ASGITransport(app=asgi.app)
+        return httpx.AsyncClient(transport=transport, base_url="http://app")
+
+    return make, searches
+
+
+def test_global_searches_are_queried_from_the_event_loop(asgi_client, stub):
+    make, searches = asgi_client
+    stub.latency = 0.2
+
+    async def search_all():
+        async with make() as client:
+            return await asyncio.gather(
+                *(client.get(f"/globalSearch?q=title:{i}") for i in range(40))
+            )
+
+    responses = asyncio.run(search_all())
+
+    assert [response.status_code for response in responses] == [200] * 40
+    assert all(len(response.json()) == 10 for response in responses)
+    # The Flask app answered from the search cache.
+    assert searches == []
+
+
+def test_other_requests_are_served_by_the_flask_app(asgi_client):
+    make, searches = asgi_client
+
+    async def get(path: str) -> httpx.Response:
+        async with make() as client:
+            return await client.get(path)
+
+    assert asyncio.run(get("/heartbeat")).status_code == 200
+    response = asyncio.run(get("/globalSearch?q=x&per_page=0"))
+    assert response.status_code == 400
+    assert searches == []
@@ -0,0 +1,54 @@
+"""Tests of the asynchronous queries, against the stub dataverse."""
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from dataverse_query.async_dataverse_query import AsyncDataverseQuery  # noqa: E402
+from dataverse_query.cache import MemoryCache  # noqa: E402
+
+
+def test_instance_is_usable_from_several_event_loops(stub):
+    adq = AsyncDataverseQuery(stub.url)
+
+    async def search():
+        return await adq.global_search("dataset", per_page=3)
+
+    assert len(asyncio.run(search())) == 3
+    # A new loop, like the one of each request of an `async def` Flask view.
+    assert len(asyncio.run(search())) == 3
+
+
+def test_identical_queries_are_made_once(stub, monkeypatch):
+    queries = []
+    search = stub.search
+
+    def record(self, query):
+        queries.append(query["q"][0])
+        return search(self, query)
+
+    monkeypatch.setattr(stub, "search", record)
+    monkeypatch.setattr(stub, "latency", 0.1)
+    adq = AsyncDataverseQuery(stub.url, search_cache=MemoryCache())
+
+    async def searches():
+        async with adq:
+            results = await asyncio.gather(
+                *(adq.global_search("alloy") for _ in range(5))
+            )
+            results.append(await adq.global_search("alloy"))
+        return results
+
+    results = asyncio.run(searches())
+    assert queries == ["alloy"]
+    assert all(result == results[0] for result in results)
+
+
+def test_retry_after_is_capped():
+    adq = AsyncDataverseQuery("http://localhost/", max_backoff=30.0)
+    response = httpx.Response(503, headers={"Retry-After": "86400"})
+    assert adq._backoff(0, response) == 30.0
+    assert adq._backoff(10, httpx.Response(503)) == 30.0
+    assert adq._backoff(0, httpx.Response(503)) == 0.5
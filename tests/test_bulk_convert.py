@@ -0,0 +1,66 @@
+"""Tests of the `dataverse-dcat` bulk conversion command."""
+
+import json
+
+from rdflib import DCAT, RDF, Graph, URIRef
+from rdflib.compare import isomorphic
+
+from dataverse_query.bulk_convert import main
+
+
+def write_ndjson(path, lines):
+    path.write_text("".join(line + "\n" for line in lines))
+
+
+def datasets_in(path) -> set:
+    graph = Graph().parse(path, format="nt")
+    return set(graph.subjects(RDF.type, DCAT.Dataset))
+
+
+def test_invalid_documents_are_reported_and_skipped(tmp_path, make_dataset, capsys):
+    source = tmp_path / "datasets.ndjson"
+    write_ndjson(
+        source,
+        [
+            json.dumps(make_dataset(0)),
+            '{"persistentUrl": ',
+            "[1, 2, 3]",
+            json.dumps({"data": make_dataset(1)}),
+        ],
+    )
+    output = tmp_path / "catalogue.nt"
+
+    status = main([str(source), "--output", str(output), "--workers", "0"])
+
+    assert status == 1
+    assert datasets_in(output) == {
+        URIRef("https://doi.org/10.5072/FK2/000000"),
+        URIRef("https://doi.org/10.5072/FK2/000001"),
+    }
+    stderr = capsys.readouterr().err
+    assert "datasets.ndjson:2" in stderr
+    assert "datasets.ndjson:3" in stderr
+    assert "converted 2, skipped 0, errors 2" in stderr
+
+
+def test_resume_drops_the_incomplete_line(tmp_path, make_dataset, capsys):
+    source = tmp_path / "datasets.ndjson"
+    write_ndjson(source, [json.dumps(make_dataset(i)) for i in range(3)])
+    output = tmp_path / "catalogue.nt"
+    checkpoint = tmp_path / "done.txt"
+    arguments = [str(source), "--output", str(output), "--workers", "0"]
+    assert main(arguments + ["--checkpoint", str(checkpoint)]) == 0
+
+    # Simulate a run interrupted while writing the last dataset.
+    lines = checkpoint.read_text().splitlines()
+    checkpoint.write_text("\n".join(lines[:2]) + "\n")
+    data = output.read_bytes()
+    output.write_bytes(data[: len(data) - 40])
+
+    assert main(arguments + ["--checkpoint", str(checkpoint)]) == 0
+
+    assert "skipped 2, errors 0" in capsys.readouterr().err
+    assert len(datasets_in(output)) == 3
+    assert isomorphic(
+        Graph().parse(output, format="nt"), Graph().parse(data=data, format="nt")
+    )
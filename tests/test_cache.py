@@ -0,0 +1,52 @@
+"""Tests of the caches."""
+
+import threading
+
+from dataverse_query.cache import DiskCache, MemoryCache
+
+
+def test_disk_cache_lists_the_directory_only_when_full(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), maxsize=100)
+    listings = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: listings.append(1) or entries())
+
+    for number in range(1000):
+        cache.set(f"key{number}", number)
+        assert len(entries()) <= cache.maxsize
+
+    # Once to count the entries, then once per 10 new entries over 100.
+    assert len(listings) <= 1 + 900 // 10 + 1
+    assert cache.get("key999") == 999
+    assert cache.evictions == 1000 - len(entries())
+
+
+def test_disk_cache_overwrite_is_not_a_new_entry(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), maxsize=10)
+    cache.set("key", 0)
+    evictions = []
+    monkeypatch.setattr(cache, "_evict", lambda: evictions.append(1))
+
+    for number in range(100):
+        cache.set("key", number)
+
+    assert not evictions
+    assert cache.get("key") == 99
+
+
+def test_counters_are_thread_safe(tmp_path):
+    for cache in (MemoryCache(), DiskCache(str(tmp_path))):
+        cache.set("key", "value")
+
+        def read():
+            for _ in range(500):
+                cache.get("key")
+                cache.get("missing")
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert (cache.hits, cache.misses) == (4000, 4000)
@@ -0,0 +1,28 @@
+"""Tests of the conversion service and its worker processes."""
+
+import os
+import signal
+
+import pytest
+
+from dataverse_query.conversion import ConversionService
+
+
+@pytest.fixture
+def service():
+    service = ConversionService(1)
+    yield service
+    service.shutdown()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="Requires SIGKILL.")
+def test_pool_is_restarted_after_a_worker_died(service, example):
+    expected = service.convert(example, "nt", streaming=True)
+
+    # As if the OOM killer killed the worker.
+    for process in list(service._executor._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+
+    assert service.convert(example, "nt", streaming=True) == expected
+    assert service.submit(example, "nt", streaming=True).result() == expected
@@ -0,0 +1,45 @@
+"""Tests of the conversion of datasets to DCAT."""
+
+import hashlib
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).parents[1]
+
+SERIALIZE = """
+import hashlib, json, sys
+from dataverse_query.dataset import Dataset
+doc = json.load(open("examples/dataset.json"))
+data = Dataset(doc).serialize(sys.argv[1], streaming=True)
+print(hashlib.sha1(data).hexdigest())
+"""
+
+
+def serialize_in_subprocess(format: str, hash_seed: str) -> str:
+    """SHA-1 of the streamed serialization of the example, in a new process."""
+    environment = {**os.environ, "PYTHONHASHSEED": hash_seed}
+    return subprocess.run(
+        [sys.executable, "-c", SERIALIZE, format],
+        cwd=ROOT,
+        env=environment,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.mark.parametrize("format", ["nt", "nquads", "turtle"])
+def test_streamed_serialization_is_reproducible(format):
+    digests = {serialize_in_subprocess(format, seed) for seed in ("1", "2", "3")}
+    assert len(digests) == 1
+
+
+def test_parsing_plan_respects_requirements():
+    from dataverse_query.dataset import Dataset
+
+    plan = [step.name for step in Dataset.get_parsing_plan()]
+    assert plan.index("general_publisher") < plan.index("general_dataset")
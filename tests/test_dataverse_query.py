@@ -0,0 +1,49 @@
+"""Tests of the queries to the dataverse, against the stub dataverse."""
+
+import pytest
+
+from dataverse_query.cache import MemoryCache
+from dataverse_query.dataverse_query import DataverseQuery
+
+
+@pytest.fixture
+def searches(stub, monkeypatch):
+    """Queries received by the search API of the stub."""
+    queries = []
+    search = stub.search
+
+    def record(self, query):
+        queries.append(query["q"][0])
+        return search(self, query)
+
+    monkeypatch.setattr(stub, "search", record)
+    return queries
+
+
+def test_global_search_forwards_the_case_of_the_query(stub, searches):
+    with DataverseQuery(stub.url, search_cache=MemoryCache()) as dq:
+        dq.global_search("authorName:Doe   AND\ttitle:Alloy")
+        dq.global_search("authorName:Doe AND title:Alloy")
+        dq.global_search("authorname:doe and title:alloy")
+
+    # Only the whitespace is normalized, queries differing by case differ.
+    assert searches == [
+        "authorName:Doe AND title:Alloy",
+        "authorname:doe and title:alloy",
+    ]
+
+
+def test_harvest_with_zero_limit_only_counts(stub, monkeypatch):
+    pages = []
+    search = stub.search
+
+    def record(self, query):
+        pages.append(int(query["per_page"][0]))
+        return search(self, query)
+
+    monkeypatch.setattr(stub, "search", record)
+    with DataverseQuery(stub.url) as dq:
+        total_count, datasets = dq.harvest_datasets(offset=5, limit=0)
+
+        assert (total_count, list(datasets)) == (20, [])
+    assert pages == [1]
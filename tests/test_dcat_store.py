@@ -0,0 +1,57 @@
+"""Tests of the DCAT store and of the catalogue it serves."""
+
+from rdflib import DCAT, RDF, Graph, URIRef
+
+from dataverse_query.dataset import Dataset
+from dataverse_query.dcat_store import DcatStore, catalog_triples
+
+CATALOG = "http://localhost/catalog"
+
+
+def put(store: DcatStore, doc: dict, version: str = "1.0"):
+    dcat = Dataset(doc).serialize("nt", streaming=True)
+    store.put(f"doi:{doc['identifier']}", doc["persistentUrl"], version, dcat)
+
+
+def test_catalog_links_to_the_dataset_descriptions(tmp_path, make_dataset):
+    store = DcatStore(str(tmp_path / "store.db"))
+    for number in range(3):
+        put(store, make_dataset(number))
+
+    graph = Graph().parse(
+        data=b"".join(catalog_triples(CATALOG, store.page())), format="nt"
+    )
+
+    datasets = set(graph.objects(URIRef(CATALOG), DCAT.dataset))
+    assert datasets == {
+        URIRef(f"https://doi.org/10.5072/FK2/{number:06d}") for number in range(3)
+    }
+    for dataset in datasets:
+        assert (dataset, RDF.type, DCAT.Dataset) in graph
+    # The blank nodes of the datasets are not merged.
+    assert len(set(graph.subjects(RDF.type, DCAT.Dataset))) == 3
+
+
+def test_pages_follow_the_order_of_the_updates(tmp_path, make_dataset):
+    store = DcatStore(str(tmp_path / "store.db"))
+    for number in range(5):
+        put(store, make_dataset(number))
+    put(store, make_dataset(1), "2.0")
+
+    first = store.page(0, 3)
+    second = store.page(first[-1][0], 3)
+
+    uris = [uri for _, uri, _ in first + second]
+    assert uris == [
+        f"https://doi.org/10.5072/FK2/{number:06d}" for number in (0, 2, 3, 4, 1)
+    ]
+    assert store.get("doi:10.5072/FK2/000001", "2.0") is not None
+    assert store.get("doi:10.5072/FK2/000001", "1.0") is None
+
+
+def test_delete(tmp_path, make_dataset):
+    store = DcatStore(str(tmp_path / "store.db"))
+    put(store, make_dataset(0))
+    store.delete("doi:10.5072/FK2/000000")
+    assert len(store) == 0
+    assert store.page() == []
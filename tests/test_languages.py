@@ -0,0 +1,40 @@
+"""Tests of the persisted index of the languages."""
+
+import json
+
+import pytest
+
+from dataverse_query import languages
+
+
+@pytest.fixture
+def index_file(tmp_path, monkeypatch):
+    """Path of the persisted index, used by a fresh index of the languages."""
+    path = tmp_path / "languages.json"
+    monkeypatch.setenv(languages.INDEX_FILE_VARIABLE, str(path))
+    monkeypatch.setattr(languages, "_language_index", None)
+    return path
+
+
+def test_index_is_persisted_and_loaded(index_file):
+    index = languages.get_language_index()
+
+    assert languages.load_language_index(str(index_file)) == index
+
+
+def test_stale_index_is_rebuilt(index_file, monkeypatch):
+    languages.save_language_index({"french": "stale"}, str(index_file))
+    monkeypatch.setitem(languages.DATAVERSE_SYNONYMS, "Français", "French")
+
+    assert languages.load_language_index(str(index_file)) is None
+    index = languages.get_language_index()
+    assert index["français"] == index["french"] != "stale"
+    assert languages.load_language_index(str(index_file)) == index
+
+
+@pytest.mark.parametrize("contents", [[], {"pycountry": "0"}, {"index": []}, "x"])
+def test_malformed_index_is_rebuilt(index_file, contents):
+    index_file.write_text(json.dumps(contents))
+
+    assert languages.load_language_index(str(index_file)) is None
+    assert languages.get_language_index()["french"].endswith("/fr")
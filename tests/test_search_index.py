@@ -0,0 +1,69 @@
+"""Tests of the local search index, against the stub dataverse."""
+
+import pytest
+
+from dataverse_query.dataverse_query import DataverseQuery
+from dataverse_query.search_index import SearchIndex, rebuild, update
+
+
+@pytest.fixture
+def dq(stub):
+    with DataverseQuery(stub.url) as dq:
+        yield dq
+
+
+@pytest.fixture
+def index(tmp_path, dq):
+    index = SearchIndex(str(tmp_path / "search.db"), dq.base_url)
+    yield index
+    index.close()
+
+
+def labels(results) -> set:
+    return {result["label"] for result in results or ()}
+
+
+def test_rebuild_and_search(stub, dq, index):
+    stub.datasets, stub.collections = 5, 3
+    assert rebuild(index, dq, ("dataset", "dataverse"), per_page=2) == 8
+
+    assert labels(index.search("dataset 3", types=("dataset",))) == {"Dataset 3"}
+    assert labels(index.search("collect", types=("dataverse",))) == {
+        f"Collection {i}" for i in range(3)
+    }
+    assert index.search("nothing", types=("dataset",)) is None
+
+
+def test_search_of_all_types_requires_all_types_indexed(stub, dq, index):
+    stub.datasets = 5
+    rebuild(index, dq, ("dataset", "dataverse"), per_page=10)
+    assert index.search("dataset") is None
+    assert index.search("dataset", types=("dataset", "file")) is None
+
+    rebuild(index, dq, ("dataset", "dataverse", "file"), per_page=10)
+    assert len(index.search("dataset")) == 5
+
+
+def test_update_walks_past_collections(stub, dq, index):
+    stub.datasets, stub.collections = 5, 5
+    rebuild(index, dq, ("dataset", "dataverse"), per_page=3)
+
+    # The collections have no `updatedAt`, and are listed first by date.
+    stub.datasets, stub.collections = 8, 8
+    stub.updates[1] = "2030-01-01T00:00:00Z"
+    stub.updates[2] = "2030-01-01T00:00:00Z"
+
+    assert update(index, dq, per_page=3) >= 8
+    assert len(index) == 16
+    assert labels(index.search("*", per_page=2, types=("dataset",))) == {
+        "Dataset 1",
+        "Dataset 2",
+    }
+    assert labels(index.search("collection 7", types=("dataverse",))) == {
+        "Collection 7"
+    }
+
+
+def test_update_requires_a_rebuild(dq, index):
+    with pytest.raises(ValueError):
+        update(index, dq, per_page=10)
@@ -0,0 +1,138 @@
+"""Tests of the incremental sync, against the stub dataverse."""
+
+import pytest
+
+from dataverse_query.dataverse_query import DataverseQuery
+from dataverse_query.dcat_store import DcatStore
+from dataverse_query.sync import CatalogueSync, DcatStoreTarget, DirectoryTarget
+
+
+def doi(number: int) -> str:
+    return f"doi:10.5072/FK2/{number:06d}"
+
+
+@pytest.fixture
+def dq(stub):
+    with DataverseQuery(stub.url, max_retries=0) as dq:
+        yield dq
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DcatStore(str(tmp_path / "store.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def run(tmp_path, dq, store):
+    """Run a sync to a directory and a DCAT store, returning its report."""
+    targets = [DirectoryTarget(tmp_path / "dcat"), DcatStoreTarget(store)]
+
+    def run():
+        sync = CatalogueSync(dq, str(tmp_path / "state.db"), targets, per_page=7)
+        try:
+            return sync.run()
+        finally:
+            sync.close()
+
+    return run
+
+
+def test_sync_without_changes_costs_two_queries(stub, run, tmp_path, store):
+    report = run()
+    assert (report.updated, report.errors) == (20, 0)
+    assert len(list((tmp_path / "dcat").iterdir())) == 20
+    assert len(store) == 20
+
+    queries = stub.queries
+    report = run()
+    assert stub.queries - queries == 2
+    assert (report.updated, report.deleted, report.errors) == (0, 0, 0)
+
+
+def test_updates_and_deletions(stub, run, tmp_path, store):
+    run()
+    stub.updates[3] = "2030-01-01T00:00:00Z"
+    stub.deleted.add(5)
+    stub.datasets = 22
+
+    report = run()
+
+    assert (report.updated, report.deleted, report.errors) == (3, 1, 0)
+    assert not (tmp_path / "dcat" / "doi10.5072FK2000005.nt").exists()
+    uris = [uri for _, uri, _ in store.page(0, 100)]
+    assert len(uris) == 21
+    assert "https://doi.org/10.5072/FK2/000005" not in uris
+    # The datasets updated or added move to the end of the catalogue.
+    assert set(uris[-3:]) == {
+        f"https://doi.org/10.5072/FK2/{number:06d}" for number in (3, 20, 21)
+    }
+
+
+def test_datasets_missing_from_the_list_are_confirmed(stub, run, dq, monkeypatch):
+    run()
+    stub.deleted.add(5)
+    harvest_datasets = dq.harvest_datasets
+
+    def harvest_skipping_7(**kwargs):
+        # As if dataset 7 moved to a page already listed during the listing.
+        total, items = harvest_datasets(**kwargs)
+        return total, (item for item in items if item["global_id"] != doi(7))
+
+    monkeypatch.setattr(dq, "harvest_datasets", harvest_skipping_7)
+
+    report = run()
+
+    assert report.deleted == 1
+
+
+def test_permanent_failure_does_not_hold_the_mark(stub, run, monkeypatch):
+    get_dataset = stub.get_dataset
+
+    def get_broken_dataset(self, persistent_id):
+        dataset = get_dataset(self, persistent_id)
+        if persistent_id == doi(3):
+            del dataset["publicationDate"]
+        return dataset
+
+    monkeypatch.setattr(stub, "get_dataset", get_broken_dataset)
+    report = run()
+    assert (report.updated, report.errors) == (19, 1)
+
+    # Not retried until it is updated.
+    queries = stub.queries
+    report = run()
+    assert stub.queries - queries == 2
+    assert (report.updated, report.errors) == (0, 0)
+
+    monkeypatch.setattr(stub, "get_dataset", get_dataset)
+    stub.updates[3] = "2030-01-01T00:00:00Z"
+    report = run()
+    assert (report.updated, report.errors) == (1, 0)
+
+
+def test_permanent_failure_is_skipped_at_the_same_update_time(stub, run, monkeypatch):
+    get_dataset = stub.get_dataset
+
+    def get_broken_dataset(self, persistent_id):
+        dataset = get_dataset(self, persistent_id)
+        if persistent_id == doi(19):
+            del dataset["publicationDate"]
+        return dataset
+
+    monkeypatch.setattr(stub, "get_dataset", get_broken_dataset)
+    assert run().errors == 1
+    # The most recent dataset is at the high-water mark, hence listed again.
+    report = run()
+    assert (report.skipped, report.errors) == (1, 0)
+
+
+def test_transient_failure_is_retried(stub, run):
+    stub.unavailable.add(4)
+    report = run()
+    assert (report.updated, report.errors) == (19, 1)
+
+    stub.unavailable.clear()
+    report = run()
+    assert (report.updated, report.errors) == (1, 0)